@@ -0,0 +1,70 @@
+"""Candidate searches for packages with many releases.
+
+Each of ``PACKAGES`` packages has ``RELEASES`` releases, like boto3 and botocore.
+Every solve creates a provider, which searches for the candidates of each package
+with several constraints, once per override branch out of ``BRANCHES``. The
+searches of the base provider are compared with the candidate index.
+
+Run with ``python benchmarks/candidate_index.py [PACKAGES] [RELEASES] [BRANCHES]``.
+
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+from cleo.io.null_io import NullIO
+from poetry.core.packages.dependency import Dependency
+from poetry.core.packages.package import Package
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.puzzle.provider import Provider as BaseProvider
+from poetry.repositories import Pool
+from poetry.repositories import Repository
+
+from poetry_solve_plugin.provider import Provider
+
+
+SOLVES = 3
+
+
+def make_pool(packages: int, releases: int) -> Pool:
+    repo = Repository()
+    for i in range(packages):
+        for j in range(releases):
+            repo.add_package(Package(f"p{i}", f"1.{j // 100}.{j % 100}"))
+
+    return Pool([repo])
+
+
+def search(
+    provider_class: type[BaseProvider], packages: int, releases: int, branches: int
+) -> float:
+    pool = make_pool(packages, releases)
+    root = ProjectPackage("root", "1.0")
+    constraints = ["*", ">=1.2", "^1.5", ">=1.3,<1.8", "~1.9.50", "!=1.4.2"]
+
+    start = time.perf_counter()
+    for _ in range(SOLVES):
+        provider = provider_class(root, pool, NullIO())
+        for _ in range(branches):
+            for i in range(packages):
+                for constraint in constraints:
+                    provider.search_for(Dependency(f"p{i}", constraint))
+
+    return time.perf_counter() - start
+
+
+def main(packages: int, releases: int, branches: int) -> None:
+    for name, provider_class in [("base", BaseProvider), ("index", Provider)]:
+        elapsed = search(provider_class, packages, releases, branches)
+        print(f"{name:>5}: {elapsed * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1500,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 10,
+    )
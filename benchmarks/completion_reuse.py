@@ -0,0 +1,88 @@
+"""Cost of completing the same packages again in every override branch.
+
+The root package is split on ``GROUPS`` independent markers, so the solve
+explores ``2 ** GROUPS`` override branches. Every branch completes the same
+``hub`` package, which declares ``REQUIREMENTS`` requirements.
+
+Run with ``python benchmarks/completion_reuse.py [GROUPS] [REQUIREMENTS]``.
+
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+from cleo.io.null_io import NullIO
+from poetry.core.packages.package import Package
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.factory import Factory
+from poetry.repositories import Pool
+from poetry.repositories import Repository
+
+from poetry_solve_plugin.provider import Provider
+from poetry_solve_plugin.solver import Solver
+
+
+def make_project(groups: int, requirements: int) -> tuple[ProjectPackage, Pool]:
+    root = ProjectPackage("root", "1.0")
+    repo = Repository()
+
+    hub = Package("hub", "1.0")
+    for i in range(requirements):
+        hub.add_dependency(Factory.create_dependency(f"leaf{i}", "^1.0"))
+        repo.add_package(Package(f"leaf{i}", "1.0"))
+    repo.add_package(hub)
+    root.add_dependency(Factory.create_dependency("hub", "^1.0"))
+
+    for i in range(groups):
+        marker = f'platform_machine == "m{i}"'
+        root.add_dependency(
+            Factory.create_dependency(f"p{i}", {"version": "^1.0", "markers": marker})
+        )
+        root.add_dependency(
+            Factory.create_dependency(
+                f"p{i}",
+                {"version": "^2.0", "markers": marker.replace("==", "!=")},
+            )
+        )
+        repo.add_package(Package(f"p{i}", "1.0"))
+        repo.add_package(Package(f"p{i}", "2.0"))
+
+    return root, Pool([repo])
+
+
+def main(groups: int, requirements: int) -> None:
+    root, pool = make_project(groups, requirements)
+    io = NullIO()
+    provider = Provider(root, pool, io)
+    solver = Solver(root, pool, Repository(), Repository(), io, provider)
+
+    clones = 0
+    clone = Package.clone
+
+    def counting_clone(self: Package) -> Package:
+        nonlocal clones
+        clones += 1
+        return clone(self)
+
+    Package.clone = counting_clone
+
+    start = time.perf_counter()
+    solver.solve()
+    elapsed = time.perf_counter() - start
+
+    Package.clone = clone
+
+    print(
+        f"{groups} groups, {requirements} requirements:"
+        f" {elapsed:.2f} s, {clones} package clones"
+    )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+    )
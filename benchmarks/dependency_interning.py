@@ -0,0 +1,80 @@
+"""Dependency objects held by the packages completed during a solve.
+
+The root package requires ``PACKAGES`` packages, each of them requiring the same
+``COMMON`` dependencies. The size of a dependency is the size of the object and of
+its attribute dictionary, without the shared constraints and markers.
+
+Run with ``python benchmarks/dependency_interning.py [PACKAGES] [COMMON]``.
+
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+from cleo.io.null_io import NullIO
+from poetry.core.packages.package import Package
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.factory import Factory
+from poetry.repositories import Pool
+from poetry.repositories import Repository
+
+from poetry_solve_plugin.provider import Provider
+from poetry_solve_plugin.solver import Solver
+
+
+def make_project(packages: int, common: int) -> tuple[ProjectPackage, Pool]:
+    root = ProjectPackage("root", "1.0")
+    repo = Repository()
+
+    for i in range(common):
+        repo.add_package(Package(f"common{i}", "1.0"))
+
+    for i in range(packages):
+        package = Package(f"p{i}", "1.0")
+        for j in range(common):
+            package.add_dependency(
+                Factory.create_dependency(
+                    f"common{j}",
+                    {"version": "^1.0", "markers": 'sys_platform != "win32"'},
+                )
+            )
+        repo.add_package(package)
+        root.add_dependency(Factory.create_dependency(f"p{i}", "^1.0"))
+
+    return root, Pool([repo])
+
+
+def main(packages: int, common: int) -> None:
+    root, pool = make_project(packages, common)
+    io = NullIO()
+    provider = Provider(root, pool, io)
+    solver = Solver(root, pool, Repository(), Repository(), io, provider)
+
+    start = time.perf_counter()
+    solver.solve()
+    elapsed = time.perf_counter() - start
+
+    dependencies = {
+        id(dependency): dependency
+        for _, completed in provider._completed.values()
+        for dependency in completed.all_requires
+    }
+    size = sum(
+        sys.getsizeof(dependency) + sys.getsizeof(dependency.__dict__)
+        for dependency in dependencies.values()
+    )
+    print(
+        f"{packages} packages x {common} common dependencies:"
+        f" {len(dependencies)} dependency objects ({size / 1024:.0f} KiB),"
+        f" solved in {elapsed:.2f} s"
+    )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 300,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    )
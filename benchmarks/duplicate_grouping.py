@@ -0,0 +1,78 @@
+"""Time spent grouping the duplicate requirements of packages.
+
+Each package declares ``REQUIREMENTS`` requirements: a third are duplicated with
+the same constraint and different markers (merged), a sixth are duplicated with
+different constraints and the same markers (left to the resolver), and the others
+are unique.
+
+Run with ``python benchmarks/duplicate_grouping.py [REQUIREMENTS]``.
+
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+from cleo.io.null_io import NullIO
+from poetry.core.packages.dependency import Dependency
+from poetry.core.packages.package import Package
+
+from poetry.factory import Factory
+from poetry.repositories import Pool
+
+from poetry_solve_plugin.provider import Provider
+
+
+ROUNDS = 20
+
+
+def make_requirements(requirements: int) -> list[Dependency]:
+    merged = requirements // 6
+    conflicting = requirements // 12
+    unique = requirements - 2 * merged - 2 * conflicting
+
+    dependencies = []
+    for i in range(unique):
+        dependencies.append(Factory.create_dependency(f"unique{i}", f"^{i}.0"))
+    for i in range(merged):
+        for platform in ["linux", "win32"]:
+            dependencies.append(
+                Factory.create_dependency(
+                    f"merged{i}",
+                    {"version": "^1.0", "markers": f'sys_platform == "{platform}"'},
+                )
+            )
+    for i in range(conflicting):
+        for version in ["^1.0", "^2.0"]:
+            dependencies.append(
+                Factory.create_dependency(
+                    f"conflicting{i}",
+                    {"version": version, "markers": 'sys_platform == "linux"'},
+                )
+            )
+
+    return dependencies
+
+
+def main(requirements: int) -> None:
+    root = Package("root", "1.0")
+    provider = Provider(root, Pool(), NullIO())
+
+    timings = []
+    for _ in range(ROUNDS):
+        # Merging modifies the requirements, so each round gets its own
+        dependencies = make_requirements(requirements)
+
+        start = time.perf_counter()
+        provider._merge_duplicates(dependencies, root)
+        timings.append(time.perf_counter() - start)
+
+    print(
+        f"{requirements} requirements: {min(timings) * 1000:.2f} ms per package"
+        f" (best of {ROUNDS})"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,124 @@
+"""Memory used by the override tables of branch-heavy solves.
+
+Every duplicate dependency group below is split on an independent marker, so a
+solve with ``GROUPS`` groups explores ``2 ** GROUPS`` override branches. The
+override tables of all branches are kept by the solver, and are measured with the
+representation used before (``DependencyPackage`` keys and ``Dependency`` values)
+and the interned records.
+
+Run with ``python benchmarks/override_memory.py [GROUPS]``.
+
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from cleo.io.null_io import NullIO
+from poetry.core.packages.package import Package
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.factory import Factory
+from poetry.packages import DependencyPackage
+from poetry.repositories import Pool
+from poetry.repositories import Repository
+
+from poetry_solve_plugin.overrides import override_record, package_key
+from poetry_solve_plugin.provider import Provider
+from poetry_solve_plugin.solver import Solver
+
+
+def make_project(groups: int) -> tuple[ProjectPackage, Pool]:
+    root = ProjectPackage("root", "1.0")
+    repo = Repository()
+    for i in range(groups):
+        marker = f'platform_machine == "m{i}"'
+        root.add_dependency(
+            Factory.create_dependency(f"p{i}", {"version": "^1.0", "markers": marker})
+        )
+        root.add_dependency(
+            Factory.create_dependency(
+                f"p{i}",
+                {"version": "^2.0", "markers": marker.replace("==", "!=")},
+            )
+        )
+        repo.add_package(Package(f"p{i}", "1.0"))
+        repo.add_package(Package(f"p{i}", "2.0"))
+
+    return root, Pool([repo])
+
+
+def measure(build) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return size, result
+
+
+def legacy_tables(root: ProjectPackage, overrides: list[dict]) -> list[dict]:
+    # Each branch table keyed by a completed clone of the root package
+    tables = []
+    for override in overrides:
+        package = DependencyPackage(root.to_dependency(), root.clone())
+        tables.append(
+            {
+                package: {
+                    name: record.to_dependency()
+                    for records in override.values()
+                    for name, record in records.items()
+                }
+            }
+        )
+
+    return tables
+
+
+def compact_tables(root: ProjectPackage, overrides: list[dict]) -> list[dict]:
+    tables = []
+    for override in overrides:
+        tables.append(
+            {
+                package_key(root): {
+                    name: override_record(record.to_dependency())
+                    for records in override.values()
+                    for name, record in records.items()
+                }
+            }
+        )
+
+    return tables
+
+
+def main(groups: int) -> None:
+    root, pool = make_project(groups)
+    io = NullIO()
+    solver = Solver(
+        root, pool, Repository(), Repository(), io, Provider(root, pool, io)
+    )
+
+    start = time.perf_counter()
+    tracemalloc.start()
+    solver.solve()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    elapsed = time.perf_counter() - start
+
+    overrides = solver._overrides
+    print(f"{groups} groups, {len(overrides)} override tables")
+    print(f"solve: {elapsed:.2f} s, peak {peak / 1024:.0f} KiB")
+
+    legacy, _ = measure(lambda: legacy_tables(root, overrides))
+    compact, _ = measure(lambda: compact_tables(root, overrides))
+    print(f"override tables before: {legacy / 1024:.0f} KiB")
+    print(f"override tables after:  {compact / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 6)
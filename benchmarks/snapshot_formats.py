@@ -0,0 +1,84 @@
+"""Package lookups from a metadata snapshot, in the JSON and binary index formats.
+
+The snapshot holds ``PACKAGES`` packages, each of them with ``REQUIRES``
+requirements with markers and extras. A solve looks up the metadata of ``LOOKUPS``
+of them, from a newly opened snapshot.
+
+Run with ``python benchmarks/snapshot_formats.py [PACKAGES] [REQUIRES] [LOOKUPS]``.
+
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from poetry.core.packages.package import Package
+
+from poetry.factory import Factory
+
+from poetry_solve_plugin.snapshot import load_snapshot, MetadataSnapshot
+
+
+MARKERS = [
+    'python_version < "3.8"',
+    'sys_platform == "win32"',
+    'extra == "test"',
+    'python_version >= "3.7" and platform_machine != "arm64"',
+]
+
+
+def make_snapshot(packages: int, requires: int) -> MetadataSnapshot:
+    snapshot = MetadataSnapshot()
+    for i in range(packages):
+        package = Package(f"p{i}", "1.0")
+        package.python_versions = ">=3.7"
+        package.files = [{"file": f"p{i}-1.0.tar.gz", "hash": f"sha256:{i:064x}"}]
+        for j in range(requires):
+            package.add_dependency(
+                Factory.create_dependency(
+                    f"r{(i + j) % packages}",
+                    {
+                        "version": f">={j % 5}.{j % 3},<{j % 5 + 1}.0",
+                        "markers": MARKERS[j % len(MARKERS)],
+                        "extras": ["security"] if j % 7 == 0 else [],
+                    },
+                )
+            )
+        snapshot.add_package(package.name, "1.0", None, package)
+
+    return snapshot
+
+
+def timed_lookups(path: Path, names: list[str]) -> float:
+    start = time.perf_counter()
+    snapshot = load_snapshot(path)
+    for name in names:
+        snapshot.package(name, "1.0").requires
+    return time.perf_counter() - start
+
+
+def main(packages: int, requires: int, lookups: int) -> None:
+    snapshot = make_snapshot(packages, requires)
+    names = random.Random(0).sample([f"p{i}" for i in range(packages)], lookups)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for suffix in [".json", ".idx"]:
+            path = Path(tmp_dir) / f"snapshot{suffix}"
+            snapshot.save(path)
+            best = min(timed_lookups(path, names) for _ in range(5))
+            print(
+                f"{suffix[1:]:>5}: {path.stat().st_size / 1024:8.0f} KiB,"
+                f" {lookups} lookups in {best * 1000:8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 200,
+    )
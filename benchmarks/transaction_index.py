@@ -0,0 +1,86 @@
+"""Operations calculated for large environments, by the base and indexed transactions.
+
+The lock file has ``PACKAGES`` packages, a tenth of them updated by the solve and
+another tenth removed from it. The environment has them installed, along with
+``EXTRA`` packages not managed by Poetry. The operations are calculated as the
+installer does, with and without synchronization, and executed by the
+``TestExecutor`` of the installer tests, which only records them.
+
+Run from the root of the repository with
+``python -m benchmarks.transaction_index [PACKAGES] [EXTRA]``.
+
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+from cleo.io.null_io import NullIO
+from poetry.core.packages.package import Package
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.config.config import Config
+from poetry.puzzle.transaction import Transaction as BaseTransaction
+from poetry.repositories import Pool
+from poetry.utils.env import NullEnv
+from tests.helpers import TestExecutor
+
+from poetry_solve_plugin.transaction import Transaction
+
+
+def make_transaction(
+    transaction_class: type[BaseTransaction], packages: int, extra: int
+) -> BaseTransaction:
+    locked = [Package(f"p{i}", "1.0") for i in range(packages)]
+    result = [
+        (Package(f"p{i}", "2.0" if i % 10 == 0 else "1.0"), 0)
+        for i in range(packages)
+        if i % 10 != 5
+    ]
+    installed = locked + [Package(f"x{i}", "1.0") for i in range(extra)]
+
+    return transaction_class(
+        locked, result, installed, root_package=ProjectPackage("root", "1.0")
+    )
+
+
+def main(packages: int, extra: int) -> None:
+    executed = []
+    for name, transaction_class in [("base", BaseTransaction), ("index", Transaction)]:
+        transaction = make_transaction(transaction_class, packages, extra)
+        executor = TestExecutor(NullEnv(), Pool(), Config(), NullIO())
+        executor.dry_run()
+
+        start = time.perf_counter()
+        for synchronize in [False, True]:
+            operations = transaction.calculate_operations(
+                with_uninstalls=True, synchronize=synchronize
+            )
+            executor.execute(operations)
+        elapsed = time.perf_counter() - start
+
+        executed.append(
+            [
+                sorted(package.unique_name for package in recorded)
+                for recorded in [
+                    executor.installations,
+                    executor.updates,
+                    executor.removals,
+                ]
+            ]
+        )
+        print(
+            f"{name:>5}: {sum(map(len, executed[-1]))} operations executed"
+            f" in {elapsed * 1000:9.1f} ms"
+        )
+
+    # Operations of the same priority are executed concurrently
+    assert executed[0] == executed[1]
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 3000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1000,
+    )
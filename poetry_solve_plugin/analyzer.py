@@ -0,0 +1,201 @@
+"""Static estimate of the override branches a resolution will create."""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from poetry.repositories.exceptions import PackageNotFound
+
+from .interning import copy_dependency
+from .provider import _index_duplicates, _merged_marker, _requirement_marker
+
+
+if TYPE_CHECKING:
+    from poetry.core.packages.dependency import Dependency
+    from poetry.core.packages.package import Package
+    from poetry.core.semver.helpers import VersionTypes
+
+    from .provider import Provider
+
+
+@dataclass
+class DuplicateGroup:
+    """Duplicate dependencies of a package that require an override branch."""
+
+    package: str
+    name: str
+    variants: int
+
+
+@dataclass
+class BranchReport:
+    groups: list[DuplicateGroup]
+    packages: int
+
+    @property
+    def estimated_branches(self) -> int:
+        """Upper bound of the number of override branches."""
+        if not self.groups:
+            return 0
+
+        branches = 1
+        for group in self.groups:
+            branches *= group.variants
+
+        return branches
+
+    def report(self) -> str:
+        lines = [f"Analyzed {self.packages} packages."]
+        if not self.groups:
+            lines.append("No duplicate dependencies require override branches.")
+            return "\n".join(lines)
+
+        lines.append(
+            f"Found {len(self.groups)} duplicate dependency groups"
+            " with different requirements:"
+        )
+        for group in sorted(self.groups, key=lambda g: -g.variants):
+            lines.append(
+                f"  - {group.package} requires {group.name}: {group.variants} variants"
+            )
+        lines.append(
+            f"Estimated number of override branches: up to {self.estimated_branches}"
+        )
+
+        return "\n".join(lines)
+
+
+class BranchAnalyzer:
+    """Find duplicate dependencies that will make the solver split the resolution.
+
+    Starting from the root package, the latest candidate of every dependency is
+    visited, and the dependencies of each visited package are grouped the same
+    way ``Provider.complete_package`` does, without solving.
+
+    """
+
+    def __init__(self, provider: Provider) -> None:
+        self._provider = provider
+        self._python_constraint = provider._python_constraint
+
+    def analyze(self) -> BranchReport:
+        root = self._provider._package
+        groups = []
+        visited: set[tuple[str, str]] = set()
+        queue: deque[tuple[Package, list[Dependency]]] = deque(
+            [(root, self._filter(root.all_requires, root, set()))]
+        )
+
+        while queue:
+            package, requires = queue.popleft()
+
+            groups += self._find_duplicate_groups(package, requires)
+
+            for dependency in requires:
+                if dependency.constraint.is_empty():
+                    continue
+
+                candidate = self._latest_candidate(dependency)
+                if candidate is None:
+                    continue
+
+                key = (candidate.complete_name, candidate.version.text)
+                if key in visited:
+                    continue
+                visited.add(key)
+
+                queue.append(
+                    (
+                        candidate,
+                        self._filter(
+                            candidate.requires, candidate, set(dependency.extras)
+                        ),
+                    )
+                )
+
+        return BranchReport(groups, len(visited))
+
+    def _latest_candidate(self, dependency: Dependency) -> Package | None:
+        try:
+            candidates = self._provider.search_for(dependency)
+        except (PackageNotFound, ValueError):
+            return None
+
+        if not candidates:
+            return None
+
+        candidate = candidates[0].package
+        if candidate.source_type in {"directory", "file", "url", "git"}:
+            return candidate
+
+        try:
+            return self._provider.pool.package(
+                candidate.name,
+                candidate.version.text,
+                extras=list(dependency.extras),
+                repository=dependency.source_name,
+            )
+        except PackageNotFound:
+            return None
+
+    def _filter(
+        self, requires: list[Dependency], package: Package, extras: set[str]
+    ) -> list[Dependency]:
+        optional_dependencies = set()
+        for extra in extras:
+            optional_dependencies |= {d.name for d in package.extras.get(extra, [])}
+
+        dependencies = []
+        for dep in requires:
+            if not self._python_constraint.allows_any(dep.python_constraint):
+                continue
+
+            if not package.is_root() and (
+                (dep.is_optional() and dep.name not in optional_dependencies)
+                or (dep.in_extras and not set(dep.in_extras).intersection(extras))
+            ):
+                continue
+
+            dependencies.append(dep)
+
+        return dependencies
+
+    def _find_duplicate_groups(
+        self, package: Package, dependencies: list[Dependency]
+    ) -> list[DuplicateGroup]:
+        groups = []
+        for name, by_constraint in _index_duplicates(dependencies).items():
+            variants = self._count_variants(by_constraint)
+            if variants > 1:
+                groups.append(DuplicateGroup(str(package), name, variants))
+
+        return groups
+
+    @staticmethod
+    def _count_variants(by_constraint: dict[VersionTypes, list[Dependency]]) -> int:
+        # Same rules as Provider._merge_duplicates, without modifying dependencies
+        if len(by_constraint) == 1:
+            return 1
+
+        merged = []
+        for deps in by_constraint.values():
+            dep = copy_dependency(deps[0])
+            dep.marker = _merged_marker(deps)
+            merged.append(dep)
+
+        if len({_requirement_marker(dep) for dep in merged}) != len(merged):
+            # The resolver reports the conflict instead of splitting
+            return 1
+
+        markers = [dep.marker for dep in merged]
+        variants = len(markers)
+        if not any(marker.is_any() for marker in markers):
+            union = markers[0]
+            for marker in markers[1:]:
+                union = union.union(marker)
+            if not union.invert().is_empty():
+                variants += 1
+
+        return variants
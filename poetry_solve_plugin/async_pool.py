@@ -0,0 +1,250 @@
+"""Concurrent repository I/O behind the synchronous ``Pool`` interface.
+
+The solver is synchronous, and every repository lookup used to block it until the
+response arrived. ``AsyncPool`` runs the lookups of the wrapped repositories on an
+event loop in a background thread, so that
+
+- lookups can be scheduled ahead of time with ``prefetch()``, while the solver
+  works on something else,
+- identical requests in flight share a single future, instead of being sent
+  again.
+
+Requests leave the in-flight map as soon as they complete. The results of
+prefetches that nothing waited for are kept, up to a bound, until they are looked
+up.
+
+The repositories themselves are blocking, so each request is run in a worker
+thread of the loop. Their HTTP sessions keep a pool of connections per host,
+which is enlarged to the number of workers.
+
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable, TYPE_CHECKING, TypeVar
+
+from requests.adapters import HTTPAdapter
+
+from poetry.repositories import Pool
+
+
+if TYPE_CHECKING:
+    from poetry.core.packages.dependency import Dependency
+    from poetry.core.packages.package import Package
+
+    from poetry.repositories.repository import Repository
+
+
+T = TypeVar("T")
+
+
+class AsyncPool(Pool):
+    """Pool whose lookups are run concurrently on a background event loop.
+
+    Parameters
+    ----------
+    repositories
+        Repositories of the pool, in priority order.
+    ignore_repository_names
+        Same as for ``Pool``.
+    workers
+        Maximum number of concurrent requests.
+    max_prefetched
+        Maximum number of completed prefetches kept until they are looked up. The
+        oldest ones are dropped, and requested again if they are looked up later.
+
+    """
+
+    def __init__(
+        self,
+        repositories: list[Repository] | None = None,
+        ignore_repository_names: bool = False,
+        workers: int = 8,
+        max_prefetched: int = 1024,
+    ) -> None:
+        super().__init__(repositories, ignore_repository_names)
+
+        self._workers = workers
+        self._max_prefetched = max_prefetched
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        # Only accessed from the event loop thread
+        self._requests: dict[Hashable, asyncio.Future] = {}
+        # Requests in flight that a lookup waits for
+        self._waited: set[Hashable] = set()
+        self._prefetched: OrderedDict[Hashable, Any] = OrderedDict()
+
+    @classmethod
+    def wrap(cls, pool: Pool, workers: int = 8) -> AsyncPool:
+        """Pool with the same repositories as ``pool``, in the same order."""
+        async_pool = cls(
+            ignore_repository_names=pool._ignore_repository_names, workers=workers
+        )
+        async_pool._repositories = list(pool._repositories)
+        async_pool._lookup = dict(pool._lookup)
+        async_pool._default = pool._default
+        async_pool._has_primary_repositories = pool._has_primary_repositories
+        async_pool._secondary_start_idx = pool._secondary_start_idx
+
+        return async_pool
+
+    def __enter__(self) -> AsyncPool:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def package(
+        self, name: str, version: str, extras: list[str] = None, repository: str = None
+    ) -> Package:
+        key = ("package", name, version, tuple(extras or ()), repository)
+        return self._call(
+            key,
+            functools.partial(super().package, name, version, extras, repository),
+            copy=lambda package: package.clone(),
+        )
+
+    def find_packages(self, dependency: Dependency) -> list[Package]:
+        return self._call(
+            _find_packages_key(dependency),
+            functools.partial(super().find_packages, dependency),
+            copy=list,
+        )
+
+    def prefetch(self, dependencies: list[Dependency]) -> None:
+        """Start looking up the candidates of dependencies, without waiting."""
+        loop = self._get_loop()
+        for dependency in dependencies:
+            if (
+                dependency.is_vcs()
+                or dependency.is_file()
+                or dependency.is_directory()
+                or dependency.is_url()
+            ):
+                # Resolved by the provider, not by the repositories
+                continue
+
+            loop.call_soon_threadsafe(
+                self._prefetch,
+                _find_packages_key(dependency),
+                functools.partial(super().find_packages, dependency),
+            )
+
+    def close(self) -> None:
+        """Stop the event loop, pending prefetches are cancelled."""
+        with self._lock:
+            loop, executor, thread = self._loop, self._executor, self._thread
+            self._loop = self._executor = self._thread = None
+
+        if loop is None:
+            return
+
+        loop.call_soon_threadsafe(self._stop, loop)
+        thread.join()
+        executor.shutdown()
+        loop.close()
+
+    def _stop(self, loop: asyncio.AbstractEventLoop) -> None:
+        for future in self._requests.values():
+            future.cancel()
+        self._requests.clear()
+        self._waited.clear()
+        self._prefetched.clear()
+        loop.stop()
+
+    def _call(self, key: Hashable, call: Callable[[], T], copy: Callable[[T], T]) -> T:
+        result, first = asyncio.run_coroutine_threadsafe(
+            self._wait(key, call), self._get_loop()
+        ).result()
+
+        # Results of coalesced requests are only handed out once as is,
+        # since the solver modifies them.
+        return result if first else copy(result)
+
+    async def _wait(self, key: Hashable, call: Callable[[], T]) -> tuple[T, bool]:
+        if key in self._prefetched:
+            return self._prefetched.pop(key), True
+
+        future = self._submit(key, call)
+        first = key not in self._waited
+        self._waited.add(key)
+
+        return await asyncio.shield(future), first
+
+    def _prefetch(self, key: Hashable, call: Callable[[], Any]) -> None:
+        if key not in self._prefetched:
+            self._submit(key, call)
+
+    def _submit(self, key: Hashable, call: Callable[[], Any]) -> asyncio.Future:
+        future = self._requests.get(key)
+        if future is None:
+            future = self._loop.run_in_executor(None, call)
+            future.add_done_callback(functools.partial(self._complete, key))
+            self._requests[key] = future
+
+        return future
+
+    def _complete(self, key: Hashable, future: asyncio.Future) -> None:
+        # Runs before the lookups waiting for the request are resumed
+        if self._requests.get(key) is future:
+            del self._requests[key]
+
+        if key in self._waited:
+            self._waited.discard(key)
+            return
+
+        # Failed prefetches are requested again, and raise, when looked up
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        self._prefetched[key] = future.result()
+        while len(self._prefetched) > self._max_prefetched:
+            self._prefetched.popitem(last=False)
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                for repository in self._repositories:
+                    _enlarge_connection_pools(repository, self._workers)
+
+                loop = asyncio.new_event_loop()
+                self._executor = ThreadPoolExecutor(
+                    self._workers, thread_name_prefix="pool-io"
+                )
+                loop.set_default_executor(self._executor)
+                self._thread = threading.Thread(
+                    target=loop.run_forever, name="pool-event-loop", daemon=True
+                )
+                self._thread.start()
+                self._loop = loop
+
+            return self._loop
+
+
+def _find_packages_key(dependency: Dependency) -> Hashable:
+    return (
+        "find_packages",
+        dependency.complete_name,
+        dependency.constraint,
+        dependency.allows_prereleases(),
+        dependency.source_name,
+    )
+
+
+def _enlarge_connection_pools(repository: Repository, size: int) -> None:
+    session = getattr(repository, "session", None)
+    if session is None:
+        return
+
+    for adapter in session.adapters.values():
+        if isinstance(adapter, HTTPAdapter) and adapter._pool_maxsize < size:
+            adapter.init_poolmanager(
+                adapter._pool_connections, size, block=adapter._pool_block
+            )
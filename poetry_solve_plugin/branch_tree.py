@@ -0,0 +1,213 @@
+"""Tree of the override branches of a solve, and the time spent in each of them.
+
+Duplicate dependencies with different constraints make the solver split the
+resolution into override branches, possibly nested, but only the number of
+branches created per duplicate dependency group was known after a solve.
+
+``BranchTree`` records each branch from the provider hooks: the overrides that
+created it, the marker domain it is solved for, whether it succeeded, conflicted
+or was pruned because its markers cannot be satisfied along with the overrides
+of its parent, and the time spent solving it. The tree is written as JSON, with
+the time spent per duplicate dependency group, or as a Graphviz DOT graph.
+
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, TYPE_CHECKING
+
+from poetry.core.version.markers import AnyMarker
+
+from poetry.mixology.failure import SolveFailure
+from poetry.puzzle.exceptions import SolverProblemError
+
+from .hooks import ProviderHooks
+from .overrides import package_key
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from poetry.core.packages.dependency import Dependency
+    from poetry.core.semver.helpers import VersionTypes
+
+    from poetry.packages import DependencyPackage
+
+    from .overrides import OverrideRecord, Overrides, PackageKey
+
+
+_COLORS = {
+    "succeeded": "palegreen",
+    "conflicted": "lightcoral",
+    "pruned": "lightgrey",
+    "aborted": "khaki",
+    "running": "white",
+}
+
+
+@dataclass
+class Branch:
+    """An override branch, the resolution without overrides being branch 0."""
+
+    id: int
+    parent: int | None
+    #: Package and dependency name of the overrides that created the branch
+    groups: list[tuple[str, str]] = field(default_factory=list)
+    #: Overrides that created the branch
+    overrides: list[str] = field(default_factory=list)
+    marker: str = ""
+    status: str = "running"
+    #: Seconds spent solving the branch, including its sub-branches
+    time: float = 0.0
+
+
+class BranchTree(ProviderHooks):
+    """Override branches of a solve, recorded from the provider hooks."""
+
+    def __init__(self) -> None:
+        self._branches: list[Branch] = []
+        # Overrides, branch and start of the branches being solved
+        self._open: list[tuple[Overrides, Branch, float]] = []
+        self._pruned: set[tuple[int, str]] = set()
+        self.solve_start()
+
+    @property
+    def branches(self) -> list[Branch]:
+        return self._branches
+
+    def groups(self) -> list[dict[str, Any]]:
+        """Branches created, and time spent, per duplicate dependency group."""
+        groups: dict[tuple[str, str], dict[str, Any]] = {}
+        for branch in self._branches[1:]:
+            for package, dependency in branch.groups:
+                group = groups.setdefault(
+                    (package, dependency),
+                    {
+                        "package": package,
+                        "dependency": dependency,
+                        "branches": 0,
+                        "pruned": 0,
+                        "time": 0.0,
+                    },
+                )
+                if branch.status == "pruned":
+                    group["pruned"] += 1
+                else:
+                    group["branches"] += 1
+                    group["time"] += branch.time
+
+        return sorted(groups.values(), key=lambda group: -group["time"])
+
+    def save(self, path: Path) -> None:
+        """Write the tree as DOT for ``.dot`` and ``.gv`` files, as JSON otherwise."""
+        with path.open("w", encoding="utf-8") as f:
+            if path.suffix in {".dot", ".gv"}:
+                f.write(self.to_dot())
+            else:
+                data = {
+                    "branches": [asdict(branch) for branch in self._branches],
+                    "groups": self.groups(),
+                }
+                json.dump(data, f, indent=2)
+
+    def to_dot(self) -> str:
+        lines = ["digraph branches {", "  node [shape=box, style=filled];"]
+        for branch in self._branches:
+            label = "\\n".join(
+                line.replace('"', '\\"')
+                for line in [
+                    f"branch {branch.id}: {branch.status} ({branch.time:.3f}s)",
+                    *branch.overrides,
+                    *([f"marker: {branch.marker}"] if branch.marker else []),
+                ]
+            )
+            lines.append(
+                f'  b{branch.id} [label="{label}",'
+                f" fillcolor={_COLORS[branch.status]}];"
+            )
+            if branch.parent is not None:
+                lines.append(f"  b{branch.parent} -> b{branch.id};")
+        lines.append("}")
+
+        return "\n".join(lines) + "\n"
+
+    def solve_start(self) -> None:
+        self._branches = [Branch(0, None)]
+        self._open = [({}, self._branches[0], time.perf_counter())]
+        self._pruned = set()
+
+    def solve_end(self, error: BaseException | None) -> None:
+        self.override_branch_end({}, error)
+
+    def override_pruned(
+        self, package: DependencyPackage, dependency: Dependency
+    ) -> None:
+        parent = self._open[-1][1]
+        entry = _describe(
+            package_key(package), dependency.name, dependency.constraint, dependency
+        )
+        if (parent.id, entry) in self._pruned:
+            return
+
+        self._pruned.add((parent.id, entry))
+        self._branches.append(
+            Branch(
+                len(self._branches),
+                parent.id,
+                groups=[(str(package_key(package)), dependency.name)],
+                overrides=[entry],
+                marker=str(dependency.marker),
+                status="pruned",
+            )
+        )
+
+    def override_branch_start(self, overrides: Overrides) -> None:
+        parent_overrides, parent, _ = self._open[-1]
+        created = [
+            (package, record)
+            for package, records in overrides.items()
+            for name, record in records.items()
+            if parent_overrides.get(package, {}).get(name) != record
+        ]
+        marker = AnyMarker()
+        for records in overrides.values():
+            for record in records.values():
+                marker = marker.intersect(record.marker)
+
+        branch = Branch(
+            len(self._branches),
+            parent.id,
+            groups=[(str(package), record.name) for package, record in created],
+            overrides=[
+                _describe(package, record.name, record.constraint, record)
+                for package, record in created
+            ],
+            marker="" if marker.is_any() else str(marker),
+        )
+        self._branches.append(branch)
+        self._open.append((overrides, branch, time.perf_counter()))
+
+    def override_branch_end(
+        self, overrides: Overrides, error: BaseException | None
+    ) -> None:
+        _, branch, start = self._open.pop()
+        branch.time = time.perf_counter() - start
+        if error is None:
+            branch.status = "succeeded"
+        elif isinstance(error, (SolveFailure, SolverProblemError)):
+            branch.status = "conflicted"
+        else:
+            branch.status = "aborted"
+
+
+def _describe(
+    package: PackageKey,
+    name: str,
+    constraint: VersionTypes,
+    requirement: Dependency | OverrideRecord,
+) -> str:
+    marker = "*" if requirement.marker.is_any() else requirement.marker
+    return f"{package}: {name} ({constraint}) ; {marker}"
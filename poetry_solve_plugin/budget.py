@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import time
+
+
+class SolveBudget:
+    """Limits on the exploration of override branches.
+
+    The limits are checked each time a new override branch is about to be solved,
+    so a single branch is never interrupted.
+
+    Parameters
+    ----------
+    timeout
+        Maximum time in seconds, counted from ``start()``.
+    max_branches
+        Maximum number of override branches to solve.
+
+    """
+
+    def __init__(
+        self, timeout: float | None = None, max_branches: int | None = None
+    ) -> None:
+        self._timeout = timeout
+        self._max_branches = max_branches
+        self._start = time.monotonic()
+        self._branches = 0
+
+    @property
+    def branches(self) -> int:
+        return self._branches
+
+    def start(self) -> None:
+        self._start = time.monotonic()
+        self._branches = 0
+
+    def add_branch(self) -> str | None:
+        """Count a new branch, return the reason if it exceeds the budget."""
+        elapsed = time.monotonic() - self._start
+        if self._timeout is not None and elapsed > self._timeout:
+            return (
+                f"time limit of {self._timeout:g} seconds exceeded"
+                f" after {self._branches} override branches"
+            )
+
+        if self._max_branches is not None and self._branches >= self._max_branches:
+            return f"limit of {self._max_branches} override branches exceeded"
+
+        self._branches += 1
+        return None
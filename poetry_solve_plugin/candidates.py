@@ -0,0 +1,233 @@
+"""Sorted candidate versions of the packages searched for by the provider.
+
+The solver searches for the candidates of a dependency every time it considers
+it, in every override branch. The base provider answered from the packages found
+for a previous search with a broader constraint, after scanning all the previous
+searches, and then filtered and sorted all of them again.
+
+Here the candidates found for a package are sorted by version once. A search is
+answered by bisecting the versions with the bounds of the constraint, so only the
+candidates close to the allowed ranges are checked against it, with the rules
+``Repository.find_packages()`` admits prereleases with, and its result is kept for
+the next identical search. The candidates are kept per pool for the whole
+process, and are reused by all the solves sharing the pool.
+
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import TYPE_CHECKING
+from weakref import WeakKeyDictionary
+
+from poetry.core.semver.version import Version
+from poetry.core.semver.version_range import VersionRange
+from poetry.core.semver.version_union import VersionUnion
+from poetry.core.version.pep440 import ReleaseTag
+
+from .memory import evict_oldest
+
+
+if TYPE_CHECKING:
+    from poetry.core.packages.dependency import Dependency
+    from poetry.core.packages.package import Package
+    from poetry.core.semver.helpers import VersionTypes
+
+    from poetry.repositories import Pool
+
+
+_indexes: WeakKeyDictionary[Pool, CandidateIndex] = WeakKeyDictionary()
+
+
+class CandidateIndex:
+    """Candidates found in a pool, per package and constraint of the search."""
+
+    def __init__(self) -> None:
+        self._candidates: dict[tuple[str, str | None], list[Candidates]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(candidates) for candidates in self._candidates.values())
+
+    def get(self, dependency: Dependency) -> Candidates | None:
+        """Candidates found by a search admitting all the dependency's."""
+        allows_prereleases = _admits_prereleases(
+            dependency.constraint, dependency.allows_prereleases()
+        )
+        for candidates in self._candidates.get(_package_id(dependency), []):
+            if candidates.covers(dependency.constraint, allows_prereleases):
+                return candidates
+
+        return None
+
+    def add(self, dependency: Dependency, packages: list[Package]) -> Candidates:
+        candidates = Candidates(
+            dependency.constraint,
+            packages,
+            _admits_prereleases(dependency.constraint, dependency.allows_prereleases()),
+        )
+        self._candidates.setdefault(_package_id(dependency), []).append(candidates)
+
+        return candidates
+
+    def evict(self, fraction: float) -> int:
+        """Forget the candidates of the oldest packages searched for."""
+        return evict_oldest(self._candidates, fraction)
+
+
+class Candidates:
+    """Packages found for a constraint, sorted by version.
+
+    Parameters
+    ----------
+    constraint
+        Constraint of the search that found the packages.
+    packages
+        Packages found, in the order of the pool.
+    allows_prereleases
+        Whether the search admitted prereleases.
+
+    """
+
+    __slots__ = (
+        "constraint",
+        "allows_prereleases",
+        "_packages",
+        "_versions",
+        "_covers",
+        "_results",
+    )
+
+    def __init__(
+        self,
+        constraint: VersionTypes,
+        packages: list[Package],
+        allows_prereleases: bool = False,
+    ) -> None:
+        self.constraint = constraint
+        self.allows_prereleases = allows_prereleases
+        # Reversing the descending order keeps the packages of equal versions
+        # in reverse pool order, so that results can be reversed as a whole.
+        self._packages = sorted(packages, key=lambda p: p.version, reverse=True)[::-1]
+        self._versions = [package.version for package in self._packages]
+        self._covers: dict[VersionTypes, bool] = {}
+        self._results: dict[tuple[VersionTypes, bool], list[Package]] = {}
+
+    def __len__(self) -> int:
+        return len(self._packages)
+
+    def covers(self, constraint: VersionTypes, allows_prereleases: bool) -> bool:
+        # Prereleases are missing if the search did not admit them
+        if allows_prereleases and not self.allows_prereleases:
+            return False
+
+        if constraint not in self._covers:
+            self._covers[constraint] = (
+                self.constraint.intersect(constraint) == constraint
+            )
+
+        return self._covers[constraint]
+
+    def find(self, constraint: VersionTypes, allows_prereleases: bool) -> list[Package]:
+        """Packages allowed by a constraint, in the order the solver tries them.
+
+        Prereleases are admitted as by ``Repository.find_packages()``. The latest
+        versions come first, and prereleases come last unless they are allowed.
+        The returned list is shared and must not be modified.
+
+        """
+        key = (constraint, allows_prereleases)
+        if key in self._results:
+            return self._results[key]
+
+        admits_prereleases = _admits_prereleases(constraint, allows_prereleases)
+        packages = []
+        ignored_pre_release_packages = []
+        end = 0
+        for lower, upper in _windows(constraint):
+            start = max(end, 0 if lower is None else bisect_left(self._versions, lower))
+            end = (
+                len(self._versions)
+                if upper is None
+                else bisect_left(self._versions, upper)
+            )
+            for package in self._packages[start:end]:
+                if (
+                    package.is_prerelease()
+                    and not admits_prereleases
+                    and not package.source_type
+                ):
+                    # Only kept when all versions of the package are prereleases
+                    if constraint.is_any():
+                        ignored_pre_release_packages.append(package)
+                    continue
+
+                if constraint.allows(package.version) or (
+                    package.is_prerelease()
+                    and constraint.allows(package.version.next_patch())
+                ):
+                    packages.append(package)
+        packages = packages or ignored_pre_release_packages
+        packages.reverse()
+
+        if not allows_prereleases:
+            packages = [p for p in packages if not p.is_prerelease()] + [
+                p for p in packages if p.is_prerelease()
+            ]
+
+        self._results[key] = packages
+
+        return packages
+
+
+def candidate_index(pool: Pool) -> CandidateIndex:
+    """Candidate index of a pool, shared by all the providers using the pool."""
+    index = _indexes.get(pool)
+    if index is None:
+        index = _indexes[pool] = CandidateIndex()
+
+    return index
+
+
+def _admits_prereleases(constraint: VersionTypes, allows_prereleases: bool) -> bool:
+    """Whether ``Repository.find_packages()`` admits prereleases for a search."""
+    return allows_prereleases or (
+        isinstance(constraint, VersionRange)
+        and (
+            constraint.max is not None
+            and constraint.max.is_unstable()
+            or constraint.min is not None
+            and constraint.min.is_unstable()
+        )
+    )
+
+
+def _package_id(dependency: Dependency) -> tuple[str, str | None]:
+    return dependency.complete_name, dependency.source_name
+
+
+def _windows(constraint: VersionTypes) -> list[tuple[Version | None, Version | None]]:
+    """Version bounds enclosing all the versions allowed by a constraint.
+
+    The bounds span whole releases, since the allowed ranges of a constraint also
+    depend on the pre, post and local segments of the versions.
+
+    """
+    if constraint.is_empty():
+        return []
+
+    ranges = constraint.ranges if isinstance(constraint, VersionUnion) else [constraint]
+    return [
+        (
+            None if r.min is None else _first_of_release(r.min),
+            None if r.max is None else _first_of_next_release(r.max),
+        )
+        for r in ranges
+    ]
+
+
+def _first_of_release(version: Version) -> Version:
+    return Version(version.epoch, version.release, dev=ReleaseTag("dev", 0))
+
+
+def _first_of_next_release(version: Version) -> Version:
+    return _first_of_release(Version(version.epoch, version.release).next_patch())
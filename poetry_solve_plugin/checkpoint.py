@@ -0,0 +1,165 @@
+"""Persistence of completed override branches, to resume interrupted solves."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Any, TYPE_CHECKING
+
+from poetry.packages import DependencyPackage
+
+
+if TYPE_CHECKING:
+    from poetry.core.packages.package import Package
+
+    from .overrides import Overrides
+
+
+class Checkpoint:
+    """Completed override branches of a solve, and their partial results.
+
+    Parameters
+    ----------
+    path
+        File the checkpoint is written to.
+    fingerprint
+        Identifier of the solve inputs. A checkpoint written for different inputs
+        is never loaded.
+    interval
+        Minimum interval in seconds between two writes triggered by newly
+        completed branches. ``save()`` always writes.
+
+    """
+
+    _VERSION = 1
+
+    def __init__(self, path: Path, fingerprint: str, interval: float = 10.0) -> None:
+        self._path = path
+        self._fingerprint = fingerprint
+        self._interval = interval
+        self._branches: dict[str, bytes] = {}
+        self._results: dict[str, bytes] = {}
+        self._last_saved = time.monotonic()
+        self._modified = False
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def load(self) -> bool:
+        """Load the checkpoint file, return whether it matched the fingerprint."""
+        if not self._path.exists():
+            return False
+
+        try:
+            with self._path.open("rb") as f:
+                data = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False
+
+        if (
+            data.get("version") != self._VERSION
+            or data.get("fingerprint") != self._fingerprint
+        ):
+            return False
+
+        self._branches = data["branches"]
+        self._results = data["results"]
+        return True
+
+    def get_branches(self, overrides: Overrides) -> tuple[Overrides, ...] | None:
+        key = override_key(overrides)
+        if key not in self._branches:
+            return None
+
+        return pickle.loads(self._branches[key])
+
+    def add_branches(
+        self, overrides: Overrides, branches: tuple[Overrides, ...]
+    ) -> None:
+        self._branches[override_key(overrides)] = pickle.dumps(branches)
+        self._changed()
+
+    def get_result(
+        self, overrides: Overrides
+    ) -> tuple[list[Package], list[int]] | None:
+        key = override_key(overrides)
+        if key not in self._results:
+            return None
+
+        packages, depths = pickle.loads(self._results[key])
+        return [_restore_package(package) for package in packages], depths
+
+    def add_result(
+        self, overrides: Overrides, packages: list[Package], depths: list[int]
+    ) -> None:
+        self._results[override_key(overrides)] = pickle.dumps(
+            ([_dump_package(package) for package in packages], depths)
+        )
+        self._changed()
+
+    def save(self) -> None:
+        if not self._modified:
+            return
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": self._VERSION,
+            "fingerprint": self._fingerprint,
+            "branches": self._branches,
+            "results": self._results,
+        }
+        tmp_path = self._path.with_name(f"{self._path.name}.tmp")
+        with tmp_path.open("wb") as f:
+            pickle.dump(data, f)
+        os.replace(tmp_path, self._path)
+
+        self._last_saved = time.monotonic()
+        self._modified = False
+
+    def clear(self) -> None:
+        self._branches.clear()
+        self._results.clear()
+        self._modified = False
+        if self._path.exists():
+            self._path.unlink()
+
+    def _changed(self) -> None:
+        self._modified = True
+        if time.monotonic() - self._last_saved >= self._interval:
+            self.save()
+
+
+def override_key(overrides: Overrides) -> str:
+    """Stable identifier of a set of overrides."""
+    entries = []
+    for package, records in overrides.items():
+        for name, record in records.items():
+            entries.append(
+                f"{package.complete_name} ({package.version}) {package.source}:"
+                f" {name} ({record.constraint}) ; {record.marker}"
+            )
+
+    return hashlib.sha256("\n".join(sorted(entries)).encode()).hexdigest()
+
+
+def _dump_package(package: Package | DependencyPackage) -> Any:
+    # DependencyPackage forwards attribute access to its package,
+    # which makes it impossible to unpickle as is.
+    if isinstance(package, DependencyPackage):
+        return package.dependency, package.package
+
+    return package
+
+
+def _restore_package(dumped: Any) -> Package | DependencyPackage:
+    if isinstance(dumped, tuple):
+        return DependencyPackage(*dumped)
+
+    return dumped
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+
+class SolveBudgetExceeded(Exception):
+    """Dependency resolution was stopped before all override branches were solved.
+
+    Parameters
+    ----------
+    reason
+        Description of the exceeded limit.
+    branching
+        Number of override branches created by each duplicate dependency group,
+        keyed by the depending package and the name of the duplicate dependency.
+
+    """
+
+    def __init__(self, reason: str, branching: dict[tuple[str, str], int]) -> None:
+        self.reason = reason
+        self.branching = branching
+
+        super().__init__(self.report())
+
+    def report(self, limit: int = 10) -> str:
+        lines = [f"Dependency resolution stopped: {self.reason}."]
+
+        ranking = sorted(self.branching.items(), key=lambda item: -item[1])
+        if ranking:
+            lines.append("Duplicate dependencies that caused the most branching:")
+        for (package, dependency), count in ranking[:limit]:
+            lines.append(f"  - {package} requires {dependency}: {count} branches")
+
+        return "\n".join(lines)
+
+
+class SnapshotError(Exception):
+    """A metadata snapshot could not be read, or lacks the requested metadata."""
@@ -0,0 +1,327 @@
+"""Execution of install operations as a pipeline, instead of in batches.
+
+The base executor ran the operations in batches of equal priority, which is the
+depth of the package in the dependency tree: every batch downloaded, verified and
+installed its packages, and the next batch only started once the slowest of them
+was done.
+
+``PipelineExecutor`` runs three stages concurrently:
+
+- the artifacts of all the operations are downloaded, by a bounded number of
+  workers sharing the connection pool of the authenticator,
+- their hashes are verified by a separate pool of workers,
+- a package is installed as soon as its artifact is verified and the packages it
+  requires are installed.
+
+Removals still run first, one at a time, and operations that are unsafe to run in
+parallel are installed one at a time.
+
+The executor is opt-in: ``Installer.pipeline()`` installs with it, and Poetry's
+``Executor`` is used otherwise.
+
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from poetry.core.packages.utils.link import Link
+
+from poetry.installation.executor import Executor
+
+from .async_pool import _enlarge_connection_pools
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from cleo.io.io import IO
+
+    from poetry.config.config import Config
+    from poetry.installation.operations import OperationTypes
+    from poetry.installation.operations.install import Install
+    from poetry.installation.operations.update import Update
+    from poetry.repositories import Pool
+    from poetry.utils.env import Env
+
+
+class PipelineExecutor(Executor):
+    """Executor downloading, verifying and installing packages concurrently.
+
+    Parameters
+    ----------
+    env, pool, config, io, parallel
+        Same as for ``Executor``.
+    download_workers
+        Maximum number of concurrent downloads. Defaults to the number of
+        installation workers.
+    hash_workers
+        Number of workers verifying the hashes of the artifacts.
+
+    """
+
+    def __init__(
+        self,
+        env: Env,
+        pool: Pool,
+        config: Config,
+        io: IO,
+        parallel: bool | None = None,
+        download_workers: int | None = None,
+        hash_workers: int | None = None,
+    ) -> None:
+        super().__init__(env, pool, config, io, parallel=parallel)
+
+        self._download_workers = download_workers or self._max_workers
+        self._hash_workers = hash_workers or min(4, os.cpu_count() or 1)
+        # Verified artifacts of the operations, by operation id
+        self._artifacts: dict[int, Future] = {}
+        self._fetches: list[Future] = []
+        self._serial_lock = threading.Lock()
+
+    def execute(self, operations: list[OperationTypes]) -> int:
+        self._total_operations = len(operations)
+        for job_type in self._executed:
+            self._executed[job_type] = 0
+            self._skipped[job_type] = 0
+
+        if operations and (self._enabled or self._dry_run):
+            self._display_summary(operations)
+
+        self._sections = {}
+        self._artifacts = {}
+        self._fetches = []
+
+        for operation in operations:
+            if operation.job_type == "uninstall" and not self._shutdown:
+                self._executor.submit(self._execute_operation, operation).result()
+
+        installs = [op for op in operations if op.job_type != "uninstall"]
+        if not self._shutdown and installs:
+            self._run_pipeline(installs)
+
+        return 1 if self._shutdown else 0
+
+    def _run_pipeline(self, operations: list[OperationTypes]) -> None:
+        prerequisites = _prerequisites(operations)
+        dependents: dict[int, list[OperationTypes]] = {}
+        for operation in operations:
+            for prerequisite in prerequisites[id(operation)]:
+                dependents.setdefault(prerequisite, []).append(operation)
+
+        events: queue.SimpleQueue[tuple[str, OperationTypes]] = queue.SimpleQueue()
+        downloads = ThreadPoolExecutor(
+            self._download_workers, thread_name_prefix="executor-download"
+        )
+        verifications = ThreadPoolExecutor(
+            self._hash_workers, thread_name_prefix="executor-hash"
+        )
+        _enlarge_connection_pools(self._authenticator, self._download_workers)
+
+        # Artifacts are prepared in the order the base executor installs them
+        for operation in operations:
+            if self._needs_artifact(operation):
+                self._prepare_artifact(operation, downloads, verifications, events)
+            else:
+                events.put(("ready", operation))
+
+        ready: set[int] = set()
+        submitted: set[int] = set()
+        tasks = []
+        remaining = len(operations)
+        try:
+            while remaining and not self._shutdown:
+                event, operation = events.get()
+                if event == "ready":
+                    ready.add(id(operation))
+                    candidates = [operation]
+                else:
+                    remaining -= 1
+                    candidates = dependents.get(id(operation), [])
+                    for dependent in candidates:
+                        prerequisites[id(dependent)].discard(id(operation))
+
+                for candidate in candidates:
+                    key = id(candidate)
+                    if key in ready and key not in submitted and not prerequisites[key]:
+                        submitted.add(key)
+                        tasks.append(
+                            self._executor.submit(
+                                self._install_operation, candidate, events
+                            )
+                        )
+        except KeyboardInterrupt:
+            self._shutdown = True
+
+        if self._shutdown:
+            for future in [*tasks, *self._fetches]:
+                future.cancel()
+
+        downloads.shutdown(wait=True)
+        verifications.shutdown(wait=True)
+        for task in tasks:
+            if not task.cancelled():
+                task.exception()
+
+    def _needs_artifact(self, operation: OperationTypes) -> bool:
+        return (
+            self._enabled
+            and not self._dry_run
+            and not operation.skipped
+            and operation.package.source_type not in {"directory", "git"}
+        )
+
+    def _prepare_artifact(
+        self,
+        operation: Install | Update,
+        downloads: ThreadPoolExecutor,
+        verifications: ThreadPoolExecutor,
+        events: queue.SimpleQueue,
+    ) -> None:
+        self._open_section(operation)
+        verified: Future = Future()
+        self._artifacts[id(operation)] = verified
+
+        def verify(downloaded: Future) -> None:
+            if downloaded.cancelled() or downloaded.exception() is not None:
+                _copy_result(downloaded, verified)
+                events.put(("ready", operation))
+                return
+
+            def run() -> None:
+                try:
+                    verified.set_result(self._verify_artifact(operation, downloaded))
+                except BaseException as e:
+                    verified.set_exception(e)
+                events.put(("ready", operation))
+
+            verifications.submit(run)
+
+        fetch = downloads.submit(self._fetch_artifact, operation)
+        fetch.add_done_callback(verify)
+        self._fetches.append(fetch)
+
+    def _install_operation(
+        self, operation: OperationTypes, events: queue.SimpleQueue
+    ) -> None:
+        try:
+            is_parallel_unsafe = operation.package.develop and (
+                operation.package.source_type in {"directory", "git"}
+            )
+            if is_parallel_unsafe and not operation.skipped:
+                with self._serial_lock:
+                    self._execute_operation(operation)
+            else:
+                self._execute_operation(operation)
+        finally:
+            events.put(("done", operation))
+
+    def _install(self, operation: Install | Update) -> int:
+        artifact = self._artifacts.pop(id(operation), None)
+        if artifact is None:
+            return super()._install(operation)
+
+        # Download and verification errors are reported by the operation
+        archive = artifact.result()
+
+        operation_message = self.get_operation_message(operation)
+        message = (
+            f"  <fg=blue;options=bold>•</> {operation_message}:"
+            " <info>Installing...</info>"
+        )
+        self._write(operation, message)
+        return self.pip_install(archive, upgrade=operation.job_type == "update")
+
+    def _fetch_artifact(self, operation: Install | Update) -> Path | Link:
+        # Same as the downloads of the base executor, the hash is verified later
+        package = operation.package
+        if package.source_type == "file":
+            return self._prepare_file(operation)
+
+        if package.source_type == "url":
+            link = Link(package.source_url)
+        else:
+            link = self._chooser.choose_for(package)
+
+        archive = self._chef.get_cached_archive_for_link(link)
+        if archive is link:
+            try:
+                archive = self._download_archive(operation, link)
+            except BaseException:
+                cache_directory = self._chef.get_cache_directory_for_link(link)
+                cached_file = cache_directory.joinpath(link.filename)
+                if cached_file.exists():
+                    cached_file.unlink()
+
+                raise
+
+            if not link.is_wheel:
+                archive = self._chef.prepare(archive)
+
+        return archive
+
+    def _verify_artifact(
+        self, operation: Install | Update, downloaded: Future
+    ) -> Path | Link:
+        archive = downloaded.result()
+        package = operation.package
+        if package.source_type != "file" and package.files:
+            archive_hash = self._validate_archive_hash(archive, package)
+            with self._lock:
+                self._hashes[package.name] = archive_hash
+
+        return archive
+
+    def _open_section(self, operation: OperationTypes) -> None:
+        # Progress of the download is shown before the operation is executed
+        if not self.supports_fancy_output() or not self._should_write_operation(
+            operation
+        ):
+            return
+
+        with self._lock:
+            if id(operation) not in self._sections:
+                self._sections[id(operation)] = self._io.section()
+                self._sections[id(operation)].write_line(
+                    f"  <fg=blue;options=bold>•</>"
+                    f" {self.get_operation_message(operation)}:"
+                    " <fg=blue>Pending...</>"
+                )
+
+
+def _prerequisites(operations: list[OperationTypes]) -> dict[int, set[int]]:
+    """Operations of the packages required by each operation, by operation id.
+
+    Only operations sorted before the requiring one are prerequisites, as in the
+    order of the base executor, so that dependency cycles cannot block.
+
+    """
+    by_name: dict[str, OperationTypes] = {}
+    for operation in operations:
+        by_name.setdefault(operation.package.name, operation)
+
+    prerequisites: dict[int, set[int]] = {}
+    seen: set[int] = set()
+    for operation in operations:
+        prerequisites[id(operation)] = {
+            id(required)
+            for required in (
+                by_name.get(dependency.name)
+                for dependency in operation.package.requires
+            )
+            if required is not None and id(required) in seen
+        }
+        seen.add(id(operation))
+
+    return prerequisites
+
+
+def _copy_result(source: Future, target: Future) -> None:
+    if source.cancelled():
+        target.cancel()
+    else:
+        target.set_exception(source.exception())
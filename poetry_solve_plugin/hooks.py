@@ -0,0 +1,84 @@
+"""Callbacks on the phases of the work of a provider.
+
+Profiling a phase of a solve, or reporting it to a telemetry system, required
+patching the provider. ``ProviderHooks`` registered with ``Provider.add_hooks()``
+are notified at the start and end of each phase instead:
+
+- the completion of a package, including the completions answered from the
+  memo of completed packages,
+- the solve,
+- the override branches found while completing a package, just before
+  ``OverrideNeeded`` is raised, the ones pruned as their markers cannot be
+  satisfied along with the current overrides, and the resolution of each branch
+  by the solver,
+- the lookups of vcs, url, file and directory dependencies,
+- the requests sent to the pool, i.e. version listings and package metadata not
+  fetched yet.
+
+Without registered hooks, each phase only costs the check of an empty list.
+
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from poetry.core.packages.dependency import Dependency
+
+    from poetry.packages import DependencyPackage
+
+    from .overrides import Overrides
+
+
+class ProviderHooks:
+    """Callbacks of a provider, doing nothing unless overridden.
+
+    The callbacks run in the thread of the solver, and the end of each phase is
+    notified even if the phase raised. The end of a solve or of an override branch
+    is notified with the exception it raised, if any.
+
+    """
+
+    def solve_start(self) -> None:
+        pass
+
+    def solve_end(self, error: BaseException | None) -> None:
+        pass
+
+    def complete_package_start(self, package: DependencyPackage) -> None:
+        pass
+
+    def complete_package_end(self, package: DependencyPackage) -> None:
+        pass
+
+    def override_needed(
+        self, package: DependencyPackage, overrides: list[Overrides]
+    ) -> None:
+        pass
+
+    def override_pruned(
+        self, package: DependencyPackage, dependency: Dependency
+    ) -> None:
+        pass
+
+    def override_branch_start(self, overrides: Overrides) -> None:
+        pass
+
+    def override_branch_end(
+        self, overrides: Overrides, error: BaseException | None
+    ) -> None:
+        pass
+
+    def deferred_lookup_start(self, dependency: Dependency) -> None:
+        pass
+
+    def deferred_lookup_end(self, dependency: Dependency) -> None:
+        pass
+
+    def pool_fetch_start(self, name: str, version: str | None) -> None:
+        """Request of the pool, ``version`` is ``None`` for version listings."""
+
+    def pool_fetch_end(self, name: str, version: str | None) -> None:
+        pass
@@ -1,25 +1,53 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import hashlib
+import os
+from contextlib import contextmanager, ExitStack
+from pathlib import Path
+from typing import Iterator, Sequence, TYPE_CHECKING
 
 from cleo.io.null_io import NullIO
 
+from poetry.__version__ import __version__ as poetry_version
 from poetry.installation.executor import Executor
 from poetry.installation.installer import Installer as BaseInstaller
+from poetry.installation.operations import Install
+from poetry.installation.operations import Uninstall
+from poetry.installation.operations import Update
 from poetry.repositories import Pool
 from poetry.repositories import Repository
 
+from . import __version__
+from .async_pool import AsyncPool
+from .budget import SolveBudget
+from .checkpoint import Checkpoint
+from .executor import PipelineExecutor
+from .lockfile_repository import LockfileRepository, ResolvedRepository
+from .memory import MemoryLimit, MemoryProfile
 from .provider import Provider
+from .snapshot import load_snapshot, MetadataSnapshot, RecordingPool, SnapshotPool
+from .solve_cache import SolveCache
+from .transaction import Transaction
 
 
 if TYPE_CHECKING:
     from cleo.io.io import IO
     from poetry.core.packages.project_package import ProjectPackage
+    from poetry.core.version.markers import BaseMarker
 
     from poetry.config.config import Config
+    from poetry.installation.operations.operation import Operation
     from poetry.packages import Locker
     from poetry.utils.env import Env
 
+    from .hooks import ProviderHooks
+    from .snapshot import SnapshotIndex
+    from .trace import SolveTrace
+
+
+# Files holding the metadata of a directory dependency
+_PROJECT_FILES = ["pyproject.toml", "setup.py", "setup.cfg"]
+
 
 class Installer(BaseInstaller):
     def __init__(
@@ -37,30 +65,343 @@ class Installer(BaseInstaller):
         super().__init__(io, env, package, locker, pool, config, installed, executor)
 
         self._provider = provider
+        self._config = config
+        self._locked_repositories: dict[str, Repository] = {}
+        self._resume = False
+        self._timeout: float | None = None
+        self._max_branches: int | None = None
+        self._max_memory: int | None = None
+        self._io_workers = 1
+        self._export_snapshot: Path | None = None
+        self._offline_snapshot: Path | None = None
+        self._snapshot: MetadataSnapshot | SnapshotIndex | None = None
+        self._solve_cache: SolveCache | None = None
+        self._solve_cache_max_age: float | None = None
+        self._provider_hooks: list[ProviderHooks] = []
+        self._trace: SolveTrace | None = None
+        self._memory_profile: MemoryProfile | None = None
+        # Whether each distinct marker is satisfied by the environment
+        self._marker_validity: dict[BaseMarker, bool] = {}
 
     @property
     def provider(self) -> Provider:
         return self._provider
 
-    def _do_refresh(self) -> int:
-        from poetry.puzzle.solver import Solver
+    def resume(self, resume: bool = True) -> Installer:
+        self._resume = resume
+
+        return self
+
+    def limit(
+        self,
+        timeout: float | None = None,
+        max_branches: int | None = None,
+        max_memory: int | None = None,
+    ) -> Installer:
+        self._timeout = timeout
+        self._max_branches = max_branches
+        self._max_memory = max_memory
+
+        return self
+
+    def io_workers(self, workers: int = 1) -> Installer:
+        self._io_workers = workers
+
+        return self
+
+    def pipeline(self, enabled: bool = True) -> Installer:
+        """Install the packages with ``PipelineExecutor`` instead of Poetry's executor.
+
+        Parameters
+        ----------
+        enabled
+            Whether the artifacts are downloaded, verified and installed
+            concurrently. When disabled, Poetry's ``Executor`` is used.
+
+        """
+        if enabled == isinstance(self._executor, PipelineExecutor):
+            return self
+
+        executor_class = PipelineExecutor if enabled else Executor
+        self._executor = executor_class(self._env, self._pool, self._config, self._io)
+        # The settings already applied to the replaced executor are kept
+        self._executor.dry_run(self._dry_run)
+        self._executor.verbose(self._verbose)
+        if not self._execute_operations:
+            self._executor.disable()
+
+        return self
+
+    def snapshot(
+        self, export: Path | None = None, offline: Path | None = None
+    ) -> Installer:
+        """Record the metadata consulted by the solver, or solve from a recording.
+
+        Parameters
+        ----------
+        export
+            File the metadata snapshot is written to after each solve.
+        offline
+            Metadata snapshot answering all the lookups of the solver, instead of
+            the repositories.
+
+        """
+        self._export_snapshot = export
+        self._offline_snapshot = offline
+        self._snapshot = None
+
+        return self
+
+    def solve_cache(
+        self, enabled: bool = True, max_age: float | None = 24 * 3600
+    ) -> Installer:
+        """Reuse the packages resolved by earlier solves of identical inputs.
+
+        Parameters
+        ----------
+        enabled
+            Whether the results of the solves are stored in, and read from, the
+            ``solve-results`` directory of Poetry's cache.
+        max_age
+            Age in seconds after which the results resolved from the repositories
+            are solved again. Results resolved from a metadata snapshot are
+            always reused, as the snapshot is part of the inputs.
+
+        """
+        self._solve_cache = None
+        if enabled:
+            self._solve_cache = SolveCache(
+                Path(self._config.get("cache-dir")) / "solve-results"
+            )
+        self._solve_cache_max_age = max_age
+
+        return self
+
+    def provider_hooks(self, *hooks: ProviderHooks) -> Installer:
+        """Register the hooks on the providers of the solves."""
+        self._provider_hooks = list(hooks)
+
+        return self
+
+    def trace(self, trace: SolveTrace | None = None) -> Installer:
+        """Record the timeline of the solves and of the write of the lock file."""
+        self._trace = trace
+
+        return self
+
+    def memory_profile(self, profile: MemoryProfile | None = None) -> Installer:
+        """Sample the memory at the end of the phases of the solves."""
+        self._memory_profile = profile
+
+        return self
+
+    @contextmanager
+    def _solver_pool(self) -> Iterator[Pool]:
+        if self._offline_snapshot is not None:
+            if self._snapshot is None:
+                self._snapshot = load_snapshot(self._offline_snapshot)
+
+            yield SnapshotPool(self._snapshot)
+            return
+
+        with ExitStack() as stack:
+            pool = self._pool
+            # Repository lookups of the solver run concurrently when several
+            # workers are allowed.
+            if self._io_workers > 1:
+                pool = stack.enter_context(AsyncPool.wrap(pool, self._io_workers))
+
+            if self._export_snapshot is not None:
+                if self._snapshot is None:
+                    self._snapshot = MetadataSnapshot()
+                pool = RecordingPool(pool, self._snapshot)
+
+            yield pool
+
+        if self._export_snapshot is not None:
+            self._snapshot.save(self._export_snapshot)
+
+    def _get_locked_repository(self) -> LockfileRepository:
+        # The locked repository is shared by all installer paths, and is only
+        # rebuilt when the content of the lock file has changed.
+        key = self._get_lock_hash()
+        if key not in self._locked_repositories:
+            self._locked_repositories[key] = LockfileRepository(
+                self._locker, with_dev_reqs=True
+            )
+            if self._memory_profile is not None:
+                self._memory_profile.sample("lock load")
+
+        return self._locked_repositories[key]
+
+    def _get_lock_hash(self) -> str:
+        lock_path = self._locker.lock.path
+        content = lock_path.read_bytes() if lock_path.exists() else b""
+
+        return hashlib.sha256(str(lock_path).encode() + content).hexdigest()
+
+    def _get_checkpoint(self, use_latest: list[str]) -> Checkpoint:
+        # Completed branches are only reused for the same project, lock file
+        # and packages to update.
+        fingerprint = "\n".join(
+            [self._locker._content_hash, self._get_lock_hash(), *sorted(use_latest)]
+        )
+        name = hashlib.sha256(str(self._locker.lock.path).encode()).hexdigest()
+        checkpoint = Checkpoint(
+            Path(self._config.get("cache-dir"))
+            / "solve-checkpoints"
+            / f"{name}.pickle",
+            hashlib.sha256(fingerprint.encode()).hexdigest(),
+        )
+
+        if self._resume:
+            if checkpoint.load():
+                self._io.write_line(
+                    "<info>Resuming dependency resolution from checkpoint</>"
+                )
+            else:
+                self._io.write_error_line(
+                    "<warning>No checkpoint found, resolving from scratch.</warning>"
+                )
+
+        return checkpoint
+
+    def _solve(
+        self, installed: Repository, locked: Repository, use_latest: list[str]
+    ) -> list[Operation]:
+        from .solver import Solver
+
+        fingerprint = self._get_solve_fingerprint(locked, use_latest)
+        if fingerprint is not None:
+            packages = self._solve_cache.get(
+                fingerprint,
+                self._solve_cache_max_age if self._offline_snapshot is None else None,
+            )
+            if packages is not None:
+                self._io.write_line(
+                    "<info>Reusing the resolution of identical dependencies</>"
+                )
+                # Only the resolved packages of the operations are used,
+                # to write the lock file.
+                return [Install(package) for package in packages]
+
+        with self._solver_pool() as pool:
+            provider = self._provider(self._package, pool, self._io)
+            for hooks in self._provider_hooks:
+                provider.add_hooks(hooks)
+            if self._trace is not None:
+                provider.add_hooks(self._trace)
+            if self._memory_profile is not None:
+                provider.add_hooks(self._memory_profile)
+            if self._max_memory is not None:
+                provider.set_memory_limit(MemoryLimit(self._max_memory))
+
+            solver = Solver(
+                self._package,
+                pool,
+                installed,
+                locked,
+                self._io,
+                provider,
+                checkpoint=self._get_checkpoint(use_latest),
+                budget=SolveBudget(self._timeout, self._max_branches),
+            )
+
+            with self._span("solve", "solve"):
+                transaction = solver.solve(use_latest=use_latest)
+            ops = transaction.calculate_operations()
+
+        if fingerprint is not None:
+            resolved = Repository()
+            self._populate_local_repo(resolved, ops)
+            self._solve_cache.put(fingerprint, resolved.packages)
+
+        return ops
+
+    def _get_solve_fingerprint(
+        self, locked: Repository, use_latest: list[str]
+    ) -> str | None:
+        # The metadata consulted by a solve is only recorded when solving
+        if self._solve_cache is None or self._export_snapshot is not None:
+            return None
+
+        # Unlike the checkpoint, the path of the project is not part of the
+        # inputs, so that the result is shared by all its worktrees.
+        entries = [
+            f"poetry {poetry_version}",
+            f"plugin {__version__}",
+            f"root {self._package.complete_name}",
+            f"python {self._package.python_versions}",
+            f"content {self._locker._content_hash}",
+            *(
+                f"repository {repository.name} {getattr(repository, 'url', '')}"
+                for repository in self._pool.repositories
+            ),
+            *self._get_locked_entries(locked),
+            *self._get_path_entries(locked),
+            *sorted(f"latest {name}" for name in use_latest),
+        ]
+        if self._offline_snapshot is not None:
+            content = self._offline_snapshot.read_bytes()
+            entries.append(f"snapshot {hashlib.sha256(content).hexdigest()}")
+
+        return hashlib.sha256("\n".join(entries).encode()).hexdigest()
+
+    def _get_locked_entries(self, locked: Repository) -> list[str]:
+        # The entries of the lock file are hashed without building the packages
+        digest = getattr(locked, "digest", lambda: None)()
+        if digest is not None:
+            return [f"lock {digest}"]
+
+        return sorted(
+            f"locked {package.complete_name} {package.full_pretty_version}"
+            f" {package.source_type} {package.source_url}"
+            for package in locked.packages
+        )
+
+    def _get_path_entries(self, locked: Repository) -> list[str]:
+        # The metadata of path dependencies is read from disk by the solve. The
+        # locked ones include the path dependencies of path dependencies.
+        paths = {
+            dependency.full_path
+            for dependency in self._package.all_requires
+            if dependency.is_directory() or dependency.is_file()
+        }
+        if hasattr(locked, "packages_from"):
+            path_packages = locked.packages_from("directory", "file")
+        else:
+            path_packages = [
+                package
+                for package in locked.packages
+                if package.source_type in {"directory", "file"}
+            ]
+        paths.update(Path(package.source_url) for package in path_packages)
+
+        root = self._locker.lock.path.parent
+        entries = []
+        for path in sorted(paths):
+            if path.is_dir():
+                files = [path / name for name in _PROJECT_FILES]
+            else:
+                files = [path]
+            digest = hashlib.sha256()
+            for file in files:
+                if file.is_file():
+                    digest.update(file.name.encode() + file.read_bytes())
+            entries.append(f"path {os.path.relpath(path, root)} {digest.hexdigest()}")
+
+        return entries
 
+    def _do_refresh(self) -> int:
         # Checking extras
         for extra in self._extras:
             if extra not in self._package.extras:
                 raise ValueError(f"Extra [{extra}] is not specified.")
 
-        locked_repository = self._locker.locked_repository(True)
-        solver = Solver(
-            self._package,
-            self._pool,
-            locked_repository,
-            locked_repository,
-            self._io,
-            self._provider(self._package, self._pool, self._io),
-        )
-
-        ops = solver.solve(use_latest=[]).calculate_operations()
+        # Only the resolved packages of the operations are used, which are the
+        # same whether the locked packages are considered installed or not.
+        locked_repository = self._get_locked_repository()
+        ops = self._solve(Repository(), locked_repository, [])
 
         local_repo = Repository()
         self._populate_local_repo(local_repo, ops)
@@ -69,19 +410,74 @@ class Installer(BaseInstaller):
 
         return 0
 
+    def _write_lock_file(self, repo: Repository, force: bool = True) -> None:
+        with self._span("write lock file", "lock"):
+            super()._write_lock_file(repo, force=force)
+
+        if self._memory_profile is not None:
+            self._memory_profile.sample("lock write")
+
+    @contextmanager
+    def _span(self, name: str, category: str) -> Iterator[None]:
+        if self._trace is None:
+            yield
+            return
+
+        with self._trace.span(name, category):
+            yield
+
+    def _populate_local_repo(
+        self, local_repo: Repository, ops: Sequence[Operation]
+    ) -> None:
+        unique_names = {package.unique_name for package in local_repo.packages}
+        for op in ops:
+            if isinstance(op, Uninstall):
+                continue
+            elif isinstance(op, Update):
+                package = op.target_package
+            else:
+                package = op.package
+
+            if package.unique_name not in unique_names:
+                unique_names.add(package.unique_name)
+                local_repo.add_package(package)
+
+    def _filter_operations(self, ops: Sequence[Operation], repo: Repository) -> None:
+        # The same markers are shared by many packages, so each of them is
+        # only validated once against the environment.
+        extra_packages = set(self._get_extra_packages(repo))
+        for op in ops:
+            if op.job_type == "uninstall":
+                continue
+
+            package = op.target_package if isinstance(op, Update) else op.package
+            if not self._is_valid_for_marker(package.marker):
+                op.skip("Not needed for the current environment")
+                continue
+
+            # If a package is optional and not requested
+            # in any extra we skip it
+            if package.optional and package.name not in extra_packages:
+                op.skip("Not required")
+
+    def _is_valid_for_marker(self, marker: BaseMarker) -> bool:
+        if marker not in self._marker_validity:
+            self._marker_validity[marker] = self._env.is_valid_for_marker(marker)
+
+        return self._marker_validity[marker]
+
     def _do_install(self, local_repo: Repository) -> int:
-        from poetry.puzzle.solver import Solver
+        from .solver import Solver
 
         locked_repository = Repository()
         if self._update:
             if self._locker.is_locked() and not self._lock:
-                locked_repository = self._locker.locked_repository(True)
+                locked_repository = self._get_locked_repository()
 
                 # If no packages have been whitelisted (The ones we want to update),
                 # we whitelist every package in the lock file.
                 if not self._whitelist:
-                    for pkg in locked_repository.packages:
-                        self._whitelist.append(pkg.name)
+                    self._whitelist.extend(locked_repository.package_names)
 
             # Checking extras
             for extra in self._extras:
@@ -89,20 +485,13 @@ class Installer(BaseInstaller):
                     raise ValueError(f"Extra [{extra}] is not specified.")
 
             self._io.write_line("<info>Updating dependencies</>")
-            solver = Solver(
-                self._package,
-                self._pool,
-                self._installed_repository,
-                locked_repository,
-                self._io,
-                self._provider(self._package, self._pool, self._io),
+            ops = self._solve(
+                self._installed_repository, locked_repository, self._whitelist
             )
-
-            ops = solver.solve(use_latest=self._whitelist).calculate_operations()
         else:
             self._io.write_line("<info>Installing dependencies from lock file</>")
 
-            locked_repository = self._locker.locked_repository(True)
+            locked_repository = self._get_locked_repository()
 
             if not self._locker.is_fresh():
                 self._io.write_error_line(
@@ -131,8 +520,18 @@ class Installer(BaseInstaller):
                 # If we are only in lock mode, no need to go any further
                 return 0
 
-        if self._groups is not None:
-            root = self._package.with_dependency_groups(list(self._groups), only=True)
+        if self._without_groups or self._with_groups or self._only_groups:
+            if self._with_groups:
+                # Default dependencies and opted-in optional dependencies
+                root = self._package.with_dependency_groups(self._with_groups)
+            elif self._without_groups:
+                # Default dependencies without selected groups
+                root = self._package.without_dependency_groups(self._without_groups)
+            else:
+                # Only selected groups
+                root = self._package.with_dependency_groups(
+                    self._only_groups, only=True
+                )
         else:
             root = self._package.without_optional_dependency_groups()
 
@@ -146,13 +545,9 @@ class Installer(BaseInstaller):
         pool = Pool(ignore_repository_names=True)
 
         # Making a new repo containing the packages
-        # newly resolved and the ones from the current lock file
-        repo = Repository()
-        for package in local_repo.packages + locked_repository.packages:
-            if not repo.has_package(package):
-                repo.add_package(package)
-
-        pool.add_repository(repo)
+        # newly resolved and the ones from the current lock file, the locked
+        # ones being built only when the solve looks their name up
+        pool.add_repository(ResolvedRepository(local_repo, locked_repository))
 
         solver = Solver(
             root,
@@ -160,7 +555,7 @@ class Installer(BaseInstaller):
             self._installed_repository,
             locked_repository,
             NullIO(),
-            self._provider(self._package, self._pool, self._io),
+            self._provider(self._package, pool, self._io),
         )
         # Everything is resolved at this point, so we no longer need
         # to load deferred dependencies (i.e. VCS, URL and path dependencies)
@@ -175,10 +570,13 @@ class Installer(BaseInstaller):
         if not self._requires_synchronization:
             # If no packages synchronisation has been requested we need
             # to calculate the uninstall operations
-            from poetry.puzzle.transaction import Transaction
-
+            current_packages = (
+                locked_repository
+                if hasattr(locked_repository, "packages_named")
+                else locked_repository.packages
+            )
             transaction = Transaction(
-                locked_repository.packages,
+                current_packages,
                 [(package, 0) for package in local_repo.packages],
                 installed_packages=self._installed_repository.packages,
                 root_package=root,
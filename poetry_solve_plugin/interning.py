@@ -0,0 +1,138 @@
+"""Shared dependency objects of a resolution.
+
+Every completed package used to own its dependencies, and the provider annotated
+them in place with the transitive marker and python versions of the requiring
+package. Identical requirements of different packages, and of the same package in
+different override branches, were therefore held as distinct objects.
+
+"""
+
+from __future__ import annotations
+
+import copy
+
+from typing import TYPE_CHECKING
+
+from poetry.core.packages.dependency import Dependency
+
+
+if TYPE_CHECKING:
+    from poetry.core.version.markers import BaseMarker
+
+
+class DependencyInterner:
+    """Canonical dependency objects, keyed by their immutable properties.
+
+    Annotated variants, with a given transitive marker and transitive python
+    versions, are kept in a separate table, keyed by the canonical dependency.
+    Objects returned by the interner are shared and must not be modified.
+
+    Only plain requirements are interned. Direct origin dependencies (directory,
+    file, url and vcs) are updated by the base provider when they are searched
+    for, so they are copied instead.
+
+    """
+
+    def __init__(self) -> None:
+        self._dependencies: dict[tuple, Dependency] = {}
+        self._annotated: dict[tuple[int, BaseMarker, str], Dependency] = {}
+
+    def __len__(self) -> int:
+        return len(self._dependencies) + len(self._annotated)
+
+    def clear(self) -> None:
+        """Forget the canonical objects, which stay valid for their users."""
+        self._dependencies.clear()
+        self._annotated.clear()
+
+    def intern(self, dependency: Dependency) -> Dependency:
+        """Canonical dependency equal to the given one, without annotations."""
+        key = _dependency_key(dependency)
+        if key is None:
+            return dependency
+
+        interned = self._dependencies.get(key)
+        if interned is None:
+            interned = self._dependencies[key] = copy.copy(dependency)
+            interned.transitive_marker = interned.marker
+            interned.transitive_python_versions = interned.python_versions
+
+        return interned
+
+    def annotate(
+        self,
+        dependency: Dependency,
+        transitive_marker: BaseMarker,
+        transitive_python_versions: str,
+    ) -> Dependency:
+        """Shared variant of a dependency with the given transitive annotations."""
+        interned = self.intern(dependency)
+        if interned is dependency:
+            # Direct origin dependency
+            if (
+                dependency.transitive_marker == transitive_marker
+                and dependency.transitive_python_versions == transitive_python_versions
+            ):
+                return dependency
+
+            annotated = copy.copy(dependency)
+            annotated.transitive_marker = transitive_marker
+            annotated.transitive_python_versions = transitive_python_versions
+            return annotated
+
+        if (
+            transitive_marker == interned.transitive_marker
+            and transitive_python_versions == interned.transitive_python_versions
+        ):
+            return interned
+
+        # Canonical dependencies are kept alive by the first table,
+        # so their ids are stable keys.
+        key = (id(interned), transitive_marker, transitive_python_versions)
+        annotated = self._annotated.get(key)
+        if annotated is None:
+            annotated = self._annotated[key] = copy.copy(interned)
+            annotated.transitive_marker = transitive_marker
+            annotated.transitive_python_versions = transitive_python_versions
+
+        return annotated
+
+
+def _dependency_key(dependency: Dependency) -> tuple | None:
+    if type(dependency) is not Dependency:
+        return None
+
+    return (
+        dependency.complete_name,
+        dependency.pretty_name,
+        dependency.constraint,
+        dependency.pretty_constraint,
+        dependency.marker,
+        dependency.python_versions,
+        dependency.is_optional(),
+        dependency.is_activated(),
+        dependency.groups,
+        dependency.allows_prereleases(),
+        tuple(dependency.in_extras),
+        dependency.is_root,
+        dependency.source_name,
+        dependency.source_type,
+        dependency.source_url,
+        dependency.source_reference,
+        dependency.source_resolved_reference,
+        dependency.source_subdirectory,
+    )
+
+
+def copy_dependency(dependency: Dependency) -> Dependency:
+    """Shallow copy of a dependency that can be modified on its own.
+
+    Setting the marker of a dependency appends its extras to ``in_extras`` in
+    place, so the copy gets its own list, and its own constraint, instead of
+    sharing them with the original.
+    """
+    copied = copy.copy(dependency)
+    copied._in_extras = list(dependency._in_extras)
+    copied._constraint = copy.copy(dependency._constraint)
+
+    return copied
@@ -0,0 +1,341 @@
+"""Repository of locked packages that are materialized on first access.
+
+The package construction is copied from [python-poetry/poetry/packages/locker.py](https://github.com/python-poetry/poetry/blob/1.2.0b1/src/poetry/packages/locker.py).
+
+"""  # noqa: E501
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any, TYPE_CHECKING
+
+from poetry.core.packages.dependency import Dependency
+from poetry.core.packages.package import Package
+from poetry.core.version.markers import parse_marker
+from poetry.core.version.requirements import InvalidRequirement
+
+from poetry.packages import DependencyPackage
+from poetry.repositories import Repository
+from poetry.utils.helpers import canonicalize_name
+
+
+if TYPE_CHECKING:
+    from poetry.packages import Locker
+
+
+class LockfileRepository(Repository):
+    """Repository of the packages in ``poetry.lock``.
+
+    On load, the lock entries are only indexed by name. ``Package`` and
+    ``Dependency`` objects are constructed, and markers parsed, when a package of
+    the name is first requested. The solver and the solve cache look the locked
+    packages up by name with ``package_names`` and ``packages_named()``, so the
+    entries a solve never reaches are not built at all.
+
+    """
+
+    def __init__(self, locker: Locker, with_dev_reqs: bool = False) -> None:
+        super().__init__()
+
+        self._locker = locker
+        self._metadata: dict[str, Any] = {}
+        self._entries: dict[str, list[tuple[int, dict[str, Any]]]] = {}
+        self._materialized: dict[str, list[tuple[int, Package]]] = {}
+        self._fully_loaded = False
+        self._modified = False
+
+        if not locker.is_locked():
+            self._fully_loaded = True
+            return
+
+        lock_data = locker.lock_data
+        self._metadata = lock_data["metadata"]
+
+        index = 0
+        for info in lock_data["package"]:
+            if not with_dev_reqs and info["category"] != "main":
+                continue
+
+            name = canonicalize_name(info["name"])
+            self._entries.setdefault(name, []).append((index, info))
+            index += 1
+
+    @property
+    def packages(self) -> list[Package]:
+        self._load_all()
+        return self._packages
+
+    @property
+    def package_names(self) -> list[str]:
+        """Names of the locked packages, in the order of the lock file."""
+        if self._fully_loaded:
+            return list(dict.fromkeys(package.name for package in self._packages))
+
+        return list(self._entries)
+
+    def packages_named(self, name: str) -> list[Package]:
+        """Locked packages of a name, in the order of the lock file."""
+        return self._load(name)
+
+    def packages_from(self, *source_types: str) -> list[Package]:
+        """Locked packages of the given source types, e.g. ``"directory"``."""
+        if self._fully_loaded:
+            return [p for p in self._packages if p.source_type in source_types]
+
+        return [
+            package
+            for name, entries in self._entries.items()
+            if any(
+                info.get("source", {}).get("type") in source_types
+                for _, info in entries
+            )
+            for package in self._load(name)
+            if package.source_type in source_types
+        ]
+
+    def digest(self) -> str | None:
+        """Hash of the lock entries, or ``None`` once packages were added or removed."""
+        if self._modified:
+            return None
+
+        entries = sorted(
+            entry for entries in self._entries.values() for entry in entries
+        )
+        content = json.dumps([info for _, info in entries], sort_keys=True, default=str)
+
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def package(
+        self, name: str, version: str, extras: list[str] | None = None
+    ) -> Package:
+        for package in self._load(name):
+            if package.version.text == version:
+                return package.clone()
+
+    def find_packages(self, dependency: Dependency) -> list[Package]:
+        return Repository(self._load(dependency.name)).find_packages(dependency)
+
+    def has_package(self, package: Package) -> bool:
+        package_id = package.unique_name
+        return any(
+            package_id == repo_package.unique_name
+            for repo_package in self._load(package.name)
+        )
+
+    def add_package(self, package: Package) -> None:
+        self._load_all()
+        self._modified = True
+        super().add_package(package)
+
+    def remove_package(self, package: Package) -> None:
+        self._load_all()
+        self._modified = True
+        super().remove_package(package)
+
+    def __len__(self) -> int:
+        if self._fully_loaded:
+            return len(self._packages)
+
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _load(self, name: str) -> list[Package]:
+        if self._fully_loaded:
+            name = canonicalize_name(name)
+            return [package for package in self._packages if package.name == name]
+
+        return [package for _, package in self._materialize(canonicalize_name(name))]
+
+    def _load_all(self) -> None:
+        if self._fully_loaded:
+            return
+
+        indexed = []
+        for name in self._entries:
+            indexed += self._materialize(name)
+
+        self._packages = [package for _, package in sorted(indexed)]
+        self._fully_loaded = True
+
+    def _materialize(self, name: str) -> list[tuple[int, Package]]:
+        if name not in self._materialized:
+            self._materialized[name] = [
+                (index, self._create_package(info))
+                for index, info in self._entries.get(name, [])
+            ]
+
+        return self._materialized[name]
+
+    def _create_package(self, info: dict[str, Any]) -> Package:
+        from poetry.factory import Factory
+
+        lock_path = self._locker.lock.path
+        source = info.get("source", {})
+        source_type = source.get("type")
+        url = source.get("url")
+        if source_type in ["directory", "file"]:
+            url = lock_path.parent.joinpath(url).resolve().as_posix()
+
+        package = Package(
+            info["name"],
+            info["version"],
+            info["version"],
+            source_type=source_type,
+            source_url=url,
+            source_reference=source.get("reference"),
+            source_resolved_reference=source.get("resolved_reference"),
+        )
+        package.description = info.get("description", "")
+        package.category = info.get("category", "main")
+        package.groups = info.get("groups", ["default"])
+        package.optional = info["optional"]
+        if "hashes" in self._metadata:
+            # Old lock so we create dummy files from the hashes
+            package.files = [
+                {"name": h, "hash": h} for h in self._metadata["hashes"][info["name"]]
+            ]
+        else:
+            package.files = self._metadata["files"][info["name"]]
+
+        package.python_versions = info["python-versions"]
+        extras = info.get("extras", {})
+        if extras:
+            for name, deps in extras.items():
+                package.extras[name] = []
+
+                for dep in deps:
+                    try:
+                        dependency = Dependency.create_from_pep_508(dep)
+                    except InvalidRequirement:
+                        # handle lock files with invalid PEP 508
+                        m = re.match(r"^(.+?)(?:\[(.+?)])?(?:\s+\((.+)\))?$", dep)
+                        if not m:
+                            raise
+                        dep_name = m.group(1)
+                        extras = m.group(2) or ""
+                        constraint = m.group(3) or "*"
+                        dependency = Dependency(
+                            dep_name, constraint, extras=extras.split(",")
+                        )
+                    package.extras[name].append(dependency)
+
+        if "marker" in info:
+            package.marker = parse_marker(info["marker"])
+        else:
+            # Compatibility for old locks
+            if "requirements" in info:
+                dep = Dependency("foo", "0.0.0")
+                for name, value in info["requirements"].items():
+                    if name == "python":
+                        dep.python_versions = value
+                    elif name == "platform":
+                        dep.platform = value
+
+                split_dep = dep.to_pep_508(False).split(";")
+                if len(split_dep) > 1:
+                    package.marker = parse_marker(split_dep[1].strip())
+
+        for dep_name, constraint in info.get("dependencies", {}).items():
+            root_dir = lock_path.parent
+            if package.source_type == "directory":
+                # root dir should be the source of the package relative to the lock
+                # path
+                root_dir = Path(package.source_url)
+
+            if isinstance(constraint, list):
+                for c in constraint:
+                    package.add_dependency(
+                        Factory.create_dependency(dep_name, c, root_dir=root_dir)
+                    )
+
+                continue
+
+            package.add_dependency(
+                Factory.create_dependency(dep_name, constraint, root_dir=root_dir)
+            )
+
+        if "develop" in info:
+            package.develop = info["develop"]
+
+        return package
+
+
+class ResolvedRepository(Repository):
+    """Resolved packages, followed by the locked packages of the same name.
+
+    Stands in for the union of both repositories that the install solve runs
+    against: a locked package is only built once its name is looked up.
+
+    Parameters
+    ----------
+    resolved
+        The packages of the previous solve.
+    locked
+        The locked packages, either a ``LockfileRepository`` or a plain repository.
+    """
+
+    def __init__(self, resolved: Repository, locked: Repository) -> None:
+        super().__init__()
+
+        self._resolved: dict[str, list[Package]] = {}
+        for package in resolved.packages:
+            if isinstance(package, DependencyPackage):
+                package = package.package
+
+            self._resolved.setdefault(package.name, []).append(package)
+
+        self._locked = locked
+        self._by_name: dict[str, list[Package]] = {}
+
+    @property
+    def packages(self) -> list[Package]:
+        resolved = [package for ps in self._resolved.values() for package in ps]
+        packages = []
+        unique_names = set()
+        for package in resolved + self._locked.packages:
+            if package.unique_name not in unique_names:
+                unique_names.add(package.unique_name)
+                packages.append(package)
+
+        return packages
+
+    def package(
+        self, name: str, version: str, extras: list[str] | None = None
+    ) -> Package:
+        for package in self._load(name):
+            if package.version.text == version:
+                return package.clone()
+
+    def find_packages(self, dependency: Dependency) -> list[Package]:
+        return Repository(self._load(dependency.name)).find_packages(dependency)
+
+    def has_package(self, package: Package) -> bool:
+        package_id = package.unique_name
+        return any(
+            package_id == repo_package.unique_name
+            for repo_package in self._load(package.name)
+        )
+
+    def __len__(self) -> int:
+        return len(self.packages)
+
+    def _load(self, name: str) -> list[Package]:
+        name = canonicalize_name(name)
+        if name not in self._by_name:
+            if hasattr(self._locked, "packages_named"):
+                locked = self._locked.packages_named(name)
+            else:
+                locked = [p for p in self._locked.packages if p.name == name]
+
+            packages = list(self._resolved.get(name, []))
+            unique_names = {package.unique_name for package in packages}
+            for package in locked:
+                if package.unique_name not in unique_names:
+                    unique_names.add(package.unique_name)
+                    packages.append(package)
+
+            self._by_name[name] = packages
+
+        return self._by_name[name]
@@ -0,0 +1,285 @@
+"""Memory used by a solve, sampled at the boundaries of its phases.
+
+Large solves with many override branches could exhaust the memory of small
+machines, with nothing telling which phase or which code held the memory.
+
+``MemoryProfile`` traces the allocations with ``tracemalloc`` and samples them
+after the lock file is loaded, after each override branch and after the lock file
+is written: the peak RSS of the process, the traced memory and its peak since the
+previous sample, and the allocation sites of the provider, the installer and
+Poetry's puzzle package holding the most memory.
+
+``MemoryLimit`` bounds the resident memory of a solve instead: the provider
+releases the oldest entries of its caches whenever the limit is exceeded, at the
+start of each override branch and periodically while completing packages. The
+limit is ignored where the current resident memory cannot be read, as the peak
+never decreases once the caches are released.
+
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, MutableMapping, TYPE_CHECKING
+
+from .hooks import ProviderHooks
+
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+if TYPE_CHECKING:
+    from .overrides import Overrides
+    from .trace import SolveTrace
+
+
+logger = logging.getLogger(__name__)
+
+# Current memory of the process, in pages, on Linux
+_STATM = "/proc/self/statm"
+
+# Allocation sites reported
+_FILTERS = [
+    tracemalloc.Filter(True, "*/poetry_solve_plugin/provider.py"),
+    tracemalloc.Filter(True, "*/poetry_solve_plugin/installer.py"),
+    tracemalloc.Filter(True, "*/poetry/puzzle/*"),
+]
+
+
+@dataclass
+class MemorySample:
+    """Memory in use at the end of a phase, in bytes."""
+
+    phase: str
+    #: Peak resident set size of the process so far, if known
+    peak_rss: int | None
+    traced: int
+    #: Peak of the traced memory during the phase
+    traced_peak: int
+    #: Allocation sites as ``(location, size, count)``, largest first
+    sites: list[tuple[str, int, int]] = field(default_factory=list)
+
+    def report(self) -> str:
+        rss = _format_size(self.peak_rss) if self.peak_rss is not None else "unknown"
+        return (
+            f"{self.phase}: peak RSS {rss}, traced {_format_size(self.traced)}"
+            f" (peak {_format_size(self.traced_peak)})"
+        )
+
+
+class MemoryProfile(ProviderHooks):
+    """Memory samples of a solve, at the end of each phase.
+
+    Parameters
+    ----------
+    limit
+        Number of allocation sites recorded per sample.
+    trace
+        Trace the samples are added to as counters.
+
+    """
+
+    def __init__(self, limit: int = 10, trace: SolveTrace | None = None) -> None:
+        self._limit = limit
+        self._trace = trace
+        self._samples: list[MemorySample] = []
+        self._branches = 0
+        self._started = False
+
+    @property
+    def samples(self) -> list[MemorySample]:
+        return self._samples
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+
+    def stop(self) -> None:
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def sample(self, phase: str) -> MemorySample | None:
+        """Record the memory in use at the end of the phase."""
+        if not tracemalloc.is_tracing():
+            return None
+
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        statistics = (
+            tracemalloc.take_snapshot().filter_traces(_FILTERS).statistics("lineno")
+        )
+        sample = MemorySample(
+            phase,
+            _peak_rss(),
+            traced,
+            traced_peak,
+            [
+                (
+                    f"{_short_path(stat.traceback[0].filename)}:"
+                    f"{stat.traceback[0].lineno}",
+                    stat.size,
+                    stat.count,
+                )
+                for stat in statistics[: self._limit]
+            ],
+        )
+        self._samples.append(sample)
+        # Peaks are reported per phase, where supported (Python 3.9+)
+        reset_peak = getattr(tracemalloc, "reset_peak", None)
+        if reset_peak is not None:
+            reset_peak()
+
+        if self._trace is not None:
+            values: dict[str, Any] = {"traced": traced, "traced peak": traced_peak}
+            if sample.peak_rss is not None:
+                values["peak RSS"] = sample.peak_rss
+            self._trace.counter("memory", values)
+
+        return sample
+
+    def report(self) -> str:
+        if not self._samples:
+            return "No memory samples."
+
+        lines = ["Memory at the end of each phase:"]
+        lines += [f"  - {sample.report()}" for sample in self._samples]
+
+        largest = max(self._samples, key=lambda sample: sample.traced_peak)
+        if largest.sites:
+            lines.append(f"Top allocation sites after {largest.phase}:")
+            lines += [
+                f"  - {location}: {_format_size(size)} in {count} blocks"
+                for location, size, count in largest.sites
+            ]
+
+        return "\n".join(lines)
+
+    def override_branch_end(
+        self, overrides: Overrides, error: BaseException | None
+    ) -> None:
+        self._branches += 1
+        self.sample(f"branch {self._branches}")
+
+
+class MemoryLimit:
+    """Ceiling on the resident memory of a solve.
+
+    Parameters
+    ----------
+    max_memory
+        Maximum resident memory in bytes.
+    interval
+        Number of checks between two reads of the resident memory, unless
+        forced.
+
+    """
+
+    def __init__(self, max_memory: int, interval: int = 100) -> None:
+        self._max_memory = max_memory
+        self._interval = interval
+        self._checks = 0
+        self._releases = 0
+        self._unavailable = False
+
+    @property
+    def max_memory(self) -> int:
+        return self._max_memory
+
+    @property
+    def releases(self) -> int:
+        """Number of times the limit was exceeded."""
+        return self._releases
+
+    def exceeded(self, force: bool = False) -> bool:
+        if self._unavailable:
+            return False
+
+        self._checks += 1
+        if not force and self._checks % self._interval:
+            return False
+
+        rss = _current_rss()
+        if rss is None:
+            logger.warning(
+                "The current resident memory is unavailable on this platform,"
+                " the memory limit is ignored."
+            )
+            self._unavailable = True
+            return False
+
+        if rss <= self._max_memory:
+            return False
+
+        self._releases += 1
+        return True
+
+    def report(self) -> str:
+        if self._unavailable:
+            return "Memory limit ignored, the current resident memory is unavailable"
+
+        return (
+            f"Caches released {self._releases} times to stay under"
+            f" {_format_size(self._max_memory)}"
+        )
+
+
+def parse_size(size: str) -> int:
+    """Number of bytes of a size such as ``512M`` or ``4G``."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmg]?)i?b?\s*", size, re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"Invalid size: {size}")
+
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** "bkmg".index(unit.lower() or "b"))
+
+
+def evict_oldest(cache: MutableMapping, fraction: float) -> int:
+    """Remove the oldest entries of a cache, return the number removed."""
+    count = int(len(cache) * fraction)
+    for key in list(cache)[:count]:
+        del cache[key]
+
+    return count
+
+
+def _current_rss() -> int | None:
+    try:
+        with open(_STATM, "rb") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def _peak_rss() -> int | None:
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes, except on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _short_path(filename: str) -> str:
+    parts = Path(filename).parts
+    for package in ["poetry_solve_plugin", "poetry"]:
+        if package in parts:
+            index = len(parts) - 1 - parts[::-1].index(package)
+            return "/".join(parts[index:])
+
+    return filename
+
+
+def _format_size(size: int) -> str:
+    return f"{size / 2 ** 20:.1f} MiB"
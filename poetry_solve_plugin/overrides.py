@@ -0,0 +1,153 @@
+"""Compact representation of the overrides of a resolution branch.
+
+Each override branch holds its own copy of the override table, so the entries only
+keep the identity of the overridden package and a copy of the overriding
+dependency. Keys and records are interned, so identical entries are shared by all
+branches.
+
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from weakref import WeakValueDictionary
+
+from .interning import copy_dependency
+
+
+if TYPE_CHECKING:
+    from poetry.core.packages.dependency import Dependency
+    from poetry.core.packages.package import Package
+
+    Overrides = dict["PackageKey", dict[str, "OverrideRecord"]]
+
+
+_package_keys: WeakValueDictionary[tuple, PackageKey] = WeakValueDictionary()
+_records: WeakValueDictionary[tuple, OverrideRecord] = WeakValueDictionary()
+
+
+class PackageKey:
+    """Identity of an overridden package, without its metadata."""
+
+    __slots__ = ("complete_name", "version", "source", "_hash", "__weakref__")
+
+    def __init__(
+        self, complete_name: str, version: str, source: tuple[str | None, ...]
+    ) -> None:
+        self.complete_name = complete_name
+        self.version = version
+        self.source = source
+        self._hash = hash((complete_name, version, source))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PackageKey):
+            return NotImplemented
+
+        return self is other or (self.complete_name, self.version, self.source) == (
+            other.complete_name,
+            other.version,
+            other.source,
+        )
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self) -> tuple:
+        return _intern_package_key, (self.complete_name, self.version, self.source)
+
+    def __repr__(self) -> str:
+        return f"{self.complete_name} ({self.version})"
+
+
+class OverrideRecord:
+    """The duplicate dependency that overrides the others of its name."""
+
+    __slots__ = (
+        "name",
+        "constraint",
+        "marker",
+        "_dependency",
+        "_key",
+        "_hash",
+        "__weakref__",
+    )
+
+    def __init__(self, dependency: Dependency) -> None:
+        self.name = dependency.name
+        self.constraint = dependency.constraint
+        self.marker = dependency.marker
+        # Duplicate dependencies are modified when they are merged
+        self._dependency = copy_dependency(dependency)
+        self._key = _record_key(dependency)
+        self._hash = hash(self._key)
+
+    def to_dependency(self) -> Dependency:
+        """The recorded dependency, with its source, extras and class."""
+        overridden = copy_dependency(self._dependency)
+        overridden.transitive_marker = overridden.marker
+        overridden.transitive_python_versions = overridden.python_versions
+
+        return overridden
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, OverrideRecord):
+            return NotImplemented
+
+        return self is other or self._key == other._key
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self) -> tuple:
+        return override_record, (self._dependency,)
+
+    def __repr__(self) -> str:
+        marker = "" if self.marker.is_any() else f" ; {self.marker}"
+        return f"<Override {self.name} ({self.constraint}){marker}>"
+
+
+def package_key(package: Package) -> PackageKey:
+    return _intern_package_key(
+        package.complete_name,
+        package.version.text,
+        (package.source_type, package.source_url, package.source_reference),
+    )
+
+
+def override_record(dependency: Dependency) -> OverrideRecord:
+    key = _record_key(dependency)
+    interned = _records.get(key)
+    if interned is None:
+        interned = _records[key] = OverrideRecord(dependency)
+
+    return interned
+
+
+def _intern_package_key(
+    complete_name: str, version: str, source: tuple[str | None, ...]
+) -> PackageKey:
+    key = (complete_name, version, source)
+    interned = _package_keys.get(key)
+    if interned is None:
+        interned = _package_keys[key] = PackageKey(complete_name, version, source)
+
+    return interned
+
+
+def _record_key(dependency: Dependency) -> tuple:
+    return (
+        type(dependency),
+        dependency.complete_name,
+        dependency.constraint,
+        dependency.marker,
+        dependency.python_versions,
+        dependency.allows_prereleases(),
+        dependency.is_optional(),
+        dependency.source_name,
+        dependency.source_type,
+        dependency.source_url,
+        dependency.source_reference,
+        dependency.source_resolved_reference,
+        dependency.source_subdirectory,
+        getattr(dependency, "develop", False),
+    )
@@ -6,25 +6,47 @@ The implementation is copied from [radoering/poetry/puzzle/provider.py](https://
 
 from __future__ import annotations
 
+import copy
+import functools
+import gc
 import logging
-from typing import Any, TYPE_CHECKING
+from typing import Any, Callable, Iterable, TYPE_CHECKING
 
 from poetry.core.semver.empty_constraint import EmptyConstraint
 from poetry.core.version.markers import AnyMarker
 from poetry.core.version.markers import MarkerUnion
 
 from poetry.packages import DependencyPackage
+from poetry.packages.package_collection import PackageCollection
 from poetry.puzzle.exceptions import OverrideNeeded
 from poetry.puzzle.provider import Provider as BaseProvider
 
+from .candidates import candidate_index
+from .interning import copy_dependency, DependencyInterner
+from .memory import evict_oldest
+from .overrides import override_record, package_key
+from .requires_python import annotate_python_versions, PruningStats
+from .single_flight import SingleFlight
+
 
 if TYPE_CHECKING:
     from poetry.core.packages.dependency import Dependency
+    from poetry.core.packages.directory_dependency import DirectoryDependency
+    from poetry.core.packages.file_dependency import FileDependency
     from poetry.core.packages.package import Package
+    from poetry.core.packages.url_dependency import URLDependency
+    from poetry.core.packages.vcs_dependency import VCSDependency
+    from poetry.core.semver.helpers import VersionTypes
+    from poetry.core.version.markers import BaseMarker
 
     from poetry.repositories import Pool
     from poetry.utils.env import Env
 
+    from .hooks import ProviderHooks
+    from .memory import MemoryLimit
+    from .overrides import OverrideRecord, PackageKey
+    from .single_flight import FlightStats
+
 
 logger = logging.getLogger(__name__)
 
@@ -44,14 +66,178 @@ class Provider(BaseProvider):
         self._search_for: dict[Dependency, list[Package]] = {}
         self._is_debugging = self._io.is_debug() or self._io.is_very_verbose()
         self._in_progress = False
-        self._overrides: dict[DependencyPackage, dict[str, Dependency]] = {}
+        self._overrides: dict[PackageKey, dict[str, OverrideRecord]] = {}
         self._deferred_cache: dict[Dependency, Package] = {}
         self._load_deferred = True
+        self._branching: dict[tuple[str, str], int] = {}
+        self._completed: dict[tuple, tuple[Env | None, Package]] = {}
+        self._dependencies = DependencyInterner()
+        self._package_lookups: SingleFlight[tuple, Package] = SingleFlight()
+        self._candidates = candidate_index(pool)
+        self._supported: dict[tuple[int, VersionTypes], tuple[list, list]] = {}
+        self._pruned_searches = 0
+        self._pruned: set[tuple[str, str]] = set()
+        self._kept_unsupported: set[tuple[str, str]] = set()
+        self._hooks: list[ProviderHooks] = []
+        self._memory_limit: MemoryLimit | None = None
+
+        # Pools recording or replaying a metadata snapshot also provide
+        # the packages of vcs and url dependencies.
+        deferred_package = getattr(pool, "deferred_package", None)
+        if deferred_package is not None:
+            self.get_package_from_vcs = _deferred_lookup(
+                deferred_package, "vcs", self.get_package_from_vcs
+            )
+            self.get_package_from_url = _deferred_lookup(
+                deferred_package, "url", self.get_package_from_url
+            )
+
+    @property
+    def package_lookups(self) -> FlightStats:
+        """Number of package lookups, and of fetches from the pool."""
+        return self._package_lookups.stats
+
+    @property
+    def branching(self) -> dict[tuple[str, str], int]:
+        """Number of override branches created per duplicate dependency group."""
+        return self._branching
+
+    @property
+    def python_pruning(self) -> PruningStats:
+        """Candidate versions eliminated by requires-python, before any fetch."""
+        return PruningStats(
+            self._pruned_searches,
+            len(self._pruned),
+            len(self._pruned - self._kept_unsupported),
+        )
+
+    @property
+    def memory_limit(self) -> MemoryLimit | None:
+        return self._memory_limit
+
+    def set_memory_limit(self, limit: MemoryLimit | None) -> None:
+        """Release the oldest cached entries whenever the limit is exceeded."""
+        self._memory_limit = limit
+
+    def release_caches(self, fraction: float = 0.5) -> None:
+        """Forget the oldest completions, package metadata and candidates."""
+        evict_oldest(self._completed, fraction)
+        self._package_lookups.evict(fraction)
+        self._candidates.evict(fraction)
+        # Both only speed up the lookups of the released candidates
+        self._supported.clear()
+        self._search_for.clear()
+        self._dependencies.clear()
+        gc.collect()
+
+    def set_overrides(self, overrides: dict) -> None:
+        # The state of the previous branch is released before the next one
+        if self._memory_limit is not None and self._memory_limit.exceeded(force=True):
+            self.release_caches()
+
+        super().set_overrides(overrides)
+
+    def add_hooks(self, hooks: ProviderHooks) -> None:
+        """Notify the hooks of the phases of the work of the provider."""
+        self._hooks.append(hooks)
+
+    def remove_hooks(self, hooks: ProviderHooks) -> None:
+        self._hooks.remove(hooks)
+
+    def _notify(self, event: str, *args: Any) -> None:
+        for hooks in self._hooks:
+            getattr(hooks, event)(*args)
+
+    def search_for(self, dependency: Dependency) -> list[DependencyPackage]:
+        if (
+            dependency.is_root
+            or dependency.is_vcs()
+            or dependency.is_file()
+            or dependency.is_directory()
+            or dependency.is_url()
+        ):
+            return super().search_for(dependency)
+
+        # Candidates are shared by all the providers using the same pool,
+        # and are only searched for again for a broader constraint.
+        candidates = self._candidates.get(dependency)
+        if candidates is None:
+            if self._hooks:
+                self._notify("pool_fetch_start", dependency.complete_name, None)
+                try:
+                    packages = self._pool.find_packages(dependency)
+                finally:
+                    self._notify("pool_fetch_end", dependency.complete_name, None)
+            else:
+                packages = self._pool.find_packages(dependency)
+            annotate_python_versions(self._pool, packages)
+            candidates = self._candidates.add(dependency, packages)
+
+        packages = self._prune_by_python(
+            candidates.find(dependency.constraint, dependency.allows_prereleases())
+        )
+        self._search_for[dependency] = packages
+
+        return PackageCollection(dependency, packages)
+
+    def search_for_vcs(self, dependency: VCSDependency) -> list[Package]:
+        return self._search_for_deferred(dependency, super().search_for_vcs)
+
+    def search_for_file(self, dependency: FileDependency) -> list[Package]:
+        return self._search_for_deferred(dependency, super().search_for_file)
+
+    def search_for_directory(self, dependency: DirectoryDependency) -> list[Package]:
+        return self._search_for_deferred(dependency, super().search_for_directory)
+
+    def search_for_url(self, dependency: URLDependency) -> list[Package]:
+        return self._search_for_deferred(dependency, super().search_for_url)
+
+    def _search_for_deferred(
+        self, dependency: Dependency, search: Callable[[Any], list[Package]]
+    ) -> list[Package]:
+        if not self._hooks:
+            return search(dependency)
+
+        self._notify("deferred_lookup_start", dependency)
+        try:
+            return search(dependency)
+        finally:
+            self._notify("deferred_lookup_end", dependency)
+
+    def _prune_by_python(self, packages: list[Package]) -> list[Package]:
+        # Releases not supporting any Python version of the root package would
+        # only be fetched to be rejected by the solver. Results of the candidate
+        # index are shared, so they are pruned once per Python constraint.
+        key = (id(packages), self._python_constraint)
+        if key not in self._supported:
+            supported: list[Package] = []
+            unsupported: list[Package] = []
+            for package in packages:
+                if package.python_constraint.allows_any(self._python_constraint):
+                    supported.append(package)
+                else:
+                    unsupported.append(package)
+
+            releases = {(package.name, package.version.text) for package in unsupported}
+            if supported:
+                self._pruned |= releases
+            else:
+                # The solver explains that no release supports the Python versions
+                self._kept_unsupported |= releases
+                supported = packages
+            # The results are kept alongside, so that their id is not reused
+            self._supported[key] = (packages, supported)
+
+        _, supported = self._supported[key]
+        if supported is not packages:
+            self._pruned_searches += 1
+
+        return supported
 
     def _get_dependencies_with_overrides(
         self, dependencies: list[Dependency], package: DependencyPackage
     ) -> list[Dependency]:
-        overrides = self._overrides.get(package, {})
+        overrides = self._overrides.get(package_key(package), {})
         _dependencies = []
         overridden = []
         for dep in dependencies:
@@ -62,7 +248,7 @@ class Provider(BaseProvider):
                 # empty constraint is used in overrides to mark that the package has
                 # already been handled and is not required for the attached markers
                 if not overrides[dep.name].constraint.is_empty():
-                    _dependencies.append(overrides[dep.name])
+                    _dependencies.append(overrides[dep.name].to_dependency())
                 overridden.append(dep.name)
 
                 continue
@@ -71,6 +257,29 @@ class Provider(BaseProvider):
         return _dependencies
 
     def complete_package(self, package: DependencyPackage) -> DependencyPackage:
+        if self._memory_limit is not None and self._memory_limit.exceeded():
+            self.release_caches()
+
+        if not self._hooks:
+            return self._complete_package(package)
+
+        self._notify("complete_package_start", package)
+        try:
+            return self._complete_package(package)
+        finally:
+            self._notify("complete_package_end", package)
+
+    def _complete_package(self, package: DependencyPackage) -> DependencyPackage:
+        # The same packages are completed again by every override branch,
+        # and only the overrides of their own dependencies matter.
+        key = self._get_completion_key(package)
+        env, completed = self._completed.get(key, (None, None))
+        if completed is not None and env is self._env:
+            return DependencyPackage(
+                package.dependency,
+                _with_dependencies(completed, completed.all_requires),
+            )
+
         if package.is_root():
             package = package.clone()
             requires = package.all_requires
@@ -82,7 +291,7 @@ class Provider(BaseProvider):
         }:
             package = DependencyPackage(
                 package.dependency,
-                self._pool.package(
+                self._get_package(
                     package.name,
                     package.version.text,
                     extras=list(package.dependency.extras),
@@ -144,6 +353,108 @@ class Provider(BaseProvider):
 
         dependencies = self._get_dependencies_with_overrides(_dependencies, package)
 
+        dependencies = self._merge_duplicates(dependencies, package)
+
+        # Annotating dependencies as needed
+        #
+        # Dependencies are not modified, annotated variants are shared
+        # by all the packages that require them in the same context.
+        clean_dependencies = []
+        for dep in dependencies:
+            transitive_marker = dep.transitive_marker
+            transitive_python_versions = dep.transitive_python_versions
+
+            if not package.dependency.transitive_marker.without_extras().is_any():
+                marker_intersection = (
+                    package.dependency.transitive_marker.without_extras().intersect(
+                        dep.marker.without_extras()
+                    )
+                )
+                if marker_intersection.is_empty():
+                    # The dependency is not needed, since the markers specified
+                    # for the current package selection are not compatible with
+                    # the markers for the current dependency, so we skip it
+                    continue
+
+                transitive_marker = marker_intersection
+
+            if not package.dependency.python_constraint.is_any():
+                python_constraint_intersection = dep.python_constraint.intersect(
+                    package.dependency.python_constraint
+                )
+                if python_constraint_intersection.is_empty():
+                    # This dependency is not needed under current python constraint.
+                    continue
+                transitive_python_versions = str(python_constraint_intersection)
+
+            clean_dependencies.append(
+                self._dependencies.annotate(
+                    dep, transitive_marker, transitive_python_versions
+                )
+            )
+
+        prefetch = getattr(self._pool, "prefetch", None)
+        if prefetch is not None:
+            # The candidates of the dependencies are searched for next
+            prefetch([dep for dep in clean_dependencies if dep not in self._search_for])
+
+        completed = _with_dependencies(package.package, clean_dependencies)
+        self._completed[key] = (self._env, completed)
+
+        # The completed package is kept unchanged for later calls,
+        # the solver gets its own copy of the dependency groups.
+        return DependencyPackage(
+            package.dependency, _with_dependencies(completed, clean_dependencies)
+        )
+
+    def _get_package(
+        self, name: str, version: str, extras: list[str], repository: str | None
+    ) -> Package:
+        fetched = self._package_lookups.get(
+            (name, version, tuple(extras), repository),
+            lambda: self._fetch_package(name, version, extras, repository),
+        )
+
+        # Duplicate dependencies are modified when they are merged,
+        # so the fetched package only hands out copies of its dependencies.
+        return _with_dependencies(
+            fetched, [copy_dependency(dep) for dep in fetched.all_requires]
+        )
+
+    def _fetch_package(
+        self, name: str, version: str, extras: list[str], repository: str | None
+    ) -> Package:
+        if not self._hooks:
+            return self._pool.package(
+                name, version, extras=extras, repository=repository
+            )
+
+        self._notify("pool_fetch_start", name, version)
+        try:
+            return self._pool.package(
+                name, version, extras=extras, repository=repository
+            )
+        finally:
+            self._notify("pool_fetch_end", name, version)
+
+    def _get_completion_key(self, package: DependencyPackage) -> tuple:
+        key = package_key(package)
+        dependency = package.dependency
+        return (
+            key,
+            frozenset(self._overrides.get(key, {}).items()),
+            frozenset(dependency.extras),
+            dependency.source_name,
+            dependency.transitive_marker,
+            dependency.python_constraint,
+            id(self._env),
+            self._python_constraint,
+            self._load_deferred,
+        )
+
+    def _merge_duplicates(
+        self, dependencies: list[Dependency], package: DependencyPackage
+    ) -> list[Dependency]:
         # Searching for duplicate dependencies
         #
         # If the duplicate dependencies have the same constraint,
@@ -162,74 +473,39 @@ class Provider(BaseProvider):
         # An example of this is:
         #   - pypiwin32 (220); sys_platform == "win32" and python_version >= "3.6"
         #   - pypiwin32 (219); sys_platform == "win32" and python_version < "3.6"
-        duplicates: dict[str, list[Dependency]] = {}
-        for dep in dependencies:
-            if dep.complete_name not in duplicates:
-                duplicates[dep.complete_name] = []
-
-            duplicates[dep.complete_name].append(dep)
+        #
+        index = _index_duplicates(dependencies)
 
         dependencies = []
-        for dep_name, deps in duplicates.items():
-            if len(deps) == 1:
-                dependencies.append(deps[0])
-                continue
+        for dep_name, by_constraint in index.items():
+            if len(by_constraint) == 1:
+                (deps,) = by_constraint.values()
+                if len(deps) == 1:
+                    dependencies.append(deps[0])
+                    continue
 
             self.debug(f"<debug>Duplicate dependencies for {dep_name}</debug>")
 
-            # Regrouping by constraint
-            by_constraint: dict[str, list[Dependency]] = {}
-            for dep in deps:
-                if dep.constraint not in by_constraint:
-                    by_constraint[dep.constraint] = []
-
-                by_constraint[dep.constraint].append(dep)
-
             # We merge by constraint
-            for constraint, _deps in by_constraint.items():
-                new_markers = []
-                for dep in _deps:
-                    marker = dep.marker.without_extras()
-                    if marker.is_any():
-                        # No marker or only extras
-                        continue
-
-                    new_markers.append(marker)
-
-                if not new_markers:
-                    continue
+            _deps = []
+            for deps in by_constraint.values():
+                dep = deps[0]
+                dep.marker = _merged_marker(deps)
 
-                dep = _deps[0]
-                dep.marker = dep.marker.union(MarkerUnion(*new_markers))
-                by_constraint[constraint] = [dep]
+                _deps.append(dep)
 
-                continue
-
-            if len(by_constraint) == 1:
-                self.debug(f"<debug>Merging requirements for {deps[0]!s}</debug>")
-                dependencies.append(list(by_constraint.values())[0][0])
+            if len(_deps) == 1:
+                self.debug(f"<debug>Merging requirements for {_deps[0]!s}</debug>")
+                dependencies.append(_deps[0])
                 continue
 
             # We leave dependencies as-is if they have the same
             # python/platform constraints.
             # That way the resolver will pickup the conflict
             # and display a proper error.
-            _deps = [value[0] for value in by_constraint.values()]
-            seen = set()
-            for _dep in _deps:
-                pep_508_dep = _dep.to_pep_508(False)
-                if ";" not in pep_508_dep:
-                    _requirements = ""
-                else:
-                    _requirements = pep_508_dep.split(";")[1].strip()
-
-                if _requirements not in seen:
-                    seen.add(_requirements)
-
+            seen = {_requirement_marker(_dep) for _dep in _deps}
             if len(_deps) != len(seen):
-                for _dep in _deps:
-                    dependencies.append(_dep)
-
+                dependencies += _deps
                 continue
 
             # At this point, we raise an exception that will
@@ -243,7 +519,6 @@ class Provider(BaseProvider):
             # with the following overrides:
             #   - {<Package foo (1.2.3): {"bar": <Dependency bar (>=2.0)>}
             #   - {<Package foo (1.2.3): {"bar": <Dependency bar (<2.0)>}
-            _deps = [_dep[0] for _dep in by_constraint.values()]
 
             def fmt_warning(d: Dependency) -> str:
                 marker = d.marker if not d.marker.is_any() else "*"
@@ -313,50 +588,100 @@ class Provider(BaseProvider):
                     overrides_marker_intersection = (
                         overrides_marker_intersection.intersect(_dep.marker)
                     )
+            key = package_key(package)
             for _dep in _deps:
                 if not overrides_marker_intersection.intersect(_dep.marker).is_empty():
                     current_overrides = self._overrides.copy()
-                    package_overrides = current_overrides.get(package, {}).copy()
-                    package_overrides.update({_dep.name: _dep})
-                    current_overrides.update({package: package_overrides})
+                    package_overrides = current_overrides.get(key, {}).copy()
+                    package_overrides.update({_dep.name: override_record(_dep)})
+                    current_overrides.update({key: package_overrides})
                     overrides.append(current_overrides)
+                elif self._hooks:
+                    self._notify("override_pruned", package, _dep)
 
             if overrides:
+                group = (str(package), dep_name)
+                self._branching[group] = self._branching.get(group, 0) + len(overrides)
+                if self._hooks:
+                    self._notify("override_needed", package, overrides)
                 raise OverrideNeeded(*overrides)
 
-        # Modifying dependencies as needed
-        clean_dependencies = []
-        for dep in dependencies:
-            if not package.dependency.transitive_marker.without_extras().is_any():
-                marker_intersection = (
-                    package.dependency.transitive_marker.without_extras().intersect(
-                        dep.marker.without_extras()
-                    )
-                )
-                if marker_intersection.is_empty():
-                    # The dependency is not needed, since the markers specified
-                    # for the current package selection are not compatible with
-                    # the markers for the current dependency, so we skip it
-                    continue
+        return dependencies
 
-                dep.transitive_marker = marker_intersection
 
-            if not package.dependency.python_constraint.is_any():
-                python_constraint_intersection = dep.python_constraint.intersect(
-                    package.dependency.python_constraint
-                )
-                if python_constraint_intersection.is_empty():
-                    # This dependency is not needed under current python constraint.
-                    continue
-                dep.transitive_python_versions = str(python_constraint_intersection)
+def _with_dependencies(package: Package, dependencies: Iterable[Dependency]) -> Package:
+    """Shallow copy of a package with new dependency groups.
 
-            clean_dependencies.append(dep)
+    Unlike ``Package.with_dependency_groups()``, the metadata and the dependencies
+    are shared with the original package instead of being deep copied.
+    """
+    copied = copy.copy(package)
+    copied._dependency_groups = {}
+    for dependency in dependencies:
+        copied.add_dependency(dependency)
 
-        package = DependencyPackage(
-            package.dependency, package.with_dependency_groups([], only=True)
+    return copied
+
+
+def _deferred_lookup(
+    deferred_package: Callable[[str, Callable[[], Package]], Package],
+    kind: str,
+    get_package: Callable[..., Package],
+) -> Callable[..., Package]:
+    """Lookup of a direct origin package through ``pool.deferred_package()``."""
+
+    @functools.wraps(get_package)
+    def lookup(*args: Any, **kwargs: Any) -> Package:
+        key = " ".join(
+            [
+                kind,
+                *(str(arg) for arg in args),
+                *(f"{k}={v}" for k, v in sorted(kwargs.items()) if v is not None),
+            ]
+        )
+        return deferred_package(key, functools.partial(get_package, *args, **kwargs))
+
+    return lookup
+
+
+def _index_duplicates(
+    dependencies: list[Dependency],
+) -> dict[str, dict[VersionTypes, list[Dependency]]]:
+    """Dependencies indexed by complete name and constraint, in a single pass."""
+    index: dict[str, dict[VersionTypes, list[Dependency]]] = {}
+    for dep in dependencies:
+        index.setdefault(dep.complete_name, {}).setdefault(dep.constraint, []).append(
+            dep
         )
 
-        for dep in clean_dependencies:
-            package.add_dependency(dep)
+    return index
+
+
+def _merged_marker(dependencies: list[Dependency]) -> BaseMarker:
+    """Marker of the first of duplicate dependencies merged with the others'."""
+    # Markers are compared structurally, so identical markers
+    # are only added once to the union.
+    new_markers = {
+        marker: None
+        for marker in (d.marker.without_extras() for d in dependencies)
+        if not marker.is_any()
+    }
+    if not new_markers:
+        return dependencies[0].marker
+
+    return dependencies[0].marker.union(MarkerUnion(*new_markers))
+
+
+def _requirement_marker(dependency: Dependency) -> BaseMarker | VersionTypes | None:
+    """Structural equivalent of the marker part of ``to_pep_508(False)``."""
+    if not dependency.marker.is_any():
+        marker = dependency.marker.without_extras()
+        if marker.is_empty() or marker.is_any():
+            return None
+
+        return marker
+
+    if dependency.python_versions != "*":
+        return dependency.python_constraint
 
-        return package
+    return None
@@ -0,0 +1,122 @@
+"""Python versions of candidate releases, read from the listings of the indexes.
+
+The provider only learned the Python versions required by a release once its
+metadata had been fetched, which for some repositories means downloading its
+distributions. Releases not supporting any of the Python versions of the root
+package were fetched only to be rejected.
+
+The PyPI JSON API and the simple pages of PEP 503 indexes list the
+``requires-python`` of every file, next to the versions searched for by the
+solver. The listed packages are annotated with it, so that the provider can
+eliminate these releases before fetching anything.
+
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from weakref import WeakKeyDictionary
+
+from poetry.core.semver.helpers import parse_constraint
+
+from poetry.repositories.legacy_repository import LegacyRepository
+from poetry.repositories.pypi_repository import PyPiRepository
+
+
+if TYPE_CHECKING:
+    from poetry.core.packages.package import Package
+
+    from poetry.repositories import Pool
+    from poetry.repositories.repository import Repository
+
+
+# Requires-python of the listed versions, per repository and package name
+_listings: WeakKeyDictionary[
+    Repository, dict[str, dict[str, str | None]]
+] = WeakKeyDictionary()
+
+
+@dataclass
+class PruningStats:
+    """Candidate versions eliminated by their requires-python."""
+
+    searches: int = 0
+    versions: int = 0
+    fetches_avoided: int = 0
+
+    def report(self) -> str:
+        return (
+            f"{self.versions} candidate versions pruned by requires-python"
+            f" in {self.searches} searches, {self.fetches_avoided} fetches avoided"
+        )
+
+
+def annotate_python_versions(pool: Pool, packages: list[Package]) -> None:
+    """Set the Python versions of listed packages from their index listing.
+
+    Only packages listed by PyPI and legacy repositories are annotated, and
+    only when all the files of their release agree on a valid requires-python.
+    Packages of other repositories already carry their Python versions.
+
+    """
+    for package in packages:
+        if package.python_versions != "*":
+            continue
+
+        repository = _listing_repository(pool, package)
+        if repository is None:
+            continue
+
+        listing = _listings.setdefault(repository, {})
+        if package.name not in listing:
+            listing[package.name] = _read_listing(repository, package.name)
+
+        python_versions = listing[package.name].get(package.version.text)
+        if python_versions is not None:
+            package.python_versions = python_versions
+
+
+def _listing_repository(pool: Pool, package: Package) -> Repository | None:
+    for repository in pool.repositories:
+        if isinstance(repository, LegacyRepository):
+            if package.source_reference == repository.name:
+                return repository
+        elif isinstance(repository, PyPiRepository):
+            if package.source_type is None:
+                return repository
+
+    return None
+
+
+def _read_listing(repository: Repository, name: str) -> dict[str, str | None]:
+    files: dict[str, set[str | None]] = {}
+    if isinstance(repository, LegacyRepository):
+        page = repository._get_page(f"/{name.replace('.', '-')}/")
+        for link in page.links if page is not None else []:
+            version = page.link_version(link)
+            if version is not None:
+                files.setdefault(version.text, set()).add(link.requires_python)
+    else:
+        info = repository.get_package_info(name)
+        for version, release in info["releases"].items():
+            files[version] = {file.get("requires_python") for file in release}
+
+    return {version: _release_python_versions(files[version]) for version in files}
+
+
+def _release_python_versions(requires_python: set[str | None]) -> str | None:
+    # A release is only eliminated when none of its files is installable
+    if len(requires_python) != 1:
+        return None
+
+    (python_versions,) = requires_python
+    if not python_versions:
+        return None
+
+    try:
+        parse_constraint(python_versions)
+    except ValueError:
+        return None
+
+    return python_versions
@@ -0,0 +1,98 @@
+"""Deduplication of identical repository lookups."""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, TypeVar
+
+from .memory import evict_oldest
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass
+class FlightStats:
+    """Number of lookups requested, and of fetches actually made."""
+
+    requests: int = 0
+    fetches: int = 0
+    coalesced: int = 0
+
+    @property
+    def saved(self) -> int:
+        """Requests served by another fetch, in flight or completed."""
+        return self.requests - self.fetches
+
+    def report(self) -> str:
+        return (
+            f"{self.requests} package lookups, {self.fetches} fetched,"
+            f" {self.saved} saved ({self.coalesced} joined a fetch in flight)"
+        )
+
+
+class SingleFlight(Generic[K, V]):
+    """Run at most one fetch per key, and remember its result.
+
+    Callers requesting a key whose fetch is in flight wait for it instead of
+    fetching again. Failed fetches are not remembered, and their exception is
+    raised in every waiting caller.
+
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._results: dict[K, V] = {}
+        self._in_flight: dict[K, Future] = {}
+        self._stats = FlightStats()
+
+    @property
+    def stats(self) -> FlightStats:
+        return self._stats
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, key: K, fetch: Callable[[], V]) -> V:
+        with self._lock:
+            self._stats.requests += 1
+            if key in self._results:
+                return self._results[key]
+
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+                self._stats.fetches += 1
+            else:
+                self._stats.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._results[key] = result
+            del self._in_flight[key]
+        future.set_result(result)
+
+        return result
+
+    def evict(self, fraction: float) -> int:
+        """Forget the oldest results, return the number forgotten."""
+        with self._lock:
+            return evict_oldest(self._results, fraction)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
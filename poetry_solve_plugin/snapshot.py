@@ -0,0 +1,581 @@
+"""Local snapshot of the repository metadata consulted by a solve.
+
+A solve can be recorded with a ``RecordingPool``, which stores the answers of the
+wrapped pool in a ``MetadataSnapshot``:
+
+- the version listings returned for each candidate search, with the Python
+  versions listed by the index,
+- the metadata of every package completed by the provider,
+- the packages built from vcs and url dependencies.
+
+``SnapshotPool`` answers the same lookups from the snapshot, so the solve can be
+repeated without any network access. Path dependencies are read from the local
+filesystem in both cases, and are not recorded.
+
+Snapshots are written either as a JSON document, or as a binary index that is
+memory-mapped by ``SnapshotIndex``. Reading the JSON document parses it in full,
+and then every requirement of a package as a PEP 508 string. The index only
+decodes the records that are looked up:
+
+- records are found by bisecting a table of key hashes, in the mapped file,
+- each record is a compact JSON document, readable by any Python version,
+- the releases of a listing are sorted by version,
+- requirements are stored split into name, constraint, extras and marker, and
+  each distinct constraint and marker is parsed once.
+
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterable, Sequence, TYPE_CHECKING
+
+from poetry.core.packages.dependency import Dependency
+from poetry.core.packages.package import Package
+from poetry.core.semver.helpers import parse_constraint
+from poetry.core.semver.version import Version
+from poetry.core.version.markers import parse_marker
+
+from poetry.repositories import Pool
+from poetry.repositories import Repository
+from poetry.utils.helpers import canonicalize_name
+
+from .exceptions import SnapshotError
+from .requires_python import annotate_python_versions
+
+
+if TYPE_CHECKING:
+    from poetry.core.semver.helpers import VersionTypes
+    from poetry.core.version.markers import BaseMarker
+
+
+_INDEX_PREFIX = b"PSIDX\x00\x00"
+# Version of the index format, the records of version 1 were marshalled
+_INDEX_VERSION = 2
+_INDEX_MAGIC = _INDEX_PREFIX + bytes([_INDEX_VERSION])
+# Magic, number of records, offset of the record table
+_INDEX_HEADER = struct.Struct("<8sIQ")
+# Key hash, record offset, record length
+_INDEX_ENTRY = struct.Struct("<QQI")
+
+
+class MetadataSnapshot:
+    """Version listings and package metadata, keyed by the lookups that used them.
+
+    Listings are keyed by package name, then by the exact candidate search that
+    returned them. A search that was not recorded is answered from all the
+    versions recorded for the name, filtered like an in-memory repository does.
+
+    """
+
+    _VERSION = 1
+
+    def __init__(self) -> None:
+        self._listings: dict[str, dict[str, list[list[str | None]]]] = {}
+        self._packages: dict[str, dict[str, Any]] = {}
+        self._deferred: dict[str, dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> MetadataSnapshot:
+        try:
+            with path.open(encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Unable to read the metadata snapshot {path}: {e}")
+
+        if not isinstance(data, dict) or data.get("version") != cls._VERSION:
+            raise SnapshotError(f"Unsupported metadata snapshot format in {path}.")
+
+        snapshot = cls()
+        snapshot._listings = data["listings"]
+        snapshot._packages = data["packages"]
+        snapshot._deferred = data["deferred"]
+
+        return snapshot
+
+    def save(self, path: Path) -> None:
+        """Write the snapshot to a file.
+
+        The snapshot is written as JSON if the file name ends with ``.json``, and
+        as a binary index for ``SnapshotIndex`` otherwise.
+
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with tmp_path.open("wb") as f:
+            if path.suffix == ".json":
+                self._write_json(f)
+            else:
+                self._write_index(f)
+        os.replace(tmp_path, path)
+
+    def _write_json(self, f: BinaryIO) -> None:
+        data = {
+            "version": self._VERSION,
+            "listings": self._listings,
+            "packages": self._packages,
+            "deferred": self._deferred,
+        }
+        f.write(json.dumps(data, separators=(",", ":"), sort_keys=True).encode())
+
+    def _write_index(self, f: BinaryIO) -> None:
+        records = [
+            (f"L {name}", _index_listing(listings))
+            for name, listings in self._listings.items()
+        ]
+        records += [
+            (f"P {key}", _index_package(data)) for key, data in self._packages.items()
+        ]
+        records += [
+            (f"D {key}", _index_package(data)) for key, data in self._deferred.items()
+        ]
+
+        f.write(b"\x00" * _INDEX_HEADER.size)
+        entries = []
+        offset = _INDEX_HEADER.size
+        for key, value in records:
+            record = json.dumps([key, value], separators=(",", ":")).encode()
+            entries.append((_key_hash(key), offset, len(record)))
+            f.write(record)
+            offset += len(record)
+
+        for entry in sorted(entries):
+            f.write(_INDEX_ENTRY.pack(*entry))
+
+        f.seek(0)
+        f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, len(entries), offset))
+
+    def __len__(self) -> int:
+        return len(self._packages) + len(self._deferred)
+
+    def add_listing(self, dependency: Dependency, packages: list[Package]) -> None:
+        self._listings.setdefault(dependency.name, {})[_listing_key(dependency)] = [
+            _dump_release(package) for package in packages
+        ]
+
+    def find_packages(self, dependency: Dependency) -> list[Package]:
+        listings = self._listings.get(dependency.name)
+        if listings is None:
+            raise SnapshotError(
+                f"No versions of {dependency.name} in the metadata snapshot."
+            )
+
+        releases = listings.get(_listing_key(dependency))
+        if releases is not None:
+            return [_load_release(release) for release in releases]
+
+        unique = {
+            tuple(release): release for group in listings.values() for release in group
+        }
+        return _filter_releases(unique.values(), dependency)
+
+    def add_package(
+        self, name: str, version: str, repository: str | None, package: Package
+    ) -> None:
+        self._packages[_package_key(name, version, repository)] = _dump_package(package)
+
+    def package(
+        self, name: str, version: str, repository: str | None = None
+    ) -> Package:
+        data = self._packages.get(_package_key(name, version, repository))
+        if data is None:
+            raise SnapshotError(
+                f"No metadata for {name} ({version}) in the metadata snapshot."
+            )
+
+        return _load_package(data, Dependency.create_from_pep_508)
+
+    def add_deferred(self, key: str, package: Package) -> None:
+        self._deferred[key] = _dump_package(package)
+
+    def deferred(self, key: str) -> Package:
+        data = self._deferred.get(key)
+        if data is None:
+            raise SnapshotError(f"No package for {key} in the metadata snapshot.")
+
+        return _load_package(data, Dependency.create_from_pep_508)
+
+
+class SnapshotIndex:
+    """Metadata snapshot read from a binary index, see ``MetadataSnapshot.save()``.
+
+    The file is memory-mapped, and records are only decoded when looked up.
+
+    """
+
+    def __init__(self, path: Path) -> None:
+        try:
+            with path.open("rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Unable to read the metadata snapshot {path}: {e}")
+
+        if (
+            len(self._map) < _INDEX_HEADER.size
+            or self._map[: len(_INDEX_PREFIX)] != _INDEX_PREFIX
+        ):
+            self._map.close()
+            raise SnapshotError(f"Unsupported metadata snapshot format in {path}.")
+
+        version = self._map[len(_INDEX_PREFIX)]
+        if version != _INDEX_VERSION:
+            self._map.close()
+            raise SnapshotError(
+                f"The metadata snapshot {path} was written in index format"
+                f" {version}, while format {_INDEX_VERSION} is supported."
+                " Record the snapshot again."
+            )
+
+        _, self._count, self._table = _INDEX_HEADER.unpack_from(self._map)
+        self._hashes = _HashColumn(self._map, self._table, self._count)
+        self._constraints: dict[str, VersionTypes] = {}
+        self._markers: dict[str, BaseMarker] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        self._map.close()
+
+    def find_packages(self, dependency: Dependency) -> list[Package]:
+        record = self._get(f"L {dependency.name}")
+        if record is None:
+            raise SnapshotError(
+                f"No versions of {dependency.name} in the metadata snapshot."
+            )
+
+        releases, queries = record
+        indices = queries.get(_listing_key(dependency))
+        if indices is not None:
+            return [_load_release(releases[i]) for i in indices]
+
+        return _filter_releases(releases, dependency)
+
+    def package(
+        self, name: str, version: str, repository: str | None = None
+    ) -> Package:
+        data = self._get(f"P {_package_key(name, version, repository)}")
+        if data is None:
+            raise SnapshotError(
+                f"No metadata for {name} ({version}) in the metadata snapshot."
+            )
+
+        return _load_package(data, self._create_dependency)
+
+    def deferred(self, key: str) -> Package:
+        data = self._get(f"D {key}")
+        if data is None:
+            raise SnapshotError(f"No package for {key} in the metadata snapshot.")
+
+        return _load_package(data, self._create_dependency)
+
+    def _get(self, key: str) -> Any:
+        key_hash = _key_hash(key)
+        i = bisect.bisect_left(self._hashes, key_hash)
+        while i < self._count and self._hashes[i] == key_hash:
+            _, offset, length = _INDEX_ENTRY.unpack_from(
+                self._map, self._table + i * _INDEX_ENTRY.size
+            )
+            record_key, value = json.loads(self._map[offset : offset + length])
+            if record_key == key:
+                return value
+            i += 1
+
+        return None
+
+    def _create_dependency(self, requirement: tuple) -> Dependency:
+        if len(requirement) == 1:
+            # Direct origin requirement, kept as a PEP 508 string
+            return Dependency.create_from_pep_508(requirement[0])
+
+        name, constraint, extras, marker = requirement
+        if constraint not in self._constraints:
+            self._constraints[constraint] = parse_constraint(constraint)
+        dependency = Dependency(name, self._constraints[constraint], extras=extras)
+
+        if marker:
+            if marker not in self._markers:
+                self._markers[marker] = parse_marker(marker)
+            dependency.marker = self._markers[marker]
+
+        return dependency
+
+
+class _HashColumn:
+    """Key hashes of the record table, as a sequence that can be bisected."""
+
+    def __init__(self, buffer: mmap.mmap, offset: int, count: int) -> None:
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> int:
+        return _INDEX_ENTRY.unpack_from(
+            self._buffer, self._offset + i * _INDEX_ENTRY.size
+        )[0]
+
+
+def load_snapshot(path: Path) -> MetadataSnapshot | SnapshotIndex:
+    """Metadata snapshot written by ``MetadataSnapshot.save()``, in either format."""
+    try:
+        with path.open("rb") as f:
+            magic = f.read(len(_INDEX_MAGIC))
+    except OSError as e:
+        raise SnapshotError(f"Unable to read the metadata snapshot {path}: {e}")
+
+    if magic.startswith(_INDEX_PREFIX):
+        return SnapshotIndex(path)
+
+    return MetadataSnapshot.load(path)
+
+
+class RecordingPool(Pool):
+    """Pool recording the answers of another pool into a metadata snapshot."""
+
+    def __init__(self, pool: Pool, snapshot: MetadataSnapshot) -> None:
+        super().__init__(ignore_repository_names=pool._ignore_repository_names)
+
+        self._repositories = list(pool._repositories)
+        self._lookup = dict(pool._lookup)
+        self._default = pool._default
+        self._has_primary_repositories = pool._has_primary_repositories
+        self._secondary_start_idx = pool._secondary_start_idx
+
+        self._pool = pool
+        self._snapshot = snapshot
+
+        prefetch = getattr(pool, "prefetch", None)
+        if prefetch is not None:
+            self.prefetch = prefetch
+
+    @property
+    def snapshot(self) -> MetadataSnapshot:
+        return self._snapshot
+
+    def package(
+        self, name: str, version: str, extras: list[str] = None, repository: str = None
+    ) -> Package:
+        package = self._pool.package(name, version, extras, repository)
+        self._snapshot.add_package(name, version, repository, package)
+
+        return package
+
+    def find_packages(self, dependency: Dependency) -> list[Package]:
+        packages = self._pool.find_packages(dependency)
+        # The Python versions listed by the index are recorded with the versions
+        annotate_python_versions(self, packages)
+        self._snapshot.add_listing(dependency, packages)
+
+        return packages
+
+    def deferred_package(self, key: str, resolve: Callable[[], Package]) -> Package:
+        package = resolve()
+        self._snapshot.add_deferred(key, package)
+
+        return package
+
+
+class SnapshotPool(Pool):
+    """Pool answering every lookup from a metadata snapshot, without network I/O.
+
+    Lookups that were not recorded raise ``SnapshotError``.
+
+    """
+
+    def __init__(self, snapshot: MetadataSnapshot | SnapshotIndex) -> None:
+        super().__init__(ignore_repository_names=True)
+
+        self._snapshot = snapshot
+
+    @property
+    def snapshot(self) -> MetadataSnapshot | SnapshotIndex:
+        return self._snapshot
+
+    def package(
+        self, name: str, version: str, extras: list[str] = None, repository: str = None
+    ) -> Package:
+        return self._snapshot.package(name, version, repository)
+
+    def find_packages(self, dependency: Dependency) -> list[Package]:
+        return self._snapshot.find_packages(dependency)
+
+    def deferred_package(self, key: str, resolve: Callable[[], Package]) -> Package:
+        return self._snapshot.deferred(key)
+
+
+def _listing_key(dependency: Dependency) -> str:
+    return (
+        f"{dependency.constraint}|{int(dependency.allows_prereleases())}"
+        f"|{dependency.source_name or ''}"
+    )
+
+
+def _package_key(name: str, version: str, repository: str | None) -> str:
+    key = f"{canonicalize_name(name)}=={version}"
+    if repository is not None:
+        key += f"@{repository.lower()}"
+
+    return key
+
+
+def _key_hash(key: str) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(), "little"
+    )
+
+
+def _filter_releases(
+    releases: Iterable[Sequence], dependency: Dependency
+) -> list[Package]:
+    # Same filtering as the repositories, among all the recorded versions
+    packages = [_load_release(release) for release in releases]
+    if dependency.source_name is not None:
+        packages = [
+            package
+            for package in packages
+            if package.source_reference == dependency.source_name
+        ]
+
+    return Repository(packages).find_packages(dependency)
+
+
+def _dump_release(package: Package) -> list[str | None]:
+    release = [
+        package.pretty_name,
+        package.version.text,
+        package.source_type,
+        package.source_url,
+        package.source_reference,
+        package.source_resolved_reference,
+        None if package.python_versions == "*" else package.python_versions,
+    ]
+    while release[-1] is None:
+        release.pop()
+
+    return release
+
+
+def _load_release(release: Sequence[str | None]) -> Package:
+    name, version, *source = release
+    source += [None] * (5 - len(source))
+    (
+        source_type,
+        source_url,
+        source_reference,
+        source_resolved_reference,
+        python_versions,
+    ) = source
+
+    package = Package(
+        name,
+        version,
+        source_type=source_type,
+        source_url=source_url,
+        source_reference=source_reference,
+        source_resolved_reference=source_resolved_reference,
+    )
+    if python_versions is not None:
+        package.python_versions = python_versions
+
+    return package
+
+
+def _dump_package(package: Package) -> dict[str, Any]:
+    data: dict[str, Any] = {
+        "release": _dump_release(package),
+        "requires": [dependency.to_pep_508() for dependency in package.requires],
+    }
+    if package.description:
+        data["description"] = package.description
+    if package.files:
+        data["files"] = package.files
+    if package.extras:
+        data["extras"] = {
+            extra: [dependency.to_pep_508() for dependency in dependencies]
+            for extra, dependencies in package.extras.items()
+        }
+
+    return data
+
+
+def _load_package(
+    data: dict[str, Any], create_dependency: Callable[[Any], Dependency]
+) -> Package:
+    package = _load_release(data["release"])
+    package.description = data.get("description", "")
+    package.files = list(data.get("files", []))
+
+    requires: dict[Any, Dependency] = {}
+    for requirement in data["requires"]:
+        dependency = requires[_hashable(requirement)] = create_dependency(requirement)
+        package.add_dependency(dependency)
+
+    # Extras share the dependency objects of the requirements, like the
+    # packages built by the repositories.
+    for extra, requirements in data.get("extras", {}).items():
+        package.extras[extra] = [
+            requires.get(_hashable(requirement)) or create_dependency(requirement)
+            for requirement in requirements
+        ]
+
+    return package
+
+
+def _hashable(requirement: Any) -> Any:
+    # Split requirements, and their extras, are decoded from the index as lists
+    if isinstance(requirement, list):
+        return tuple(_hashable(part) for part in requirement)
+
+    return requirement
+
+
+def _index_listing(
+    listings: dict[str, list[list[str | None]]]
+) -> tuple[tuple[tuple[str | None, ...], ...], dict[str, tuple[int, ...]]]:
+    releases = sorted(
+        {tuple(release) for group in listings.values() for release in group},
+        key=lambda release: Version.parse(release[1]),
+    )
+    positions = {release: i for i, release in enumerate(releases)}
+    queries = {
+        query: tuple(positions[tuple(release)] for release in group)
+        for query, group in listings.items()
+    }
+
+    return tuple(releases), queries
+
+
+def _index_package(data: dict[str, Any]) -> dict[str, Any]:
+    indexed = dict(data)
+    indexed["release"] = tuple(data["release"])
+    indexed["requires"] = tuple(_split_requirement(r) for r in data["requires"])
+    if "extras" in data:
+        indexed["extras"] = {
+            extra: tuple(_split_requirement(r) for r in requirements)
+            for extra, requirements in data["extras"].items()
+        }
+
+    return indexed
+
+
+def _split_requirement(requirement: str) -> tuple:
+    dependency = Dependency.create_from_pep_508(requirement)
+    if type(dependency) is not Dependency:
+        return (requirement,)
+
+    return (
+        dependency.pretty_name,
+        dependency.pretty_constraint,
+        tuple(sorted(dependency.extras)),
+        "" if dependency.marker.is_any() else str(dependency.marker),
+    )
@@ -0,0 +1,95 @@
+"""Results of complete solves, shared by the projects solving the same inputs.
+
+The lock freshness check only tells whether the lock file of a project matches its
+``pyproject.toml``, so every branch or worktree of a project solved its
+dependencies again, even when another one had just solved the same declarations
+against the same repositories.
+
+``SolveCache`` stores the packages resolved by each solve in Poetry's cache
+directory, in a file named after the hash of the inputs of the solve, and a later
+solve of identical inputs writes the lock file from them instead of solving.
+
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import time
+from typing import TYPE_CHECKING
+
+from .checkpoint import _dump_package, _restore_package
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from poetry.core.packages.package import Package
+
+
+class SolveCache:
+    """Resolved packages of complete solves, addressed by the hash of their inputs.
+
+    Parameters
+    ----------
+    directory
+        Directory the results are written to.
+
+    """
+
+    _VERSION = 1
+
+    def __init__(self, directory: Path) -> None:
+        self._directory = directory
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def get(
+        self, fingerprint: str, max_age: float | None = None
+    ) -> list[Package] | None:
+        """Packages resolved for the inputs of the fingerprint.
+
+        Results older than ``max_age`` seconds are removed instead, as releases
+        may have been published since.
+
+        """
+        path = self._path(fingerprint)
+        if not path.exists():
+            return None
+
+        try:
+            with path.open("rb") as f:
+                data = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+        if data.get("version") != self._VERSION:
+            return None
+
+        if max_age is not None and time.time() - data["created"] > max_age:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+        return [_restore_package(package) for package in data["packages"]]
+
+    def put(self, fingerprint: str, packages: list[Package]) -> None:
+        path = self._path(fingerprint)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": self._VERSION,
+            "created": time.time(),
+            "packages": [_dump_package(package) for package in packages],
+        }
+        # Written atomically, as several projects may share the cache
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("wb") as f:
+            pickle.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _path(self, fingerprint: str) -> Path:
+        return self._directory / f"{fingerprint}.pickle"
@@ -1,9 +1,18 @@
+from pathlib import Path
+
+from cleo.helpers import option
+from cleo.io.null_io import NullIO
 from poetry.console.application import Application
 from poetry.console.commands.lock import LockCommand
 from poetry.plugins.application_plugin import ApplicationPlugin
 
+from .analyzer import BranchAnalyzer
+from .branch_tree import BranchTree
+from .exceptions import SnapshotError, SolveBudgetExceeded
 from .installer import Installer
+from .memory import MemoryProfile, parse_size
 from .provider import Provider  # noqa: F401
+from .trace import SolveTrace
 
 
 class SolveCommand(LockCommand):
@@ -11,6 +20,87 @@ class SolveCommand(LockCommand):
     name = "solve"
     description = "Solve and lock the project dependencies."
 
+    options = LockCommand.options + [
+        option(
+            "resume",
+            None,
+            "Resume dependency resolution from the last checkpoint of an interrupted"
+            " run.",
+        ),
+        option(
+            "timeout",
+            None,
+            "Stop exploring override branches after the given number of seconds.",
+            flag=False,
+        ),
+        option(
+            "max-branches",
+            None,
+            "Stop exploring override branches after the given number of branches.",
+            flag=False,
+        ),
+        option(
+            "max-memory",
+            None,
+            "Release the caches of the resolution whenever its memory exceeds the"
+            " given size, e.g. 3G or 512M.",
+            flag=False,
+        ),
+        option(
+            "io-workers",
+            None,
+            "Number of concurrent repository requests during the resolution.",
+            flag=False,
+            default="1",
+        ),
+        option(
+            "export-snapshot",
+            None,
+            "Write the repository metadata consulted by the resolution to the given"
+            " file.",
+            flag=False,
+        ),
+        option(
+            "offline-snapshot",
+            None,
+            "Resolve from the metadata snapshot in the given file, without"
+            " accessing the repositories.",
+            flag=False,
+        ),
+        option(
+            "trace",
+            None,
+            "Write the timeline of the resolution to the given file, in the Chrome"
+            " trace event format.",
+            flag=False,
+        ),
+        option(
+            "branch-report",
+            None,
+            "Write the tree of override branches to the given file, as Graphviz DOT"
+            " if it ends with .dot or .gv, and as JSON otherwise.",
+            flag=False,
+            multiple=True,
+        ),
+        option(
+            "memory-profile",
+            None,
+            "Report the memory used at the end of each phase of the resolution, and"
+            " the allocation sites holding the most memory.",
+        ),
+        option(
+            "solve-cache",
+            None,
+            "Reuse the resolution of identical dependencies and repositories from"
+            " Poetry's cache, and store it there.",
+        ),
+        option(
+            "analyze",
+            None,
+            "Estimate the number of override branches without solving.",
+        ),
+    ]
+
     help = """
 The <info>solve</info> command reads the <comment>pyproject.toml</> file from the
 current directory, processes it, and locks the dependencies in the\
@@ -18,9 +108,77 @@ current directory, processes it, and locks the dependencies in the\
 file.
 
 <info>poetry solve</info>
+
+Completed branches of the resolution are checkpointed, so an interrupted run can
+be continued with <comment>--resume</comment>. The exploration of override branches
+can be bounded with <comment>--timeout</comment> and <comment>--max-branches</comment>.
+On machines with little memory, <comment>--max-memory SIZE</comment> trades speed for
+a lower memory use, by releasing the oldest cached completions, package metadata
+and candidates whenever the memory of the process exceeds <comment>SIZE</comment>.
+
+Repository metadata can be fetched concurrently with <comment>--io-workers</comment>.
+
+The metadata consulted by the resolution can be saved with
+<comment>--export-snapshot FILE</comment>, and the resolution repeated without network
+access with <comment>--offline-snapshot FILE</comment>. The snapshot is written as
+JSON if <comment>FILE</comment> ends with <comment>.json</comment>, and as a binary
+index otherwise.
+
+With <comment>--solve-cache</comment>, the packages resolved for identical
+dependencies, sources, lock file and metadata of path dependencies are shared by
+all the worktrees of a project for a day, or for as long as the snapshot of
+<comment>--offline-snapshot</comment> is unchanged.
+
+The completion of each package, override branch, repository request and the
+write of the lock file can be recorded with <comment>--trace FILE</comment>, to be
+loaded in a timeline viewer such as Perfetto or speedscope.
+
+The tree of override branches, with the overrides that created each branch, its
+marker domain, whether it succeeded, conflicted or was pruned and the time spent
+solving it, can be written with <comment>--branch-report FILE</comment>. Files
+ending with <comment>.dot</comment> or <comment>.gv</comment> are written as a
+Graphviz graph, other files as JSON along with the time spent per duplicate
+dependency.
+
+With <comment>--memory-profile</comment>, the peak RSS and the memory allocated
+after loading the lock file, after each override branch and after writing the
+lock file are reported, along with the allocation sites of the resolution holding
+the most memory. The samples are added to the file of <comment>--trace</comment>.
+
+<info>poetry solve --analyze</info> reports the duplicate dependencies that will make
+the resolution branch, without solving.
 """
 
     def handle(self) -> int:
+        if self.option("analyze"):
+            provider = Provider(self.poetry.package, self.poetry.pool, NullIO())
+            self.line(BranchAnalyzer(provider).analyze().report())
+            return 0
+
+        timeout = self.option("timeout")
+        max_branches = self.option("max-branches")
+        max_memory = self.option("max-memory")
+        try:
+            timeout = float(timeout) if timeout is not None else None
+            max_branches = int(max_branches) if max_branches is not None else None
+            max_memory = parse_size(max_memory) if max_memory is not None else None
+            io_workers = int(self.option("io-workers"))
+        except ValueError:
+            self.line_error(
+                "<error>--timeout, --max-branches, --max-memory and --io-workers"
+                " must be numbers.</error>"
+            )
+            return 1
+
+        export_snapshot = self.option("export-snapshot")
+        offline_snapshot = self.option("offline-snapshot")
+        if export_snapshot is not None and offline_snapshot is not None:
+            self.line_error(
+                "<error>--export-snapshot and --offline-snapshot"
+                " cannot be used together.</error>"
+            )
+            return 1
+
         default_installer = self._installer
         self.set_installer(
             Installer(
@@ -33,8 +191,50 @@ file.
                 provider=Provider,
             )
         )
+        self._installer.resume(self.option("resume"))
+        self._installer.limit(
+            timeout=timeout, max_branches=max_branches, max_memory=max_memory
+        )
+        self._installer.io_workers(io_workers)
+        self._installer.snapshot(
+            export=Path(export_snapshot) if export_snapshot is not None else None,
+            offline=Path(offline_snapshot) if offline_snapshot is not None else None,
+        )
+        self._installer.solve_cache(self.option("solve-cache"))
+        trace_path = self.option("trace")
+        trace = SolveTrace() if trace_path is not None else None
+        self._installer.trace(trace)
+        branch_reports = [Path(path) for path in self.option("branch-report")]
+        branch_tree = BranchTree()
+        if branch_reports:
+            self._installer.provider_hooks(branch_tree)
+        memory_profile = None
+        if self.option("memory-profile"):
+            memory_profile = MemoryProfile(trace=trace)
+            memory_profile.start()
+        self._installer.memory_profile(memory_profile)
 
-        return super().handle()
+        try:
+            return super().handle()
+        except SolveBudgetExceeded as e:
+            self.line_error(f"<error>{e.report()}</error>")
+            self.line_error(
+                "Completed branches have been checkpointed, run again with"
+                " <comment>--resume</comment> to continue."
+            )
+            return 1
+        except SnapshotError as e:
+            self.line_error(f"<error>{e}</error>")
+            return 1
+        finally:
+            # Interrupted resolutions are reported as well
+            if trace is not None:
+                trace.save(Path(trace_path))
+            for path in branch_reports:
+                branch_tree.save(path)
+            if memory_profile is not None:
+                memory_profile.stop()
+                self.line(memory_profile.report())
 
 
 def factory():
@@ -0,0 +1,292 @@
+"""Solver that records the resolution of override branches.
+
+The locked packages given to the version solver were all built up front, although
+it only looks them up by the names of the dependencies it reaches. With a
+``LockfileRepository``, they are looked up by name instead, so the lock entries a
+solve never reaches are not built.
+
+The branch handling and the resolution are copied from [python-poetry/poetry/puzzle/solver.py](https://github.com/python-poetry/poetry/blob/1.2.0b1/src/poetry/puzzle/solver.py).
+
+"""  # noqa: E501
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Mapping, TYPE_CHECKING
+
+from poetry.mixology import resolve_version
+from poetry.mixology.failure import SolveFailure
+from poetry.packages import DependencyPackage
+from poetry.puzzle.exceptions import OverrideNeeded
+from poetry.puzzle.exceptions import SolverProblemError
+from poetry.puzzle.solver import PackageNode
+from poetry.puzzle.solver import Solver as BaseSolver
+from poetry.puzzle.solver import aggregate_package_nodes
+from poetry.puzzle.solver import depth_first_search
+
+from .exceptions import SolveBudgetExceeded
+from .transaction import Transaction
+
+
+if TYPE_CHECKING:
+    from cleo.io.io import IO
+    from poetry.core.packages.package import Package
+    from poetry.core.packages.project_package import ProjectPackage
+
+    from poetry.puzzle.provider import Provider
+    from poetry.repositories import Pool
+    from poetry.repositories import Repository
+
+    from .budget import SolveBudget
+    from .checkpoint import Checkpoint
+    from .lockfile_repository import LockfileRepository
+
+
+class Solver(BaseSolver):
+    def __init__(
+        self,
+        package: ProjectPackage,
+        pool: Pool,
+        installed: Repository,
+        locked: Repository,
+        io: IO,
+        provider: Provider | None = None,
+        checkpoint: Checkpoint | None = None,
+        budget: SolveBudget | None = None,
+    ):
+        super().__init__(package, pool, installed, locked, io, provider)
+
+        self._checkpoint = checkpoint
+        self._budget = budget
+
+    def solve(self, use_latest: list[str] = None) -> Transaction:
+        if self._budget is not None:
+            self._budget.start()
+
+        try:
+            with self._notifying("solve"):
+                transaction = self._solve_transaction(use_latest=use_latest)
+        except BaseException:
+            # Keep the completed branches, to resume from them later
+            if self._checkpoint is not None:
+                self._checkpoint.save()
+            raise
+
+        if self._checkpoint is not None:
+            self._checkpoint.clear()
+
+        lookups = getattr(self._provider, "package_lookups", None)
+        if lookups is not None:
+            self._provider.debug(f"<debug>{lookups.report()}</debug>")
+        pruning = getattr(self._provider, "python_pruning", None)
+        if pruning is not None:
+            self._provider.debug(f"<debug>{pruning.report()}</debug>")
+        memory_limit = getattr(self._provider, "memory_limit", None)
+        if memory_limit is not None:
+            self._provider.debug(f"<debug>{memory_limit.report()}</debug>")
+
+        return transaction
+
+    def _solve_transaction(self, use_latest: list[str] = None) -> Transaction:
+        with self._provider.progress():
+            start = time.time()
+            packages, depths = self._solve(use_latest=use_latest)
+            end = time.time()
+
+            if len(self._overrides) > 1:
+                self._provider.debug(
+                    f"Complete version solving took {end - start:.3f} seconds with"
+                    f" {len(self._overrides)} overrides"
+                )
+                self._provider.debug(
+                    "Resolved with overrides:"
+                    f" {', '.join(f'({b})' for b in self._overrides)}"
+                )
+
+        # Operations are calculated from packages indexed by name, and the locked
+        # packages are only built when uninstalled
+        return Transaction(
+            self._locked
+            if hasattr(self._locked, "packages_named")
+            else self._locked.packages,
+            list(zip(packages, depths)),
+            installed_packages=self._installed.packages,
+            root_package=self._package,
+        )
+
+    def solve_in_compatibility_mode(
+        self, overrides: tuple[dict, ...], use_latest: list[str] = None
+    ) -> tuple[list[Package], list[int]]:
+        if self._checkpoint is not None:
+            self._checkpoint.add_branches(self._provider._overrides, overrides)
+
+        packages = []
+        depths = []
+        for override in overrides:
+            _packages, _depths = self._solve_branch(override, use_latest=use_latest)
+            for index, package in enumerate(_packages):
+                if package not in packages:
+                    packages.append(package)
+                    depths.append(_depths[index])
+                    continue
+                else:
+                    idx = packages.index(package)
+                    pkg = packages[idx]
+                    depths[idx] = max(depths[idx], _depths[index])
+
+                    for dep in package.requires:
+                        if dep not in pkg.requires:
+                            pkg.add_dependency(dep)
+
+        return packages, depths
+
+    def _solve_branch(
+        self, override: dict, use_latest: list[str] = None
+    ) -> tuple[list[Package], list[int]]:
+        if self._checkpoint is not None:
+            result = self._checkpoint.get_result(override)
+            if result is not None:
+                self._provider.debug(
+                    "<comment>Resuming dependency resolution "
+                    f"with the following overrides ({override}).</comment>"
+                )
+                return result
+
+        if self._budget is not None:
+            reason = self._budget.add_branch()
+            if reason is not None:
+                raise SolveBudgetExceeded(
+                    reason, getattr(self._provider, "branching", {})
+                )
+
+        self._provider.debug(
+            "<comment>Retrying dependency resolution "
+            f"with the following overrides ({override}).</comment>"
+        )
+        self._provider.set_overrides(override)
+        with self._notifying("override_branch", override):
+            packages, depths = self._solve(use_latest=use_latest)
+
+        if self._checkpoint is not None:
+            self._checkpoint.add_result(override, packages, depths)
+
+        return packages, depths
+
+    @contextmanager
+    def _notifying(self, phase: str, *args: Any) -> Iterator[None]:
+        # Providers with hooks are notified of the start and end of the phase
+        notify = getattr(self._provider, "_notify", None)
+        if notify is None:
+            yield
+            return
+
+        notify(f"{phase}_start", *args)
+        try:
+            yield
+        except BaseException as e:
+            notify(f"{phase}_end", *args, e)
+            raise
+        notify(f"{phase}_end", *args, None)
+
+    def _solve(self, use_latest: list[str] = None) -> tuple[list[Package], list[int]]:
+        if self._checkpoint is not None:
+            # The branches of this resolution are already known,
+            # so the resolution up to the OverrideNeeded exception is skipped.
+            overrides = self._checkpoint.get_branches(self._provider._overrides)
+            if overrides is not None:
+                if self._provider._overrides:
+                    self._overrides.append(self._provider._overrides)
+
+                return self.solve_in_compatibility_mode(
+                    overrides, use_latest=use_latest
+                )
+
+        if self._provider._overrides:
+            self._overrides.append(self._provider._overrides)
+
+        if hasattr(self._locked, "packages_named"):
+            locked: Mapping[str, DependencyPackage] = LockedPackages(self._locked)
+        else:
+            locked = {
+                package.name: DependencyPackage(package.to_dependency(), package)
+                for package in self._locked.packages
+            }
+
+        try:
+            result = resolve_version(
+                self._package, self._provider, locked=locked, use_latest=use_latest
+            )
+
+            packages = result.packages
+        except OverrideNeeded as e:
+            return self.solve_in_compatibility_mode(e.overrides, use_latest=use_latest)
+        except SolveFailure as e:
+            raise SolverProblemError(e)
+
+        # NOTE passing explicit empty array for seen to reset between invocations during
+        # update + install cycle
+        results = dict(
+            depth_first_search(
+                PackageNode(self._package, packages, seen=[]), aggregate_package_nodes
+            )
+        )
+
+        # Merging feature packages with base packages
+        final_packages = []
+        depths = []
+        for package in packages:
+            if package.features:
+                for _package in packages:
+                    if (
+                        _package.name == package.name
+                        and not _package.is_same_package_as(package)
+                        and _package.version == package.version
+                    ):
+                        for dep in package.requires:
+                            if dep.is_same_package_as(_package):
+                                continue
+
+                            if dep not in _package.requires:
+                                _package.add_dependency(dep)
+
+                continue
+
+            final_packages.append(package)
+            depths.append(results[package])
+
+        # Return the packages in their original order with associated depths
+        return final_packages, depths
+
+
+class LockedPackages(Mapping[str, DependencyPackage]):
+    """Locked packages of a resolution, built when the version solver looks them up.
+
+    Parameters
+    ----------
+    locked
+        Repository of the lock file.
+
+    """
+
+    def __init__(self, locked: LockfileRepository) -> None:
+        self._locked = locked
+        self._packages: dict[str, DependencyPackage] = {}
+
+    def __getitem__(self, name: str) -> DependencyPackage:
+        if name not in self._packages:
+            packages = self._locked.packages_named(name)
+            if not packages:
+                raise KeyError(name)
+
+            # The last locked package of a name is the one kept by the base solver
+            package = packages[-1]
+            self._packages[name] = DependencyPackage(package.to_dependency(), package)
+
+        return self._packages[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._locked.package_names)
+
+    def __len__(self) -> int:
+        return len(self._locked.package_names)
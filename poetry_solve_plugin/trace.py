@@ -0,0 +1,173 @@
+"""Timeline of a solve, in the Chrome trace event format.
+
+The debug output of a solve lists the override branches, but not where the time
+of the solve went. ``SolveTrace`` records a span for each completion of a package,
+override branch, repository request and write of the lock file, from the provider
+hooks, and writes them as a JSON trace that timeline viewers such as Perfetto,
+``chrome://tracing`` or speedscope load.
+
+Completions are annotated with the id of the override branch they belong to, the
+resolution without overrides being branch 0.
+
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, TYPE_CHECKING
+
+from .hooks import ProviderHooks
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from poetry.core.packages.dependency import Dependency
+
+    from poetry.packages import DependencyPackage
+
+    from .overrides import Overrides
+
+
+class SolveTrace(ProviderHooks):
+    """Spans of the phases of a solve, as Chrome trace events."""
+
+    def __init__(self) -> None:
+        self._origin = time.perf_counter()
+        self._events: list[dict[str, Any]] = []
+        # Name, category, arguments and start of the spans in progress
+        self._open: list[tuple[str, str, dict[str, Any], float]] = []
+        self._branches = [0]
+        self._last_branch = 0
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    @property
+    def branch(self) -> int:
+        """Id of the override branch being solved."""
+        return self._branches[-1]
+
+    @contextmanager
+    def span(self, name: str, category: str, **args: Any) -> Iterator[None]:
+        self._start(name, category, args)
+        try:
+            yield
+        finally:
+            self._end()
+
+    def save(self, path: Path) -> None:
+        data = {"traceEvents": self._events, "displayTimeUnit": "ms"}
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+    def counter(self, name: str, values: dict[str, Any]) -> None:
+        self._events.append({**self._event(name, "C"), "args": values})
+
+    def complete_package_start(self, package: DependencyPackage) -> None:
+        self._start(
+            f"complete {package.complete_name}",
+            "complete_package",
+            {
+                "package": package.complete_name,
+                "version": package.version.text,
+                "branch": self.branch,
+            },
+        )
+
+    def complete_package_end(self, package: DependencyPackage) -> None:
+        self._end()
+
+    def override_needed(
+        self, package: DependencyPackage, overrides: list[Overrides]
+    ) -> None:
+        self._events.append(
+            {
+                **self._event(f"override needed by {package.complete_name}", "i"),
+                "cat": "override",
+                "s": "t",
+                "args": {"package": package.complete_name, "branches": len(overrides)},
+            }
+        )
+
+    def override_branch_start(self, overrides: Overrides) -> None:
+        self._last_branch += 1
+        self._branches.append(self._last_branch)
+        self._start(
+            f"branch {self._last_branch}",
+            "branch",
+            {
+                "branch": self._last_branch,
+                "parent": self._branches[-2],
+                "overrides": _describe(overrides),
+            },
+        )
+
+    def override_branch_end(
+        self, overrides: Overrides, error: BaseException | None
+    ) -> None:
+        self._end()
+        self._branches.pop()
+
+    def deferred_lookup_start(self, dependency: Dependency) -> None:
+        self._start(
+            f"lookup {dependency.complete_name}",
+            "repository",
+            {"dependency": dependency.to_pep_508()},
+        )
+
+    def deferred_lookup_end(self, dependency: Dependency) -> None:
+        self._end()
+
+    def pool_fetch_start(self, name: str, version: str | None) -> None:
+        if version is None:
+            self._start(f"versions of {name}", "repository", {"package": name})
+        else:
+            self._start(
+                f"fetch {name} ({version})",
+                "repository",
+                {"package": name, "version": version},
+            )
+
+    def pool_fetch_end(self, name: str, version: str | None) -> None:
+        self._end()
+
+    def _start(self, name: str, category: str, args: dict[str, Any]) -> None:
+        self._open.append((name, category, args, time.perf_counter()))
+
+    def _end(self) -> None:
+        name, category, args, start = self._open.pop()
+        self._events.append(
+            {
+                **self._event(name, "X", start),
+                "dur": (time.perf_counter() - start) * 1e6,
+                "cat": category,
+                "args": args,
+            }
+        )
+
+    def _event(
+        self, name: str, phase: str, start: float | None = None
+    ) -> dict[str, Any]:
+        if start is None:
+            start = time.perf_counter()
+
+        return {
+            "name": name,
+            "ph": phase,
+            "ts": (start - self._origin) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+
+
+def _describe(overrides: Overrides) -> list[str]:
+    return sorted(
+        f"{package}: {name} ({record.constraint}) ; {record.marker}"
+        for package, records in overrides.items()
+        for name, record in records.items()
+    )
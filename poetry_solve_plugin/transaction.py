@@ -0,0 +1,119 @@
+"""Operations between the locked, resolved and installed packages, by name.
+
+The base transaction matched every resolved package against all the installed
+packages, and every locked package against all the resolved ones, which is
+quadratic in the number of packages of large environments. Here the packages
+are looked up in maps keyed by name, built once per calculation, and the same
+operations are returned in the same order.
+
+The current packages may also be given as a ``LockfileRepository``, so that only
+the locked packages to uninstall are built.
+
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Callable, TYPE_CHECKING
+
+from poetry.puzzle.transaction import Transaction as BaseTransaction
+
+
+if TYPE_CHECKING:
+    from poetry.core.packages.package import Package
+
+    from poetry.installation.operations import OperationTypes
+
+
+class Transaction(BaseTransaction):
+    def calculate_operations(
+        self, with_uninstalls: bool = True, synchronize: bool = False
+    ) -> list[OperationTypes]:
+        from poetry.installation.operations.install import Install
+        from poetry.installation.operations.uninstall import Uninstall
+        from poetry.installation.operations.update import Update
+
+        operations: list[OperationTypes] = []
+
+        # The first installed package of each name is the one compared with,
+        # and a locked package is uninstalled once per installed package.
+        installed_packages: dict[str, Package] = {}
+        for installed_package in self._installed_packages:
+            installed_packages.setdefault(installed_package.name, installed_package)
+        installed_counts = Counter(p.name for p in self._installed_packages)
+
+        for result_package, priority in self._result_packages:
+            installed_package = installed_packages.get(result_package.name)
+            if installed_package is None:
+                operations.append(Install(result_package, priority=priority))
+            elif result_package.version != installed_package.version or (
+                (
+                    installed_package.source_type
+                    or result_package.source_type != "legacy"
+                )
+                and not result_package.is_same_package_as(installed_package)
+            ):
+                operations.append(
+                    Update(installed_package, result_package, priority=priority)
+                )
+            else:
+                operations.append(Install(result_package).skip("Already installed"))
+
+        if with_uninstalls:
+            result_names = {package.name for package, _ in self._result_packages}
+            current_package_names, packages_named = self._current_packages_by_name()
+            current_names = set(current_package_names)
+            for name in current_package_names:
+                # Only the packages that are installed are looked up
+                if name in result_names or not installed_counts[name]:
+                    continue
+
+                for current_package in packages_named(name):
+                    for _ in range(installed_counts[name]):
+                        operations.append(Uninstall(current_package))
+
+            if synchronize:
+                # We preserve pip/setuptools/wheel when not managed by poetry, this is
+                # done to avoid externally managed virtual environments causing
+                # unnecessary removals.
+                preserved_package_names = {
+                    "pip",
+                    "setuptools",
+                    "wheel",
+                } - current_names
+
+                for installed_package in self._installed_packages:
+                    if (
+                        self._root_package
+                        and installed_package.name == self._root_package.name
+                    ):
+                        continue
+
+                    if installed_package.name in preserved_package_names:
+                        continue
+
+                    if installed_package.name not in current_names:
+                        operations.append(Uninstall(installed_package))
+
+        return sorted(
+            operations,
+            key=lambda o: (
+                -o.priority,
+                o.package.name,
+                o.package.version,
+            ),
+        )
+
+    def _current_packages_by_name(
+        self,
+    ) -> tuple[list[str], Callable[[str], list[Package]]]:
+        """Names of the current packages, and the lookup of the packages of a name."""
+        names = getattr(self._current_packages, "package_names", None)
+        if names is not None:
+            return names, self._current_packages.packages_named
+
+        packages: dict[str, list[Package]] = {}
+        for package in self._current_packages:
+            packages.setdefault(package.name, []).append(package)
+
+        return list(packages), packages.__getitem__
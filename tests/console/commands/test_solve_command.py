@@ -1,17 +1,26 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
 from typing import TYPE_CHECKING
 
 import pytest
+from cleo.io.null_io import NullIO
 from poetry.packages import Locker
+from poetry.repositories import Repository
+from poetry.utils.env import NullEnv
 from tests.helpers import get_package
+from tests.helpers import TestExecutor
+
+from poetry_solve_plugin.installer import Installer
+from poetry_solve_plugin.lockfile_repository import LockfileRepository
 
 if TYPE_CHECKING:
     import httpretty
     from cleo.testers.command_tester import CommandTester
 
     from poetry.poetry import Poetry
+    from pytest_mock import MockerFixture
     from tests.helpers import TestRepository
     from tests.types import CommandTesterFactory, FixtureDirGetter, ProjectFactory
 
@@ -62,6 +71,31 @@ def poetry_with_old_lockfile(
     return _project_factory("old_lock", project_factory, fixture_dir)
 
 
+@pytest.fixture
+def poetry_with_duplicate_dependencies(
+    project_factory: ProjectFactory, repo: TestRepository
+) -> Poetry:
+    repo.add_package(get_package("sampleproject", "1.3.1"))
+    repo.add_package(get_package("sampleproject", "2.0.0"))
+    return project_factory(
+        name="foobar",
+        pyproject_content="""\
+[tool.poetry]
+name = "foobar"
+version = "0.1.0"
+description = ""
+authors = []
+
+[tool.poetry.dependencies]
+python = "^3.6"
+sampleproject = [
+    { version = "^1.3", python = "<3.8" },
+    { version = "^2.0", python = ">=3.8" },
+]
+""",
+    )
+
+
 def test_lock_check_outdated(
     command_tester_factory: CommandTesterFactory,
     poetry_with_outdated_lockfile: Poetry,
@@ -145,3 +179,391 @@ def test_lock_no_update(
 
     for package in packages:
         assert locked_repository.find_packages(package.to_dependency())
+
+
+def test_lock_is_parsed_once_per_run(
+    poetry_with_up_to_date_lockfile: Poetry,
+    repo: TestRepository,
+    mocker: MockerFixture,
+):
+    repo.add_package(get_package("docker", "4.3.1"))
+
+    poetry = poetry_with_up_to_date_lockfile
+    locker = Locker(
+        lock=poetry.pyproject.file.path.parent / "poetry.lock",
+        local_config=poetry.locker._local_config,
+    )
+    installer = Installer(
+        NullIO(),
+        NullEnv(),
+        poetry.package,
+        locker,
+        poetry.pool,
+        poetry.config,
+        installed=Repository(),
+        executor=TestExecutor(NullEnv(), poetry.pool, poetry.config, NullIO()),
+    ).dry_run()
+
+    init = mocker.spy(LockfileRepository, "__init__")
+    get_locked_repository = mocker.spy(Installer, "_get_locked_repository")
+
+    # Install from the lock file, then refresh it
+    assert installer.run() == 0
+    assert installer.lock(update=False).run() == 0
+
+    assert get_locked_repository.call_count == 2
+    assert init.call_count == 1
+
+    locker.lock.path.write_text(
+        locker.lock.path.read_text(encoding="utf-8") + "\n", encoding="utf-8"
+    )
+    assert installer.run() == 0
+
+    assert get_locked_repository.call_count == 3
+    assert init.call_count == 2
+
+
+def test_untouched_lock_entries_are_not_built(
+    command_tester_factory: CommandTesterFactory,
+    poetry_with_up_to_date_lockfile: Poetry,
+    repo: TestRepository,
+    mocker: MockerFixture,
+):
+    # docker is the only package reached by the solve
+    repo.add_package(get_package("docker", "4.3.1"))
+
+    locker = Locker(
+        lock=poetry_with_up_to_date_lockfile.pyproject.file.path.parent / "poetry.lock",
+        local_config=poetry_with_up_to_date_lockfile.locker._local_config,
+    )
+    poetry_with_up_to_date_lockfile.set_locker(locker)
+
+    create_package = mocker.spy(LockfileRepository, "_create_package")
+
+    tester = command_tester_factory("solve", poetry=poetry_with_up_to_date_lockfile)
+    assert tester.execute("--no-update --solve-cache") == 0
+
+    assert [call.args[1]["name"] for call in create_package.call_args_list] == [
+        "docker"
+    ]
+
+
+def test_locked_repository_is_cached_by_lock_content(
+    poetry_with_up_to_date_lockfile: Poetry,
+):
+    poetry = poetry_with_up_to_date_lockfile
+    locker = Locker(
+        lock=poetry.pyproject.file.path.parent / "poetry.lock",
+        local_config=poetry.locker._local_config,
+    )
+    installer = Installer(
+        NullIO(),
+        NullEnv(),
+        poetry.package,
+        locker,
+        poetry.pool,
+        poetry.config,
+        installed=Repository(),
+    )
+
+    locked_repository = installer._get_locked_repository()
+    assert installer._get_locked_repository() is locked_repository
+
+    locker.lock.path.write_text(
+        locker.lock.path.read_text(encoding="utf-8") + "\n", encoding="utf-8"
+    )
+    assert installer._get_locked_repository() is not locked_repository
+
+
+def test_update_does_not_build_untouched_lock_entries(
+    poetry_with_up_to_date_lockfile: Poetry,
+    repo: TestRepository,
+    mocker: MockerFixture,
+):
+    repo.add_package(get_package("docker", "4.3.1"))
+
+    poetry = poetry_with_up_to_date_lockfile
+    locker = Locker(
+        lock=poetry.pyproject.file.path.parent / "poetry.lock",
+        local_config=poetry.locker._local_config,
+    )
+    installer = Installer(
+        NullIO(),
+        NullEnv(),
+        poetry.package,
+        locker,
+        poetry.pool,
+        poetry.config,
+        installed=Repository(),
+        executor=TestExecutor(NullEnv(), poetry.pool, poetry.config, NullIO()),
+    )
+    installer.update(True)
+    installer.whitelist(["docker"])
+    installer.dry_run(True)
+
+    create_package = mocker.spy(LockfileRepository, "_create_package")
+
+    assert installer.run() == 0
+    assert [call.args[1]["name"] for call in create_package.call_args_list] == [
+        "docker"
+    ]
+
+
+def test_solve_max_branches(
+    command_tester_factory: CommandTesterFactory,
+    poetry_with_duplicate_dependencies: Poetry,
+):
+    poetry = poetry_with_duplicate_dependencies
+    tester = command_tester_factory("solve", poetry=poetry)
+    status_code = tester.execute("--max-branches 1")
+
+    error = tester.io.fetch_error()
+    assert status_code == 1
+    assert "limit of 1 override branches exceeded" in error
+    assert "foobar (0.1.0) requires sampleproject: 2 branches" in error
+
+
+def test_solve_analyze(
+    command_tester_factory: CommandTesterFactory,
+    poetry_with_duplicate_dependencies: Poetry,
+):
+    poetry = poetry_with_duplicate_dependencies
+    tester = command_tester_factory("solve", poetry=poetry)
+    status_code = tester.execute("--analyze")
+
+    assert status_code == 0
+    assert tester.io.fetch_output() == (
+        "Analyzed 2 packages.\n"
+        "Found 1 duplicate dependency groups with different requirements:\n"
+        "  - foobar (0.1.0) requires sampleproject: 2 variants\n"
+        "Estimated number of override branches: up to 2\n"
+    )
+    assert not poetry.locker.lock.exists()
+
+
+def test_solve_with_io_workers(
+    command_tester_factory: CommandTesterFactory,
+    poetry_with_duplicate_dependencies: Poetry,
+    mocker: MockerFixture,
+):
+    from poetry_solve_plugin.async_pool import AsyncPool
+
+    poetry = poetry_with_duplicate_dependencies
+    prefetch = mocker.spy(AsyncPool, "prefetch")
+    close = mocker.spy(AsyncPool, "close")
+
+    tester = command_tester_factory("solve", poetry=poetry)
+    status_code = tester.execute("--io-workers 4")
+
+    assert status_code == 0
+    assert prefetch.call_count > 0
+    assert close.call_count == 1
+    packages = poetry.locker.lock_data["package"]
+    assert sorted(package["version"] for package in packages) == ["1.3.1", "2.0.0"]
+
+
+def test_solve_offline_from_exported_snapshot(
+    command_tester_factory: CommandTesterFactory,
+    poetry_with_duplicate_dependencies: Poetry,
+    repo: TestRepository,
+    tmp_path: Path,
+):
+    poetry = poetry_with_duplicate_dependencies
+    snapshot = tmp_path / "snapshot.json"
+
+    tester = command_tester_factory("solve", poetry=poetry)
+    assert tester.execute(f"--export-snapshot {snapshot}") == 0
+    expected = poetry.locker.lock_data["package"]
+    assert snapshot.exists()
+
+    for package in list(repo.packages):
+        repo.remove_package(package)
+    poetry.locker.lock.path.unlink()
+
+    tester = command_tester_factory("solve", poetry=poetry)
+    assert tester.execute(f"--offline-snapshot {snapshot}") == 0
+    assert poetry.locker.lock_data["package"] == expected
+
+
+def test_solve_offline_reports_missing_metadata(
+    command_tester_factory: CommandTesterFactory,
+    poetry_with_duplicate_dependencies: Poetry,
+    tmp_path: Path,
+):
+    snapshot = tmp_path / "snapshot.json"
+    snapshot.write_text(
+        '{"version": 1, "listings": {}, "packages": {}, "deferred": {}}',
+        encoding="utf-8",
+    )
+
+    tester = command_tester_factory("solve", poetry=poetry_with_duplicate_dependencies)
+    status_code = tester.execute(f"--offline-snapshot {snapshot}")
+
+    assert status_code == 1
+    assert tester.io.fetch_error() == (
+        "No versions of sampleproject in the metadata snapshot.\n"
+    )
+
+
+def test_solve_cache_reuses_identical_resolution(
+    command_tester_factory: CommandTesterFactory,
+    poetry_with_duplicate_dependencies: Poetry,
+    repo: TestRepository,
+    mocker: MockerFixture,
+):
+    from poetry_solve_plugin.solver import Solver
+
+    poetry = poetry_with_duplicate_dependencies
+    solve = mocker.spy(Solver, "solve")
+
+    tester = command_tester_factory("solve", poetry=poetry)
+    assert tester.execute("--solve-cache") == 0
+    expected = poetry.locker.lock_data["package"]
+    assert solve.call_count == 1
+
+    # Another worktree, without a lock file
+    poetry.locker.lock.path.unlink()
+    repo.add_package(get_package("sampleproject", "2.1.0"))
+
+    tester = command_tester_factory("solve", poetry=poetry)
+    assert tester.execute("--solve-cache") == 0
+    assert "Reusing the resolution of identical dependencies" in (
+        tester.io.fetch_output()
+    )
+    assert poetry.locker.lock_data["package"] == expected
+    assert solve.call_count == 1
+
+    poetry.locker._local_config["dependencies"]["sampleproject"][1]["version"] = "^2.1"
+    poetry.locker._content_hash = poetry.locker._get_content_hash()
+
+    tester = command_tester_factory("solve", poetry=poetry)
+    assert tester.execute("--solve-cache") == 0
+    assert solve.call_count == 2
+
+
+def test_solve_cache_covers_the_metadata_of_path_dependencies(
+    command_tester_factory: CommandTesterFactory,
+    project_factory: ProjectFactory,
+    tmp_path: Path,
+    mocker: MockerFixture,
+):
+    from poetry_solve_plugin.solver import Solver
+
+    dependency = tmp_path / "demo"
+    dependency.mkdir()
+    pyproject = """\
+[tool.poetry]
+name = "demo"
+version = "{version}"
+description = ""
+authors = []
+
+[tool.poetry.dependencies]
+python = "^3.6"
+
+[build-system]
+requires = ["poetry-core>=1.0.0"]
+build-backend = "poetry.core.masonry.api"
+"""
+    (dependency / "pyproject.toml").write_text(pyproject.format(version="0.1.0"))
+    poetry = project_factory(
+        name="foobar",
+        pyproject_content=f"""\
+[tool.poetry]
+name = "foobar"
+version = "0.1.0"
+description = ""
+authors = []
+
+[tool.poetry.dependencies]
+python = "^3.6"
+demo = {{ path = "{dependency.as_posix()}" }}
+""",
+    )
+    solve = mocker.spy(Solver, "solve")
+
+    for _ in range(2):
+        tester = command_tester_factory("solve", poetry=poetry)
+        assert tester.execute("--solve-cache") == 0
+    assert solve.call_count == 1
+
+    (dependency / "pyproject.toml").write_text(pyproject.format(version="0.2.0"))
+
+    tester = command_tester_factory("solve", poetry=poetry)
+    assert tester.execute("--solve-cache") == 0
+    assert solve.call_count == 2
+    assert [package["version"] for package in poetry.locker.lock_data["package"]] == [
+        "0.2.0"
+    ]
+
+
+def test_solve_trace(
+    command_tester_factory: CommandTesterFactory,
+    poetry_with_duplicate_dependencies: Poetry,
+    tmp_path: Path,
+):
+    trace = tmp_path / "trace.json"
+
+    tester = command_tester_factory("solve", poetry=poetry_with_duplicate_dependencies)
+    assert tester.execute(f"--trace {trace}") == 0
+
+    events = json.loads(trace.read_text(encoding="utf-8"))["traceEvents"]
+    assert {event["cat"] for event in events} == {
+        "solve",
+        "complete_package",
+        "override",
+        "branch",
+        "repository",
+        "lock",
+    }
+
+
+def test_solve_branch_report(
+    command_tester_factory: CommandTesterFactory,
+    poetry_with_duplicate_dependencies: Poetry,
+    tmp_path: Path,
+):
+    report = tmp_path / "branches.json"
+    graph = tmp_path / "branches.dot"
+
+    tester = command_tester_factory("solve", poetry=poetry_with_duplicate_dependencies)
+    assert tester.execute(f"--branch-report {report} --branch-report {graph}") == 0
+
+    data = json.loads(report.read_text(encoding="utf-8"))
+    assert [branch["status"] for branch in data["branches"]] == ["succeeded"] * 3
+    assert [(group["dependency"], group["branches"]) for group in data["groups"]] == [
+        ("sampleproject", 2)
+    ]
+    assert graph.read_text(encoding="utf-8").count(" -> ") == 2
+
+
+def test_solve_memory_profile(
+    command_tester_factory: CommandTesterFactory,
+    poetry_with_duplicate_dependencies: Poetry,
+    tmp_path: Path,
+):
+    trace = tmp_path / "trace.json"
+
+    tester = command_tester_factory("solve", poetry=poetry_with_duplicate_dependencies)
+    assert tester.execute(f"--memory-profile --trace {trace}") == 0
+
+    output = tester.io.fetch_output()
+    for phase in ["branch 1", "branch 2", "lock write"]:
+        assert f"  - {phase}: peak RSS " in output
+    events = json.loads(trace.read_text(encoding="utf-8"))["traceEvents"]
+    assert len([event for event in events if event["ph"] == "C"]) == 3
+
+
+def test_solve_max_memory(
+    command_tester_factory: CommandTesterFactory,
+    poetry_with_duplicate_dependencies: Poetry,
+):
+    poetry = poetry_with_duplicate_dependencies
+    tester = command_tester_factory("solve", poetry=poetry)
+
+    assert tester.execute("--max-memory 1K") == 0
+    packages = poetry.locker.lock_data["package"]
+    assert sorted(package["version"] for package in packages) == ["1.3.1", "2.0.0"]
+
+    assert tester.execute("--max-memory lots") == 1
+    assert "--max-memory" in tester.io.fetch_error()
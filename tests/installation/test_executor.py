@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, TYPE_CHECKING
+
+import pytest
+from cleo.io.buffered_io import BufferedIO
+from poetry.core.packages.package import Package
+
+from poetry.factory import Factory
+from poetry.installation.operations import Install
+from poetry.installation.operations import Uninstall
+from poetry.repositories import Pool
+from poetry.utils.env import MockEnv
+from tests.helpers import get_package
+
+from poetry_solve_plugin.executor import PipelineExecutor
+
+if TYPE_CHECKING:
+    from poetry.config.config import Config
+
+
+class Executor(PipelineExecutor):
+    def __init__(self, *args: Any, archives: dict[str, Path], **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.archives = archives
+        self.installed: list[str] = []
+        self.removed: list[str] = []
+        # Downloads completing only once another package is installed
+        self.waits: dict[str, str] = {}
+        self._installations = {name: threading.Event() for name in archives}
+
+    def _fetch_artifact(self, operation: Install) -> Path:
+        name = operation.package.name
+        if name in self.waits:
+            assert self._installations[self.waits[name]].wait(5)
+
+        return self.archives[name]
+
+    def pip_install(self, req: Path, upgrade: bool = False, **kwargs: Any) -> int:
+        name = req.name.split("-")[0]
+        self.installed.append(name)
+        self._installations[name].set()
+
+        return 0
+
+    def _remove(self, operation: Uninstall) -> int:
+        self.removed.append(operation.package.name)
+
+        return 0
+
+
+def make_archive(tmp_path: Path, package: Package, valid: bool = True) -> Path:
+    archive = tmp_path / f"{package.name}-{package.version}-py3-none-any.whl"
+    archive.write_bytes(package.name.encode())
+    digest = hashlib.sha256(archive.read_bytes() if valid else b"").hexdigest()
+    package.files = [{"file": archive.name, "hash": f"sha256:{digest}"}]
+
+    return archive
+
+
+@pytest.fixture
+def packages() -> list[Package]:
+    a = get_package("a", "1.0")
+    b = get_package("b", "1.0")
+    b.add_dependency(Factory.create_dependency("a", "*"))
+    c = get_package("c", "1.0")
+
+    return [a, b, c]
+
+
+def test_packages_are_installed_once_their_requirements_are(
+    config: Config, tmp_path: Path, packages: list[Package]
+):
+    a, b, c = packages
+    executor = Executor(
+        MockEnv(),
+        Pool(),
+        config,
+        BufferedIO(),
+        archives={p.name: make_archive(tmp_path, p) for p in packages},
+    )
+    executor.waits["a"] = "c"
+
+    status = executor.execute(
+        [
+            Uninstall(get_package("d", "1.0")),
+            Install(a, priority=1),
+            Install(b),
+            Install(c),
+        ]
+    )
+
+    # c is not held back by the download of a deeper package, unlike b
+    assert status == 0
+    assert executor.removed == ["d"]
+    assert executor.installed == ["c", "a", "b"]
+    assert executor.installations_count == 3
+    assert executor.removals_count == 1
+
+
+def test_artifacts_with_unknown_hashes_are_not_installed(
+    config: Config, tmp_path: Path, packages: list[Package]
+):
+    a, b, c = packages
+    io = BufferedIO()
+    executor = Executor(
+        MockEnv(),
+        Pool(),
+        config,
+        io,
+        archives={
+            "a": make_archive(tmp_path, a, valid=False),
+            "b": make_archive(tmp_path, b),
+            "c": make_archive(tmp_path, c),
+        },
+    )
+
+    status = executor.execute([Install(a), Install(b)])
+
+    assert status == 1
+    assert "a" not in executor.installed
+    assert "b" not in executor.installed
+    assert "Hash for a (1.0) from archive a-1.0-py3-none-any.whl" in io.fetch_output()
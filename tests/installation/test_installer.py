@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from cleo.io.null_io import NullIO
+from poetry.core.packages.project_package import ProjectPackage
+from poetry.core.version.markers import parse_marker
+
+from poetry.installation.executor import Executor
+from poetry.installation.operations import Install
+from poetry.installation.operations import Uninstall
+from poetry.installation.operations import Update
+from poetry.repositories import Pool
+from poetry.repositories import Repository
+from poetry.utils.env import MockEnv
+from tests.helpers import get_package
+
+from poetry_solve_plugin.executor import PipelineExecutor
+from poetry_solve_plugin.installer import Installer
+
+if TYPE_CHECKING:
+    from poetry.config.config import Config
+    from pytest_mock import MockerFixture
+
+
+def test_filter_operations_validates_each_marker_once(
+    config: Config, mocker: MockerFixture
+):
+    env = MockEnv(platform="linux")
+    locker = mocker.Mock(lock_data={"extras": {"foo": ["b"]}})
+    installer = Installer(
+        NullIO(),
+        env,
+        ProjectPackage("root", "1.0"),
+        locker,
+        Pool(),
+        config,
+        installed=Repository(),
+    ).extras(["foo"])
+    is_valid_for_marker = mocker.spy(env, "is_valid_for_marker")
+
+    packages = [get_package(f"p{i}", "1.0") for i in range(100)]
+    for i, package in enumerate(packages):
+        package.marker = parse_marker(
+            'sys_platform == "win32"' if i % 2 else 'python_version >= "3.6"'
+        )
+    optional = [get_package("a", "1.0"), get_package("b", "1.0")]
+    for package in optional:
+        package.optional = True
+    ops = [Install(package) for package in packages + optional]
+    ops += [
+        Update(get_package("c", "1.0"), packages[1]),
+        Uninstall(packages[3]),
+    ]
+
+    installer._filter_operations(ops, Repository(packages + optional))
+
+    assert is_valid_for_marker.call_count == 3
+    assert [op.skip_reason for op in ops[:2]] == [
+        None,
+        "Not needed for the current environment",
+    ]
+    assert [op.skip_reason for op in ops[100:]] == [
+        "Not required",
+        None,
+        "Not needed for the current environment",
+        None,
+    ]
+
+
+def test_pipeline_executor_is_opt_in(config: Config):
+    installer = Installer(
+        NullIO(),
+        MockEnv(),
+        ProjectPackage("root", "1.0"),
+        None,
+        Pool(),
+        config,
+        installed=Repository(),
+    ).dry_run()
+
+    assert type(installer.executor) is Executor
+
+    installer.pipeline()
+
+    assert isinstance(installer.executor, PipelineExecutor)
+    assert installer.executor._dry_run
+
+    installer.pipeline(False)
+
+    assert type(installer.executor) is Executor
+    assert installer.executor._dry_run
+
+
+def test_injected_executor_is_kept(config: Config):
+    executor = PipelineExecutor(MockEnv(), Pool(), config, NullIO())
+    installer = Installer(
+        NullIO(),
+        MockEnv(),
+        ProjectPackage("root", "1.0"),
+        None,
+        Pool(),
+        config,
+        installed=Repository(),
+        executor=executor,
+    ).pipeline()
+
+    assert installer.executor is executor
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import pytest
+from cleo.io.null_io import NullIO
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.factory import Factory
+from poetry.repositories.pool import Pool
+from poetry.repositories.repository import Repository
+from tests.helpers import get_package
+
+from poetry_solve_plugin.analyzer import BranchAnalyzer, DuplicateGroup
+from poetry_solve_plugin.provider import Provider
+
+
+@pytest.fixture
+def package() -> ProjectPackage:
+    package = ProjectPackage("root", "1.0")
+    package.python_versions = "^3.6"
+    return package
+
+
+@pytest.fixture
+def repo() -> Repository:
+    return Repository()
+
+
+@pytest.fixture
+def analyzer(package: ProjectPackage, repo: Repository) -> BranchAnalyzer:
+    return BranchAnalyzer(Provider(package, Pool([repo]), NullIO()))
+
+
+def test_analyze_without_duplicates(
+    analyzer: BranchAnalyzer, package: ProjectPackage, repo: Repository
+):
+    package.add_dependency(Factory.create_dependency("A", "*"))
+    repo.add_package(get_package("A", "1.0"))
+
+    report = analyzer.analyze()
+
+    assert report.groups == []
+    assert report.packages == 1
+    assert report.estimated_branches == 0
+
+
+def test_analyze_reachable_duplicates(
+    analyzer: BranchAnalyzer, package: ProjectPackage, repo: Repository
+):
+    package.add_dependency(
+        Factory.create_dependency("A", {"version": "^1.0", "python": "<3.8"})
+    )
+    package.add_dependency(
+        Factory.create_dependency("A", {"version": "^2.0", "python": ">=3.8"})
+    )
+    # Same constraint, merged without branching
+    package.add_dependency(
+        Factory.create_dependency("C", {"version": "^1.0", "python": "<3.8"})
+    )
+    package.add_dependency(
+        Factory.create_dependency("C", {"version": "^1.0", "python": ">=3.8"})
+    )
+
+    package_a1 = get_package("A", "1.0")
+    package_a2 = get_package("A", "2.0")
+    package_a2.add_dependency(
+        Factory.create_dependency(
+            "B", {"version": "^1.0", "markers": "os_name == 'nt'"}
+        )
+    )
+    package_a2.add_dependency(
+        Factory.create_dependency(
+            "B", {"version": "^2.0", "markers": "os_name == 'posix'"}
+        )
+    )
+    for pkg in [
+        package_a1,
+        package_a2,
+        get_package("B", "1.0"),
+        get_package("B", "2.0"),
+        get_package("C", "1.0"),
+    ]:
+        repo.add_package(pkg)
+
+    report = analyzer.analyze()
+
+    assert report.groups == [
+        DuplicateGroup("root (1.0)", "a", 2),
+        DuplicateGroup("a (2.0)", "b", 3),
+    ]
+    assert report.packages == 5
+    assert report.estimated_branches == 6
+    assert "Estimated number of override branches: up to 6" in report.report()
+
+
+def test_analyze_duplicates_the_provider_does_not_split(
+    analyzer: BranchAnalyzer, package: ProjectPackage, repo: Repository
+):
+    # The markers only differ by their extras, so the resolver reports the
+    # conflict instead of splitting
+    package.add_dependency(
+        Factory.create_dependency("A", {"version": "^1.0", "markers": "extra == 'x'"})
+    )
+    package.add_dependency(
+        Factory.create_dependency("A", {"version": "^2.0", "markers": "extra == 'y'"})
+    )
+    repo.add_package(get_package("A", "1.0"))
+    repo.add_package(get_package("A", "2.0"))
+
+    report = analyzer.analyze()
+
+    assert report.groups == []
+    assert report.estimated_branches == 0
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+import pytest
+from cleo.io.null_io import NullIO
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.factory import Factory
+from poetry.puzzle.exceptions import SolverProblemError
+from poetry.repositories.pool import Pool
+from poetry.repositories.repository import Repository
+from tests.helpers import get_package
+
+from poetry_solve_plugin.branch_tree import BranchTree
+from poetry_solve_plugin.provider import Provider
+from poetry_solve_plugin.solver import Solver
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def add_duplicates(package: ProjectPackage, name: str, constraints: list[str]):
+    for constraint, python in zip(constraints, ["<3.8", ">=3.8"]):
+        package.add_dependency(
+            Factory.create_dependency(name, {"version": constraint, "python": python})
+        )
+
+
+def solve(root: ProjectPackage, packages: list[ProjectPackage], tree: BranchTree):
+    repo = Repository()
+    for package in packages:
+        repo.add_package(package)
+    pool = Pool([repo])
+    provider = Provider(root, pool, NullIO())
+    provider.add_hooks(tree)
+
+    Solver(root, pool, Repository(), Repository(), NullIO(), provider).solve()
+
+
+def test_nested_and_pruned_branches(tmp_path: Path):
+    root = ProjectPackage("root", "1.0")
+    add_duplicates(root, "A", ["^1.0", "^2.0"])
+    a = get_package("A", "2.0")
+    add_duplicates(a, "B", ["^1.0", "^2.0"])
+
+    tree = BranchTree()
+    solve(
+        root,
+        [get_package("A", "1.0"), a, get_package("B", "1.0"), get_package("B", "2.0")],
+        tree,
+    )
+
+    assert [
+        (branch.id, branch.parent, branch.overrides, branch.marker, branch.status)
+        for branch in tree.branches
+    ] == [
+        (0, None, [], "", "succeeded"),
+        (
+            1,
+            0,
+            ['root (1.0): a (>=1.0,<2.0) ; python_version < "3.8"'],
+            'python_version < "3.8"',
+            "succeeded",
+        ),
+        (
+            2,
+            0,
+            ['root (1.0): a (>=2.0,<3.0) ; python_version >= "3.8"'],
+            'python_version >= "3.8"',
+            "succeeded",
+        ),
+        (
+            3,
+            2,
+            ['a (2.0): b (>=1.0,<2.0) ; python_version < "3.8"'],
+            'python_version < "3.8"',
+            "pruned",
+        ),
+        (
+            4,
+            2,
+            ['a (2.0): b (>=2.0,<3.0) ; python_version >= "3.8"'],
+            'python_version >= "3.8"',
+            "succeeded",
+        ),
+    ]
+    assert tree.branches[2].time >= tree.branches[4].time
+
+    tree.save(tmp_path / "branches.json")
+    data = json.loads(tmp_path.joinpath("branches.json").read_text())
+    assert len(data["branches"]) == 5
+    assert [
+        (group["package"], group["dependency"], group["branches"], group["pruned"])
+        for group in data["groups"]
+    ] == [("root (1.0)", "a", 2, 0), ("a (2.0)", "b", 1, 1)]
+
+    tree.save(tmp_path / "branches.dot")
+    dot = tmp_path.joinpath("branches.dot").read_text()
+    assert dot.startswith("digraph branches {\n")
+    assert "  b2 -> b3;\n" in dot
+    assert 'python_version >= \\"3.8\\"' in dot
+
+
+def test_conflicting_branches():
+    root = ProjectPackage("root", "1.0")
+    add_duplicates(root, "A", ["^1.0", "^2.0"])
+
+    tree = BranchTree()
+    with pytest.raises(SolverProblemError):
+        solve(root, [get_package("A", "1.0")], tree)
+
+    assert [(branch.id, branch.status) for branch in tree.branches] == [
+        (0, "conflicted"),
+        (1, "succeeded"),
+        (2, "conflicted"),
+    ]
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import pytest
+from cleo.io.null_io import NullIO
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.factory import Factory
+from poetry.repositories.pool import Pool
+from poetry.repositories.repository import Repository
+from tests.helpers import get_package
+
+from poetry_solve_plugin.budget import SolveBudget
+from poetry_solve_plugin.exceptions import SolveBudgetExceeded
+from poetry_solve_plugin.provider import Provider
+from poetry_solve_plugin.solver import Solver
+
+
+@pytest.fixture
+def package() -> ProjectPackage:
+    package = ProjectPackage("root", "1.0")
+    package.add_dependency(
+        Factory.create_dependency("A", {"version": "^1.0", "python": "<3.8"})
+    )
+    package.add_dependency(
+        Factory.create_dependency("A", {"version": "^2.0", "python": ">=3.8"})
+    )
+    return package
+
+
+@pytest.fixture
+def pool() -> Pool:
+    repo = Repository()
+    repo.add_package(get_package("A", "1.0"))
+    repo.add_package(get_package("A", "2.0"))
+    return Pool([repo])
+
+
+def make_solver(package: ProjectPackage, pool: Pool, budget: SolveBudget) -> Solver:
+    io = NullIO()
+    return Solver(
+        package,
+        pool,
+        Repository(),
+        Repository(),
+        io,
+        Provider(package, pool, io),
+        budget=budget,
+    )
+
+
+def test_solve_within_budget(package: ProjectPackage, pool: Pool):
+    budget = SolveBudget(timeout=60, max_branches=2)
+    transaction = make_solver(package, pool, budget).solve()
+
+    assert len(transaction.calculate_operations()) == 2
+    assert budget.branches == 2
+
+
+def test_max_branches_exceeded(package: ProjectPackage, pool: Pool):
+    with pytest.raises(SolveBudgetExceeded) as e:
+        make_solver(package, pool, SolveBudget(max_branches=1)).solve()
+
+    assert e.value.branching == {("root (1.0)", "a"): 2}
+    assert e.value.report() == (
+        "Dependency resolution stopped: limit of 1 override branches exceeded.\n"
+        "Duplicate dependencies that caused the most branching:\n"
+        "  - root (1.0) requires a: 2 branches"
+    )
+
+
+def test_timeout_exceeded(package: ProjectPackage, pool: Pool):
+    with pytest.raises(SolveBudgetExceeded) as e:
+        make_solver(package, pool, SolveBudget(timeout=0)).solve()
+
+    assert e.value.reason.startswith("time limit of 0 seconds exceeded")
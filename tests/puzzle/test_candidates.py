@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from cleo.io.null_io import NullIO
+from poetry.core.packages.dependency import Dependency
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.puzzle.provider import Provider as BaseProvider
+from poetry.repositories.pool import Pool
+from poetry.repositories.repository import Repository
+from tests.helpers import get_package
+
+from poetry_solve_plugin.candidates import Candidates
+from poetry_solve_plugin.provider import Provider
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+
+VERSIONS = [
+    "0.9",
+    "1.0.dev0",
+    "1.0a1",
+    "1.0rc1",
+    "1.0",
+    "1.0+local",
+    "1.0.post1",
+    "1.0.1",
+    "1.1",
+    "1.5",
+    "2.0a1",
+    "2.0.0.post1.dev1",
+    "2.0",
+    "2.0.post2",
+    "2.1",
+    "3.0.0.dev1",
+    "3.0.0",
+    "10.0",
+    "1!0.5",
+]
+
+
+@pytest.fixture
+def pool() -> Pool:
+    return Pool(
+        [Repository([get_package("foo", version) for version in reversed(VERSIONS)])]
+    )
+
+
+@pytest.mark.parametrize(
+    "constraint",
+    [
+        "*",
+        "<2.0",
+        "<=2.0",
+        ">1.0",
+        "==1.0",
+        "!=2.0",
+        "^1.0 || ^3.0",
+        "~1.0",
+        "1.0.*",
+        ">=2.0a1",
+        "<2.0.0.post1.dev1",
+        ">=1.0,<1.0",
+    ],
+)
+@pytest.mark.parametrize("allows_prereleases", [False, True])
+def test_candidates_are_same_as_base_provider(
+    pool: Pool, constraint: str, allows_prereleases: bool
+):
+    root = ProjectPackage("root", "1.0")
+    any_version = Dependency("foo", "*", allows_prereleases=True)
+    dependency = Dependency("foo", constraint, allows_prereleases=allows_prereleases)
+    # A fresh search, answered by the pool
+    base = BaseProvider(root, pool, NullIO())
+
+    candidates = Candidates(
+        any_version.constraint, pool.find_packages(any_version), True
+    )
+    packages = candidates.find(dependency.constraint, dependency.allows_prereleases())
+
+    assert [p.version.text for p in packages] == [
+        p.version.text for p in base.search_for(dependency)
+    ]
+
+
+def test_prereleases_of_the_next_patch_are_admitted():
+    pool = Pool(
+        [Repository([get_package("foo", "1.0.0b1"), get_package("foo", "0.9")])]
+    )
+    dependency = Dependency("foo", "^1.0", allows_prereleases=True)
+
+    packages = Provider(ProjectPackage("root", "1.0"), pool, NullIO()).search_for(
+        dependency
+    )
+
+    assert [p.version.text for p in packages] == ["1.0.0b1"]
+    assert [p.version.text for p in packages] == [
+        p.version.text for p in pool.find_packages(dependency)
+    ]
+
+
+def test_prereleases_are_searched_for_if_first_search_did_not_admit_them():
+    pool = Pool([Repository([get_package("foo", "1.1b1"), get_package("foo", "1.0")])])
+    provider = Provider(ProjectPackage("root", "1.0"), pool, NullIO())
+
+    stable = provider.search_for(Dependency("foo", "^1.0"))
+    prereleases = provider.search_for(
+        Dependency("foo", "^1.0", allows_prereleases=True)
+    )
+
+    assert [p.version.text for p in stable] == ["1.0"]
+    assert [p.version.text for p in prereleases] == ["1.1b1", "1.0"]
+
+
+def test_candidates_are_shared_by_providers_of_a_pool(
+    pool: Pool, mocker: MockerFixture
+):
+    root = ProjectPackage("root", "1.0")
+    find_packages = mocker.spy(pool, "find_packages")
+
+    packages = Provider(root, pool, NullIO()).search_for(Dependency("foo", ">=1.0"))
+    narrower = Provider(root, pool, NullIO()).search_for(Dependency("foo", "^2.0"))
+    broader = Provider(root, pool, NullIO()).search_for(Dependency("foo", "*"))
+    other_pool = Provider(root, Pool(pool.repositories), NullIO()).search_for(
+        Dependency("foo", "^2.0")
+    )
+
+    assert [p.version.text for p in packages][:3] == ["1!0.5", "10.0", "3.0.0"]
+    assert [p.version.text for p in narrower] == ["2.1", "2.0.post2", "2.0"]
+    assert len(broader) == len(packages) + 1
+    assert [p.version.text for p in other_pool] == [p.version.text for p in narrower]
+    assert find_packages.call_count == 2
+
+
+def test_identical_searches_share_their_result(pool: Pool):
+    dependency = Dependency("foo", "*")
+    candidates = Candidates(dependency.constraint, pool.find_packages(dependency))
+
+    assert candidates.find(dependency.constraint, False) is candidates.find(
+        Dependency("foo", "*").constraint, False
+    )
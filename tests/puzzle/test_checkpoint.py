@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+from cleo.io.null_io import NullIO
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.factory import Factory
+from poetry.repositories.pool import Pool
+from poetry.repositories.repository import Repository
+from tests.helpers import get_package
+
+from poetry_solve_plugin.checkpoint import Checkpoint
+from poetry_solve_plugin.provider import Provider
+from poetry_solve_plugin.solver import Solver
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+
+@pytest.fixture
+def package() -> ProjectPackage:
+    package = ProjectPackage("root", "1.0")
+    package.add_dependency(
+        Factory.create_dependency("A", {"version": "^1.0", "python": "<3.8"})
+    )
+    package.add_dependency(
+        Factory.create_dependency("A", {"version": "^2.0", "python": ">=3.8"})
+    )
+    return package
+
+
+@pytest.fixture
+def pool() -> Pool:
+    repo = Repository()
+    repo.add_package(get_package("A", "1.0"))
+    repo.add_package(get_package("A", "2.0"))
+    return Pool([repo])
+
+
+@pytest.fixture
+def checkpoint_path(tmp_path: Path) -> Path:
+    return tmp_path / "checkpoint.pickle"
+
+
+def make_solver(
+    package: ProjectPackage, pool: Pool, checkpoint: Checkpoint | None
+) -> Solver:
+    io = NullIO()
+    return Solver(
+        package,
+        pool,
+        Repository(),
+        Repository(),
+        io,
+        Provider(package, pool, io),
+        checkpoint=checkpoint,
+    )
+
+
+def test_checkpoint_is_cleared_after_solve(
+    package: ProjectPackage, pool: Pool, checkpoint_path: Path
+):
+    checkpoint = Checkpoint(checkpoint_path, "fingerprint", interval=0)
+    transaction = make_solver(package, pool, checkpoint).solve()
+
+    assert sorted(
+        op.package.full_pretty_version for op in transaction.calculate_operations()
+    ) == ["1.0", "2.0"]
+    assert not checkpoint_path.exists()
+    assert len(checkpoint) == 0
+
+
+def test_resume_interrupted_solve(
+    package: ProjectPackage,
+    pool: Pool,
+    checkpoint_path: Path,
+    mocker: MockerFixture,
+):
+    solve_branch = Solver._solve_branch
+    calls = []
+
+    def interrupt_second_branch(self: Solver, *args, **kwargs):
+        calls.append(args)
+        if len(calls) == 2:
+            raise KeyboardInterrupt()
+
+        return solve_branch(self, *args, **kwargs)
+
+    mocker.patch.object(Solver, "_solve_branch", interrupt_second_branch)
+    with pytest.raises(KeyboardInterrupt):
+        make_solver(
+            package, pool, Checkpoint(checkpoint_path, "fingerprint", interval=60)
+        ).solve()
+
+    assert checkpoint_path.exists()
+
+    mocker.patch.object(Solver, "_solve_branch", solve_branch)
+    _solve = mocker.spy(Solver, "_solve")
+
+    checkpoint = Checkpoint(checkpoint_path, "fingerprint")
+    assert checkpoint.load()
+    assert len(checkpoint) == 1
+
+    transaction = make_solver(package, pool, checkpoint).solve()
+
+    assert sorted(
+        op.package.full_pretty_version for op in transaction.calculate_operations()
+    ) == ["1.0", "2.0"]
+    # The root resolution and the completed branch are not solved again
+    assert _solve.call_count == 2
+    assert not checkpoint_path.exists()
+
+
+def test_checkpoint_of_other_inputs_is_ignored(
+    package: ProjectPackage, pool: Pool, checkpoint_path: Path, mocker: MockerFixture
+):
+    mocker.patch.object(Checkpoint, "clear")
+    make_solver(
+        package, pool, Checkpoint(checkpoint_path, "fingerprint", interval=0)
+    ).solve()
+    assert checkpoint_path.exists()
+
+    assert Checkpoint(checkpoint_path, "fingerprint").load()
+    assert not Checkpoint(checkpoint_path, "other").load()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from poetry.core.packages.dependency import Dependency
+from poetry.core.version.markers import parse_marker
+
+from poetry.factory import Factory
+
+from poetry_solve_plugin.interning import DependencyInterner
+
+
+def test_identical_dependencies_are_interned():
+    interner = DependencyInterner()
+    dependency = Factory.create_dependency(
+        "foo", {"version": "^1.0", "markers": 'sys_platform == "linux"'}
+    )
+    same = Factory.create_dependency(
+        "foo", {"version": "^1.0", "markers": 'sys_platform == "linux"'}
+    )
+    other_marker = Factory.create_dependency(
+        "foo", {"version": "^1.0", "markers": 'sys_platform == "win32"'}
+    )
+
+    interned = interner.intern(dependency)
+
+    assert interned is not dependency
+    assert interner.intern(same) is interned
+    assert interner.intern(other_marker) is not interned
+    assert interner.intern(Dependency("foo", "^1.0", optional=True)) is not interned
+
+
+def test_annotated_variants_are_shared():
+    interner = DependencyInterner()
+    dependency = Factory.create_dependency("foo", "^1.0")
+    marker = parse_marker('python_version >= "3.8"')
+
+    annotated = interner.annotate(dependency, marker, ">=3.8")
+
+    assert annotated.transitive_marker == marker
+    assert annotated.transitive_python_versions == ">=3.8"
+    assert interner.annotate(Dependency("foo", "^1.0"), marker, ">=3.8") is annotated
+    # The original dependency and the canonical one are not annotated
+    assert dependency.transitive_marker.is_any()
+    assert interner.intern(dependency).transitive_marker.is_any()
+    assert interner.annotate(dependency, dependency.marker, "*") is (
+        interner.intern(dependency)
+    )
+
+
+def test_direct_origin_dependencies_are_copied():
+    interner = DependencyInterner()
+    dependency = Factory.create_dependency(
+        "demo", {"git": "https://github.com/demo/demo.git"}
+    )
+    marker = parse_marker('python_version >= "3.8"')
+
+    assert interner.intern(dependency) is dependency
+
+    annotated = interner.annotate(dependency, marker, ">=3.8")
+    assert annotated is not dependency
+    assert annotated.transitive_marker == marker
+    assert dependency.transitive_marker.is_any()
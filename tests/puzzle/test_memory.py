@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import logging
+import tracemalloc
+from typing import TYPE_CHECKING
+
+import pytest
+from cleo.io.null_io import NullIO
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.factory import Factory
+from poetry.repositories.pool import Pool
+from poetry.repositories.repository import Repository
+from tests.helpers import get_package
+
+from poetry_solve_plugin import memory
+from poetry_solve_plugin.memory import MemoryLimit, MemoryProfile, parse_size
+from poetry_solve_plugin.provider import Provider
+from poetry_solve_plugin.solver import Solver
+from poetry_solve_plugin.trace import SolveTrace
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+
+def test_memory_is_sampled_after_each_branch():
+    root = ProjectPackage("root", "1.0")
+    for constraint, python in [("^1.0", "<3.8"), ("^2.0", ">=3.8")]:
+        root.add_dependency(
+            Factory.create_dependency("A", {"version": constraint, "python": python})
+        )
+    repo = Repository()
+    repo.add_package(get_package("A", "1.0"))
+    repo.add_package(get_package("A", "2.0"))
+    pool = Pool([repo])
+    provider = Provider(root, pool, NullIO())
+    trace = SolveTrace()
+    profile = MemoryProfile(limit=3, trace=trace)
+    provider.add_hooks(profile)
+
+    profile.start()
+    try:
+        Solver(root, pool, Repository(), Repository(), NullIO(), provider).solve()
+    finally:
+        profile.stop()
+
+    assert not tracemalloc.is_tracing()
+    assert [sample.phase for sample in profile.samples] == ["branch 1", "branch 2"]
+    for sample in profile.samples:
+        assert 0 < sample.traced <= sample.traced_peak
+        assert 0 < len(sample.sites) <= 3
+        for location, size, count in sample.sites:
+            assert location.startswith(("poetry/puzzle/", "poetry_solve_plugin/"))
+            assert size > 0 and count > 0
+
+    assert len(trace) == len(profile.samples)
+    report = profile.report().splitlines()
+    assert report[0] == "Memory at the end of each phase:"
+    assert report[1].startswith("  - branch 1: peak RSS ")
+    assert report[3].startswith("Top allocation sites after branch ")
+
+
+def test_nothing_is_sampled_without_tracing():
+    profile = MemoryProfile()
+
+    assert profile.sample("lock load") is None
+    assert profile.report() == "No memory samples."
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [
+        ("512", 512),
+        ("4K", 4096),
+        ("1.5M", 3 * 2**19),
+        ("3G", 3 * 2**30),
+        ("2GiB", 2**31),
+    ],
+)
+def test_parse_size(size: str, expected: int):
+    assert parse_size(size) == expected
+
+
+def test_parse_invalid_size():
+    with pytest.raises(ValueError):
+        parse_size("3 GB per branch")
+
+
+def test_memory_limit_is_checked_at_intervals():
+    limit = MemoryLimit(1, interval=3)
+
+    assert [limit.exceeded() for _ in range(6)] == [False, False, True] * 2
+    assert limit.exceeded(force=True)
+    assert limit.releases == 3
+    assert not MemoryLimit(2**60).exceeded(force=True)
+
+
+def test_memory_limit_is_ignored_without_current_rss(
+    tmp_path: Path,
+    mocker: MockerFixture,
+    caplog: pytest.LogCaptureFixture,
+):
+    # Only the peak is known, which stays above the limit once reached
+    mocker.patch.object(memory, "_STATM", str(tmp_path / "missing"))
+    mocker.patch.object(memory, "_peak_rss", return_value=2**40)
+    root = ProjectPackage("root", "1.0")
+    root.add_dependency(Factory.create_dependency("A", "^1.0"))
+    pool = Pool([Repository([get_package("A", "1.0")])])
+    provider = Provider(root, pool, NullIO())
+    limit = MemoryLimit(1, interval=1)
+    provider.set_memory_limit(limit)
+    release_caches = mocker.spy(provider, "release_caches")
+
+    with caplog.at_level(logging.WARNING):
+        for _ in range(3):
+            provider.set_overrides({})
+            Solver(root, pool, Repository(), Repository(), NullIO(), provider).solve()
+
+    assert release_caches.call_count == 0
+    assert limit.releases == 0
+    assert len(caplog.records) == 1
+    assert "memory limit is ignored" in caplog.text
+    assert limit.report().startswith("Memory limit ignored")
+
+
+def test_solve_within_memory_limit():
+    root = ProjectPackage("root", "1.0")
+    for constraint, python in [("^1.0", "<3.8"), ("^2.0", ">=3.8")]:
+        root.add_dependency(
+            Factory.create_dependency("A", {"version": constraint, "python": python})
+        )
+    a = get_package("A", "2.0")
+    a.add_dependency(Factory.create_dependency("B", "^1.0"))
+    repo = Repository()
+    for package in [get_package("A", "1.0"), a, get_package("B", "1.0")]:
+        repo.add_package(package)
+
+    results = []
+    for limit in [None, MemoryLimit(1, interval=1)]:
+        pool = Pool([repo])
+        provider = Provider(root, pool, NullIO())
+        provider.set_memory_limit(limit)
+        transaction = Solver(
+            root, pool, Repository(), Repository(), NullIO(), provider
+        ).solve()
+        results.append(
+            sorted(
+                f"{op.package.name} {op.package.version}"
+                for op in transaction.calculate_operations()
+            )
+        )
+
+    assert results[0] == results[1] == ["a 1.0", "a 2.0", "b 1.0"]
+    assert limit.releases > 0
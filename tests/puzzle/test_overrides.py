@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import pickle
+
+from poetry.core.packages.package import Package
+
+from poetry.factory import Factory
+
+from poetry_solve_plugin.overrides import override_record, package_key
+
+
+def test_package_keys_are_interned():
+    key = package_key(Package("foo", "1.0"))
+
+    assert package_key(Package("Foo", "1.0")) is key
+    assert package_key(Package("foo", "2.0")) is not key
+    assert pickle.loads(pickle.dumps(key)) is key
+
+
+def test_override_records_are_interned():
+    dependency = Factory.create_dependency("bar", {"version": "^2.0", "python": "<3"})
+    record = override_record(dependency)
+
+    same_dependency = Factory.create_dependency(
+        "bar", {"version": "^2.0", "python": "<3"}
+    )
+
+    assert override_record(same_dependency) is record
+    assert pickle.loads(pickle.dumps(record)) is record
+    assert not hasattr(record, "__dict__")
+
+
+def test_override_record_to_dependency():
+    override = Factory.create_dependency(
+        "bar",
+        {"version": "^2.0", "python": ">=3.6", "extras": ["baz"], "source": "other"},
+    )
+    record = override_record(override)
+    # Merging duplicates modifies them
+    override.marker = override.marker.without_extras()
+    override._source_name = None
+
+    overridden = record.to_dependency()
+
+    assert overridden is not record.to_dependency()
+    assert overridden.constraint == record.constraint
+    assert overridden.marker == record.marker
+    assert overridden.python_versions == ">=3.6"
+    assert overridden.transitive_marker == record.marker
+    assert overridden.extras == frozenset(["baz"])
+    assert overridden.source_name == "other"
+
+
+def test_override_records_of_other_sources_differ():
+    dependency = Factory.create_dependency("bar", {"version": "^2.0"})
+    other = Factory.create_dependency("bar", {"version": "^2.0", "source": "other"})
+
+    assert override_record(other) is not override_record(dependency)
+    assert override_record(other) != override_record(dependency)
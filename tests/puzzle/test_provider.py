@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+from cleo.io.null_io import NullIO
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.factory import Factory
+from poetry.packages import DependencyPackage
+from poetry.puzzle.exceptions import OverrideNeeded
+from poetry.repositories.pool import Pool
+from poetry.repositories.repository import Repository
+from tests.helpers import get_package
+
+from poetry_solve_plugin.hooks import ProviderHooks
+from poetry_solve_plugin.provider import Provider
+from poetry_solve_plugin.solver import Solver
+
+if TYPE_CHECKING:
+    from poetry.core.packages.dependency import Dependency
+    from pytest_mock import MockerFixture
+
+    from poetry_solve_plugin.overrides import Overrides
+
+
+@pytest.fixture
+def root() -> ProjectPackage:
+    return ProjectPackage("root", "1.0")
+
+
+@pytest.fixture
+def provider(root: ProjectPackage) -> Provider:
+    return Provider(root, Pool(), NullIO())
+
+
+def test_merge_duplicates_with_same_constraint(
+    provider: Provider, root: ProjectPackage
+):
+    dependencies = [
+        Factory.create_dependency("foo", "^1.0"),
+        Factory.create_dependency(
+            "enum34", {"version": "^1.0", "markers": 'python_version == "2.7"'}
+        ),
+        Factory.create_dependency(
+            "enum34", {"version": "^1.0", "markers": 'python_version == "3.3"'}
+        ),
+        Factory.create_dependency(
+            "enum34", {"version": "^1.0", "markers": 'python_version == "2.7"'}
+        ),
+    ]
+
+    merged = provider._merge_duplicates(dependencies, root)
+
+    assert [dep.name for dep in merged] == ["foo", "enum34"]
+    assert str(merged[1].marker) == 'python_version == "2.7" or python_version == "3.3"'
+
+
+def test_merge_duplicates_keeps_conflicts_with_same_markers(
+    provider: Provider, root: ProjectPackage
+):
+    dependencies = [
+        Factory.create_dependency(
+            "foo",
+            {
+                "version": "^1.0",
+                "markers": 'sys_platform == "linux" and python_version >= "3.8"',
+            },
+        ),
+        Factory.create_dependency(
+            "foo",
+            {
+                "version": "^2.0",
+                "markers": 'python_version >= "3.8" and sys_platform == "linux"',
+            },
+        ),
+    ]
+
+    merged = provider._merge_duplicates(dependencies, root)
+
+    # Markers are compared structurally, the order of the clauses does not matter
+    assert merged == dependencies
+
+
+def test_merge_duplicates_with_different_markers_needs_overrides(
+    provider: Provider, root: ProjectPackage
+):
+    dependencies = [
+        Factory.create_dependency("foo", {"version": "^1.0", "python": "<3.8"}),
+        Factory.create_dependency("foo", {"version": "^2.0", "python": ">=3.8"}),
+    ]
+
+    with pytest.raises(OverrideNeeded) as e:
+        provider._merge_duplicates(dependencies, root)
+
+    assert len(e.value.overrides) == 2
+    assert provider.branching == {("root (1.0)", "foo"): 2}
+
+
+def test_root_is_completed_once_per_override_state(
+    root: ProjectPackage, mocker: MockerFixture
+):
+    root.add_dependency(Factory.create_dependency("A", "*"))
+    root.add_dependency(Factory.create_dependency("B", "*"))
+
+    package_b = get_package("B", "1.0")
+    package_b.add_dependency(
+        Factory.create_dependency("C", {"version": "^1.0", "python": "<3.8"})
+    )
+    package_b.add_dependency(
+        Factory.create_dependency("C", {"version": "^2.0", "python": ">=3.8"})
+    )
+
+    repo = Repository()
+    for package in [
+        get_package("A", "1.0"),
+        package_b,
+        get_package("C", "1.0"),
+        get_package("C", "2.0"),
+    ]:
+        repo.add_package(package)
+    pool = Pool([repo])
+
+    clone = mocker.spy(ProjectPackage, "clone")
+    io = NullIO()
+    transaction = Solver(
+        root, pool, Repository(), Repository(), io, Provider(root, pool, io)
+    ).solve()
+
+    assert sorted(
+        f"{op.package.name} {op.package.version}"
+        for op in transaction.calculate_operations()
+    ) == ["a 1.0", "b 1.0", "c 1.0", "c 2.0"]
+    # The root has no overrides in any branch
+    assert len([call for call in clone.call_args_list if call.args[0] is root]) == 1
+
+
+def test_completed_packages_share_dependencies_but_not_groups(
+    root: ProjectPackage, mocker: MockerFixture
+):
+    package = get_package("A", "1.0")
+    package.add_dependency(Factory.create_dependency("B", "^1.0"))
+    package.add_dependency(Factory.create_dependency("C", "^1.0"))
+
+    repo = Repository()
+    repo.add_package(package)
+    pool = Pool([repo])
+    provider = Provider(root, pool, NullIO())
+    pool_package = mocker.spy(pool, "package")
+
+    dependency = Factory.create_dependency("A", "^1.0")
+    first = provider.complete_package(DependencyPackage(dependency, package))
+    second = provider.complete_package(DependencyPackage(dependency, package))
+
+    assert pool_package.call_count == 1
+    assert first.package is not second.package
+    assert [id(dep) for dep in first.requires] == [id(dep) for dep in second.requires]
+
+    # Changes made by the solver to a completed package are not shared
+    first.add_dependency(Factory.create_dependency("D", "^1.0"))
+    third = provider.complete_package(DependencyPackage(dependency, package))
+
+    assert [dep.name for dep in third.requires] == ["b", "c"]
+
+
+def test_package_lookups_are_shared_between_contexts(root: ProjectPackage):
+    package = get_package("A", "1.0")
+    package.add_dependency(
+        Factory.create_dependency(
+            "B", {"version": "^1.0", "markers": 'sys_platform == "linux"'}
+        )
+    )
+    package.add_dependency(
+        Factory.create_dependency(
+            "B", {"version": "^1.0", "markers": 'sys_platform == "win32"'}
+        )
+    )
+
+    repo = Repository()
+    repo.add_package(package)
+    provider = Provider(root, Pool([repo]), NullIO())
+
+    completed = []
+    for python in ["<3.8", ">=3.8"]:
+        dependency = Factory.create_dependency(
+            "A", {"version": "^1.0", "python": python}
+        )
+        completed.append(
+            provider.complete_package(DependencyPackage(dependency, package))
+        )
+
+    assert provider.package_lookups.fetches == 1
+    assert provider.package_lookups.saved == 1
+    # Merging the duplicate dependencies did not modify the fetched package
+    for completed_package in completed:
+        assert [str(dep.marker) for dep in completed_package.requires] == [
+            'sys_platform == "linux" or sys_platform == "win32"'
+        ]
+    fetched = provider._package_lookups.get(("a", "1.0", (), None), None)
+    assert [str(dep.marker) for dep in fetched.requires] == [
+        'sys_platform == "linux"',
+        'sys_platform == "win32"',
+    ]
+
+
+def test_merging_duplicates_does_not_change_the_extras_of_fetched_package(
+    root: ProjectPackage,
+):
+    package = get_package("A", "1.0")
+    package.extras = {"foo": []}
+    for platform in ["linux", "win32"]:
+        package.add_dependency(
+            Factory.create_dependency(
+                "B",
+                {
+                    "version": "^1.0",
+                    "optional": True,
+                    "markers": f'extra == "foo" and sys_platform == "{platform}"',
+                },
+            )
+        )
+
+    repo = Repository()
+    repo.add_package(package)
+    provider = Provider(root, Pool([repo]), NullIO())
+
+    dependency = Factory.create_dependency("A", {"version": "^1.0", "extras": ["foo"]})
+    for python in ["<3.8", ">=3.8"]:
+        dependency.python_versions = python
+        provider.complete_package(DependencyPackage(dependency, package))
+
+    fetched = provider._package_lookups.get(("a", "1.0", ("foo",), None), None)
+    assert provider.package_lookups.fetches == 1
+    assert [dep.in_extras for dep in fetched.requires] == [["foo"], ["foo"]]
+
+    # The copies handed out by the lookups are merged in place
+    for _ in range(2):
+        copied = provider._get_package("a", "1.0", extras=["foo"], repository=None)
+        provider._merge_duplicates(copied.all_requires, package)
+
+        assert [dep.in_extras for dep in fetched.requires] == [["foo"], ["foo"]]
+
+
+class RecordingHooks(ProviderHooks):
+    def __init__(self) -> None:
+        self.events: list[tuple] = []
+
+    def complete_package_start(self, package: DependencyPackage) -> None:
+        self.events.append(("complete_package_start", package.name))
+
+    def complete_package_end(self, package: DependencyPackage) -> None:
+        self.events.append(("complete_package_end", package.name))
+
+    def override_needed(
+        self, package: DependencyPackage, overrides: list[Overrides]
+    ) -> None:
+        self.events.append(("override_needed", package.name, len(overrides)))
+
+    def deferred_lookup_start(self, dependency: Dependency) -> None:
+        self.events.append(("deferred_lookup_start", dependency.name))
+
+    def deferred_lookup_end(self, dependency: Dependency) -> None:
+        self.events.append(("deferred_lookup_end", dependency.name))
+
+    def pool_fetch_start(self, name: str, version: str | None) -> None:
+        self.events.append(("pool_fetch_start", name, version))
+
+    def pool_fetch_end(self, name: str, version: str | None) -> None:
+        self.events.append(("pool_fetch_end", name, version))
+
+
+def test_hooks_are_notified_of_each_phase(root: ProjectPackage):
+    demo = Path(__file__).parent.parent.joinpath(
+        "fixtures", "distributions", "demo-0.1.0-py2.py3-none-any.whl"
+    )
+    package = get_package("A", "1.0")
+    package.add_dependency(Factory.create_dependency("demo", {"path": str(demo)}))
+    package.add_dependency(
+        Factory.create_dependency("B", {"version": "^1.0", "python": "<3.8"})
+    )
+    package.add_dependency(
+        Factory.create_dependency("B", {"version": "^2.0", "python": ">=3.8"})
+    )
+
+    repo = Repository()
+    repo.add_package(package)
+    provider = Provider(root, Pool([repo]), NullIO())
+    hooks = RecordingHooks()
+    provider.add_hooks(hooks)
+
+    provider.search_for(Factory.create_dependency("A", "^1.0"))
+    (candidate,) = provider.search_for(Factory.create_dependency("A", "^1.0"))
+    with pytest.raises(OverrideNeeded):
+        provider.complete_package(candidate)
+
+    assert hooks.events == [
+        ("pool_fetch_start", "a", None),
+        ("pool_fetch_end", "a", None),
+        ("complete_package_start", "a"),
+        ("pool_fetch_start", "a", "1.0"),
+        ("pool_fetch_end", "a", "1.0"),
+        ("deferred_lookup_start", "demo"),
+        ("deferred_lookup_end", "demo"),
+        ("override_needed", "a", 2),
+        ("complete_package_end", "a"),
+    ]
+
+    provider.remove_hooks(hooks)
+    provider.search_for(Factory.create_dependency("A", "^2.0"))
+
+    assert len(hooks.events) == 9
+
+
+def test_release_caches_forgets_the_oldest_entries(root: ProjectPackage):
+    repo = Repository()
+    for name in "ABCD":
+        repo.add_package(get_package(name, "1.0"))
+    provider = Provider(root, Pool([repo]), NullIO())
+    for name in "ABCD":
+        (package,) = provider.search_for(Factory.create_dependency(name, "*"))
+        provider.complete_package(package)
+
+    provider.release_caches()
+
+    assert [key[0].complete_name for key in provider._completed] == ["c", "d"]
+    assert len(provider._package_lookups) == 2
+    assert provider.package_lookups.fetches == 4
+
+    (package,) = provider.search_for(Factory.create_dependency("A", "*"))
+    provider.complete_package(package)
+
+    assert provider.package_lookups.fetches == 5
+
+
+def test_overrides_keep_the_source_of_the_recorded_dependency(root: ProjectPackage):
+    root.add_dependency(
+        Factory.create_dependency("foo", {"version": ">=1.5", "python": "<3.8"})
+    )
+    root.add_dependency(
+        Factory.create_dependency(
+            "foo", {"version": "1.5", "python": ">=3.8", "source": "other"}
+        )
+    )
+
+    default = Repository()
+    for version in ["1.5", "1.9"]:
+        default.add_package(get_package("foo", version))
+    other = Repository(name="other")
+    pinned = get_package("foo", "1.5")
+    pinned._source_type = "legacy"
+    pinned._source_url = "https://other.org/simple"
+    pinned._source_reference = "other"
+    other.add_package(pinned)
+    pool = Pool()
+    pool.add_repository(default)
+    pool.add_repository(other, secondary=True)
+
+    io = NullIO()
+    transaction = Solver(
+        root, pool, Repository(), Repository(), io, Provider(root, pool, io)
+    ).solve()
+
+    assert sorted(
+        (op.package.name, op.package.version.text, op.package.source_reference)
+        for op in transaction.calculate_operations()
+    ) == [("foo", "1.5", "other"), ("foo", "1.9", None)]
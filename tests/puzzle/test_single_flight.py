@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from poetry_solve_plugin.single_flight import SingleFlight
+
+
+def test_repeated_requests_are_fetched_once():
+    flight: SingleFlight[str, int] = SingleFlight()
+    fetches = []
+
+    def fetch() -> int:
+        fetches.append(1)
+        return 42
+
+    assert [flight.get("key", fetch) for _ in range(3)] == [42, 42, 42]
+    assert flight.get("other", fetch) == 42
+
+    assert len(fetches) == 2
+    assert flight.stats.requests == 4
+    assert flight.stats.fetches == 2
+    assert flight.stats.saved == 2
+    assert flight.stats.coalesced == 0
+
+
+def test_concurrent_requests_share_the_fetch_in_flight():
+    flight: SingleFlight[str, object] = SingleFlight()
+    release = threading.Event()
+    result = object()
+    fetches = []
+
+    def fetch() -> object:
+        fetches.append(1)
+        release.wait(5)
+        return result
+
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(flight.get, "key", fetch) for _ in range(4)]
+        deadline = time.monotonic() + 5
+        while flight.stats.requests < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert all(r is result for r in results)
+    assert len(fetches) == 1
+    assert flight.stats.coalesced == 3
+    assert flight.stats.report() == (
+        "4 package lookups, 1 fetched, 3 saved (3 joined a fetch in flight)"
+    )
+
+
+def test_failed_fetches_are_not_remembered():
+    flight: SingleFlight[str, int] = SingleFlight()
+
+    def fail() -> int:
+        raise ValueError("not found")
+
+    with pytest.raises(ValueError):
+        flight.get("key", fail)
+
+    assert flight.get("key", lambda: 1) == 1
+    assert flight.stats.fetches == 2
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+from poetry.factory import Factory
+from poetry.packages import DependencyPackage
+from tests.helpers import get_package
+
+from poetry_solve_plugin.solve_cache import SolveCache
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+
+def test_results_are_addressed_by_fingerprint(tmp_path: Path):
+    cache = SolveCache(tmp_path / "solve-results")
+    a = get_package("a", "1.0")
+    b = DependencyPackage(
+        Factory.create_dependency("b", "^2.0"), get_package("b", "2.0")
+    )
+
+    assert cache.get("foo") is None
+
+    cache.put("foo", [a, b])
+
+    packages = cache.get("foo")
+    assert [(p.name, p.version.text) for p in packages] == [("a", "1.0"), ("b", "2.0")]
+    assert isinstance(packages[1], DependencyPackage)
+    assert cache.get("bar") is None
+    assert [p.name for p in tmp_path.joinpath("solve-results").iterdir()] == [
+        "foo.pickle"
+    ]
+
+
+def test_expired_results_are_removed(tmp_path: Path, mocker: MockerFixture):
+    cache = SolveCache(tmp_path)
+    cache.put("foo", [get_package("a", "1.0")])
+    mocker.patch("time.time", return_value=time.time() + 7200)
+
+    assert cache.get("foo", max_age=3 * 3600) is not None
+    assert cache.get("foo", max_age=3600) is None
+    assert not (tmp_path / "foo.pickle").exists()
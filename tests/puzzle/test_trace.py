@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from cleo.io.null_io import NullIO
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.factory import Factory
+from poetry.repositories.pool import Pool
+from poetry.repositories.repository import Repository
+from tests.helpers import get_package
+
+from poetry_solve_plugin.provider import Provider
+from poetry_solve_plugin.solver import Solver
+from poetry_solve_plugin.trace import SolveTrace
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_completions_are_traced_within_their_branch(tmp_path: Path):
+    root = ProjectPackage("root", "1.0")
+    root.add_dependency(
+        Factory.create_dependency("A", {"version": "^1.0", "python": "<3.8"})
+    )
+    root.add_dependency(
+        Factory.create_dependency("A", {"version": "^2.0", "python": ">=3.8"})
+    )
+    repo = Repository()
+    repo.add_package(get_package("A", "1.0"))
+    repo.add_package(get_package("A", "2.0"))
+    pool = Pool([repo])
+    provider = Provider(root, pool, NullIO())
+    trace = SolveTrace()
+    provider.add_hooks(trace)
+
+    Solver(root, pool, Repository(), Repository(), NullIO(), provider).solve()
+    trace.save(tmp_path / "trace.json")
+
+    events = json.loads(tmp_path.joinpath("trace.json").read_text())["traceEvents"]
+    branches = [e for e in events if e["cat"] == "branch"]
+    assert [(e["args"]["branch"], e["args"]["parent"]) for e in branches] == [
+        (1, 0),
+        (2, 0),
+    ]
+    overrides = [e for e in events if e["cat"] == "override"]
+    assert [(e["ph"], e["args"]["branches"]) for e in overrides] == [("i", 2)]
+
+    completions = {
+        (e["args"]["package"], e["args"]["version"], e["args"]["branch"])
+        for e in events
+        if e["cat"] == "complete_package"
+    }
+    assert completions == {
+        ("root", "1.0", 0),
+        ("root", "1.0", 1),
+        ("root", "1.0", 2),
+        ("a", "1.0", 1),
+        ("a", "2.0", 2),
+    }
+    # Spans of a branch are within the span of the branch
+    for branch in branches:
+        start, end = branch["ts"], branch["ts"] + branch["dur"]
+        for event in events:
+            if event["args"].get("branch") == branch["args"]["branch"]:
+                assert start <= event["ts"] <= end
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import random
+from typing import TYPE_CHECKING
+
+import pytest
+from poetry.core.packages.package import Package
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.puzzle.transaction import Transaction as BaseTransaction
+from tests.helpers import get_package
+
+from poetry_solve_plugin.transaction import Transaction
+
+if TYPE_CHECKING:
+    from poetry.installation.operations import OperationTypes
+
+
+def describe(operations: list[OperationTypes]) -> list[tuple]:
+    return [
+        (
+            op.job_type,
+            op.priority,
+            op.skipped,
+            op.skip_reason,
+            *(
+                (p.name, p.version.text, p.source_type)
+                for p in (
+                    [op.initial_package, op.target_package]
+                    if op.job_type == "update"
+                    else [op.package]
+                )
+            ),
+        )
+        for op in operations
+    ]
+
+
+def random_packages(rng: random.Random, count: int) -> list[Package]:
+    packages = []
+    for _ in range(count):
+        package = get_package(f"p{rng.randrange(40)}", f"1.{rng.randrange(3)}")
+        if rng.random() < 0.2:
+            package._source_type = rng.choice(["legacy", "git"])
+            package._source_url = "https://foo.bar"
+        packages.append(package)
+
+    return packages
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize(
+    ("with_uninstalls", "synchronize"), [(False, False), (True, False), (True, True)]
+)
+def test_operations_are_same_as_base_transaction(
+    seed: int, with_uninstalls: bool, synchronize: bool
+):
+    rng = random.Random(seed)
+    current = random_packages(rng, 30)
+    result = [(package, rng.randrange(3)) for package in random_packages(rng, 30)]
+    installed = random_packages(rng, 30) + [get_package("pip", "22.0")]
+    root = ProjectPackage(f"p{rng.randrange(40)}", "1.0")
+
+    expected = BaseTransaction(current, result, installed, root).calculate_operations(
+        with_uninstalls=with_uninstalls, synchronize=synchronize
+    )
+    operations = Transaction(current, result, installed, root).calculate_operations(
+        with_uninstalls=with_uninstalls, synchronize=synchronize
+    )
+
+    assert describe(operations) == describe(expected)
+
+
+def test_uninstalls_of_locked_packages():
+    transaction = Transaction(
+        [get_package("a", "1.0"), get_package("b", "1.0"), get_package("c", "1.0")],
+        [(get_package("a", "2.0"), 1)],
+        installed_packages=[get_package("a", "1.0"), get_package("b", "1.0")],
+    )
+
+    assert describe(transaction.calculate_operations()) == [
+        ("uninstall", float("inf"), False, None, ("b", "1.0", None)),
+        ("update", 1, False, None, ("a", "1.0", None), ("a", "2.0", None)),
+    ]
+
+
+class LockedPackages:
+    """Current packages looked up by name, like a ``LockfileRepository``."""
+
+    def __init__(self, packages: list[Package]) -> None:
+        self._packages = packages
+        self.looked_up: list[str] = []
+
+    @property
+    def package_names(self) -> list[str]:
+        return list(dict.fromkeys(package.name for package in self._packages))
+
+    def packages_named(self, name: str) -> list[Package]:
+        self.looked_up.append(name)
+        return [package for package in self._packages if package.name == name]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_synchronize_with_locked_packages_looked_up_by_name(seed: int):
+    rng = random.Random(seed)
+    current = random_packages(rng, 30)
+    result = [(package, rng.randrange(3)) for package in random_packages(rng, 30)]
+    installed = random_packages(rng, 30) + [get_package("pip", "22.0")]
+    locked = LockedPackages(current)
+
+    expected = BaseTransaction(current, result, installed).calculate_operations(
+        synchronize=True
+    )
+    operations = Transaction(locked, result, installed).calculate_operations(
+        synchronize=True
+    )
+
+    assert describe(operations) == describe(expected)
+    # Only the locked packages to uninstall are looked up
+    result_names = {package.name for package, _ in result}
+    installed_names = {package.name for package in installed}
+    assert set(locked.looked_up) == {
+        package.name
+        for package in current
+        if package.name not in result_names and package.name in installed_names
+    }
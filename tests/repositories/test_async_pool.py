@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Iterator, TYPE_CHECKING, TypeVar
+
+import pytest
+from poetry.core.packages.dependency import Dependency
+
+from poetry.repositories.pool import Pool
+from poetry.repositories.pypi_repository import PyPiRepository
+
+from poetry_solve_plugin.async_pool import AsyncPool
+
+if TYPE_CHECKING:
+    import httpretty
+
+T = TypeVar("T")
+
+JSON_FIXTURES = Path(__file__).parent / "fixtures" / "pypi.org" / "json"
+
+
+class PyPiStandIn(ThreadingHTTPServer):
+    """Serves the JSON API fixtures, slowly enough to overlap requests.
+
+    Each request is held until ``overlap`` requests have been in flight at once,
+    or for ``delay`` seconds.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.overlap = math.inf
+        self.requests: Counter[str] = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Condition()
+        super().__init__(("127.0.0.1", 0), Handler)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+
+class Handler(SimpleHTTPRequestHandler):
+    server: PyPiStandIn
+
+    def do_GET(self) -> None:
+        server = self.server
+        with server.lock:
+            server.requests[self.path] += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.lock.notify_all()
+            server.lock.wait_for(
+                lambda: server.max_in_flight >= server.overlap, timeout=server.delay
+            )
+
+        try:
+            self._respond()
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _respond(self) -> None:
+        # /pypi/<name>/json or /pypi/<name>/<version>/json
+        parts = self.path.strip("/").split("/")[1:-1]
+        fixture = JSON_FIXTURES.joinpath(*parts[:-1], f"{parts[-1]}.json")
+        if not fixture.exists():
+            self.send_error(404)
+            return
+
+        content = fixture.read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def server(http: type[httpretty.httpretty]) -> Iterator[PyPiStandIn]:
+    http.disable()
+
+    server = PyPiStandIn(delay=0.2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def repository(server: PyPiStandIn) -> PyPiRepository:
+    return PyPiRepository(url=server.url, disable_cache=True, fallback=False)
+
+
+@pytest.fixture
+def pool(repository: PyPiRepository) -> Iterator[AsyncPool]:
+    with AsyncPool.wrap(Pool([repository]), workers=4) as pool:
+        yield pool
+
+
+def test_lookups_are_same_as_pool(repository: PyPiRepository, pool: AsyncPool):
+    dependency = Dependency("attrs", ">=17.0")
+    expected = Pool([repository])
+
+    assert pool.find_packages(dependency) == expected.find_packages(dependency)
+
+    package = pool.package("attrs", "17.4.0")
+    expected_package = expected.package("attrs", "17.4.0")
+    assert package == expected_package
+    assert package.requires == expected_package.requires
+
+
+def test_prefetched_lookup_is_not_requested_again(server: PyPiStandIn, pool: AsyncPool):
+    dependencies = [Dependency("attrs", ">=17.0"), Dependency("six", "*")]
+
+    pool.prefetch(dependencies)
+    for dependency in dependencies:
+        assert pool.find_packages(dependency)
+
+    assert server.requests == {"/pypi/attrs/json": 1, "/pypi/six/json": 1}
+
+
+def on_loop(pool: AsyncPool, call: Callable[[], T]) -> T:
+    async def run() -> T:
+        return call()
+
+    return asyncio.run_coroutine_threadsafe(run(), pool._get_loop()).result()
+
+
+def wait_for_prefetches(pool: AsyncPool, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while on_loop(pool, lambda: len(pool._requests)) or (
+        on_loop(pool, lambda: len(pool._prefetched)) < count
+    ):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_completed_prefetches_leave_the_requests_in_flight(
+    server: PyPiStandIn, pool: AsyncPool
+):
+    dependencies = [Dependency("attrs", ">=17.0"), Dependency("six", "*")]
+
+    pool.prefetch(dependencies)
+    wait_for_prefetches(pool, 2)
+
+    assert pool.find_packages(dependencies[0])
+    assert on_loop(pool, lambda: list(pool._prefetched)) == [
+        ("find_packages", "six", dependencies[1].constraint, False, None)
+    ]
+    assert pool.find_packages(dependencies[0])
+    assert server.requests == {"/pypi/attrs/json": 2, "/pypi/six/json": 1}
+
+
+def test_oldest_prefetches_are_dropped(server: PyPiStandIn, repository: PyPiRepository):
+    dependencies = [Dependency("attrs", ">=17.0"), Dependency("six", "*")]
+
+    with AsyncPool([repository], workers=1, max_prefetched=1) as pool:
+        pool.prefetch(dependencies)
+        wait_for_prefetches(pool, 1)
+
+        for dependency in dependencies:
+            assert pool.find_packages(dependency)
+
+    assert server.requests == {"/pypi/attrs/json": 2, "/pypi/six/json": 1}
+
+
+def test_concurrent_identical_requests_share_one_fetch(
+    server: PyPiStandIn, pool: AsyncPool
+):
+    with ThreadPoolExecutor(4) as executor:
+        packages = list(
+            executor.map(lambda _: pool.package("attrs", "17.4.0"), range(4))
+        )
+
+    assert server.requests == {"/pypi/attrs/17.4.0/json": 1}
+    assert all(package == packages[0] for package in packages)
+    # Each caller gets its own package, since the solver modifies them
+    assert len({id(package) for package in packages}) == 4
+
+
+def test_independent_requests_are_concurrent(server: PyPiStandIn, pool: AsyncPool):
+    dependencies = [Dependency(name, "*") for name in ["attrs", "six", "pylev"]]
+    # Sequential requests would each wait for the others until the delay
+    server.overlap = len(dependencies)
+    server.delay = 10
+
+    pool.prefetch(dependencies)
+    for dependency in dependencies:
+        pool.find_packages(dependency)
+
+    assert server.max_in_flight == len(dependencies)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+from poetry.core.packages.dependency import Dependency
+from poetry.packages import Locker
+
+from poetry_solve_plugin.lockfile_repository import LockfileRepository
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+
+@pytest.fixture
+def locker() -> Locker:
+    return Locker(FIXTURES / "up_to_date_lock" / "poetry.lock", {})
+
+
+def test_packages_are_same_as_locked_repository(locker: Locker):
+    expected = locker.locked_repository(True).packages
+    packages = LockfileRepository(locker, with_dev_reqs=True).packages
+
+    assert packages == expected
+    for package, expected_package in zip(packages, expected):
+        assert package.requires == expected_package.requires
+        assert package.marker == expected_package.marker
+        assert package.files == expected_package.files
+
+
+def test_packages_are_materialized_on_first_access(
+    locker: Locker, mocker: MockerFixture
+):
+    create_package = mocker.spy(LockfileRepository, "_create_package")
+    repository = LockfileRepository(locker, with_dev_reqs=True)
+
+    assert create_package.call_count == 0
+    assert len(repository) == 9
+    assert len(repository.package_names) == 9
+    assert repository.digest() == LockfileRepository(locker, True).digest()
+    assert repository.packages_from("directory", "file") == []
+    assert create_package.call_count == 0
+
+    packages = repository.find_packages(Dependency("requests", ">=2.0"))
+    assert [p.name for p in packages] == ["requests"]
+    assert create_package.call_count == 1
+
+    assert repository.package("requests", packages[0].version.text) == packages[0]
+    assert repository.has_package(packages[0])
+    assert create_package.call_count == 1
+
+    assert len(repository.packages) == 9
+    assert create_package.call_count == 9
+
+    assert repository.packages_named("requests") == packages
+
+
+def test_not_locked(tmp_path: Path):
+    repository = LockfileRepository(Locker(tmp_path / "poetry.lock", {}))
+
+    assert repository.packages == []
+    assert len(repository) == 0
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+from cleo.io.null_io import NullIO
+from poetry.core.packages.dependency import Dependency
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.repositories import Pool
+from poetry.repositories import Repository
+from poetry.repositories.pypi_repository import PyPiRepository
+from tests.helpers import get_package
+from tests.repositories.test_legacy_repository import (
+    MockRepository as MockLegacyRepository,
+)
+from tests.repositories.test_pypi_repository import MockRepository
+
+from poetry_solve_plugin.provider import Provider
+from poetry_solve_plugin.requires_python import annotate_python_versions
+from poetry_solve_plugin.snapshot import load_snapshot, MetadataSnapshot, RecordingPool
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+
+class ListingRepository(PyPiRepository):
+    def __init__(self, releases: dict[str, list[str | None]]) -> None:
+        super().__init__(url="http://foo.bar", disable_cache=True)
+        self._releases = releases
+
+    def _get(self, url: str) -> dict | None:
+        return {
+            "info": {"name": "foo"},
+            "releases": {
+                version: [{"requires_python": python} for python in files]
+                for version, files in self._releases.items()
+            },
+        }
+
+
+@pytest.fixture
+def repository() -> ListingRepository:
+    return ListingRepository(
+        {
+            "1.0": [">=2.7", ">=2.7"],
+            "2.0": [">=3.6", None],
+            "3.0": [">=3.8", ">=3.8"],
+            "4.0": ["not a constraint"],
+            "5.0": [">=3.10"],
+        }
+    )
+
+
+@pytest.fixture
+def root() -> ProjectPackage:
+    root = ProjectPackage("root", "1.0")
+    root.python_versions = "~3.7"
+
+    return root
+
+
+def test_listed_python_versions_of_pypi_releases(repository: ListingRepository):
+    pool = Pool([repository])
+    packages = pool.find_packages(Dependency("foo", "*"))
+
+    annotate_python_versions(pool, packages)
+
+    assert {p.version.text: p.python_versions for p in packages} == {
+        "1.0": ">=2.7",
+        "2.0": "*",
+        "3.0": ">=3.8",
+        "4.0": "*",
+        "5.0": ">=3.10",
+    }
+
+
+@pytest.mark.parametrize(
+    ("repository", "name", "python_versions"),
+    [
+        (MockRepository(), "black", {"19.10b0": ">=3.6"}),
+        (MockRepository(), "pytest", {"3.5.0": "*"}),
+        (MockLegacyRepository(), "futures", {"3.2.0": ">=2.6, <3"}),
+        (MockLegacyRepository(), "ipython", {"5.7.0": "*", "7.5.0": ">=3.5"}),
+    ],
+)
+def test_listed_python_versions_of_fixtures(
+    repository: Repository, name: str, python_versions: dict[str, str]
+):
+    pool = Pool([repository])
+    packages = pool.find_packages(Dependency(name, "*"))
+
+    annotate_python_versions(pool, packages)
+
+    assert {p.version.text: p.python_versions for p in packages} == python_versions
+
+
+def test_packages_of_other_repositories_are_kept():
+    package = get_package("foo", "1.0")
+    package.python_versions = ">=3.8"
+    pool = Pool([Repository([package, get_package("foo", "2.0")])])
+
+    annotate_python_versions(pool, pool.find_packages(Dependency("foo", "*")))
+
+    assert [p.python_versions for p in pool.repositories[0].packages] == [">=3.8", "*"]
+
+
+def test_unsupported_releases_are_pruned_before_fetching(
+    root: ProjectPackage, repository: ListingRepository, mocker: MockerFixture
+):
+    pool = Pool([repository])
+    find_packages = mocker.spy(pool, "find_packages")
+    package = mocker.spy(pool, "package")
+    provider = Provider(root, pool, NullIO())
+
+    packages = provider.search_for(Dependency("foo", "*"))
+    provider.search_for(Dependency("foo", ">=1.0"))
+
+    assert [p.version.text for p in packages] == ["4.0", "2.0", "1.0"]
+    assert find_packages.call_count == 1
+    assert package.call_count == 0
+    assert provider.python_pruning.searches == 2
+    assert provider.python_pruning.versions == 2
+    assert provider.python_pruning.fetches_avoided == 2
+
+
+def test_unsupported_releases_are_kept_if_none_is_supported(
+    root: ProjectPackage, repository: ListingRepository
+):
+    provider = Provider(root, Pool([repository]), NullIO())
+
+    packages = provider.search_for(Dependency("foo", ">=3.0,<4.0 || ^5.0"))
+
+    # The solver reports that they require another Python version
+    assert [p.version.text for p in packages] == ["5.0", "3.0"]
+    assert provider.python_pruning.versions == 0
+
+
+def test_listed_python_versions_are_recorded(
+    repository: ListingRepository, tmp_path: Path
+):
+    snapshot = MetadataSnapshot()
+    RecordingPool(Pool([repository]), snapshot).find_packages(Dependency("foo", "*"))
+    snapshot.save(tmp_path / "snapshot.idx")
+
+    packages = load_snapshot(tmp_path / "snapshot.idx").find_packages(
+        Dependency("foo", "*")
+    )
+
+    assert {p.version.text: p.python_versions for p in packages}["3.0"] == ">=3.8"
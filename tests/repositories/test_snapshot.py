@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+from cleo.io.null_io import NullIO
+from poetry.core.packages.dependency import Dependency
+from poetry.core.packages.project_package import ProjectPackage
+
+from poetry.factory import Factory
+from poetry.repositories import Pool
+from poetry.repositories import Repository
+from tests.helpers import get_package
+from tests.repositories.test_pypi_repository import MockRepository
+
+from poetry_solve_plugin.exceptions import SnapshotError
+from poetry_solve_plugin.provider import Provider
+from poetry_solve_plugin.snapshot import (
+    load_snapshot,
+    MetadataSnapshot,
+    RecordingPool,
+    SnapshotIndex,
+    SnapshotPool,
+)
+from poetry_solve_plugin.solver import Solver
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+
+@pytest.fixture
+def root() -> ProjectPackage:
+    root = ProjectPackage("root", "1.0")
+    root.python_versions = "^3.7"
+    root.add_dependency(Factory.create_dependency("attrs", "^17.4"))
+    root.add_dependency(
+        Factory.create_dependency(
+            "cachecontrol", {"version": "^0.12.5", "extras": ["filecache"]}
+        )
+    )
+    root.add_dependency(
+        Factory.create_dependency(
+            "demo", {"git": "https://github.com/demo/no-dependencies.git"}
+        )
+    )
+
+    return root
+
+
+def solve(root: ProjectPackage, pool: Pool) -> list[tuple[str, str, str]]:
+    io = NullIO()
+    solver = Solver(
+        root, pool, Repository(), Repository(), io, Provider(root, pool, io)
+    )
+    return sorted(
+        (op.package.name, op.package.version.text, op.package.source_type or "")
+        for op in solver.solve().calculate_operations()
+    )
+
+
+@pytest.mark.parametrize("suffix", [".json", ".idx"])
+def test_offline_solve_is_same_as_recorded(
+    root: ProjectPackage, tmp_path: Path, mocker: MockerFixture, suffix: str
+):
+    path = tmp_path / f"snapshot{suffix}"
+    snapshot = MetadataSnapshot()
+    expected = solve(root, RecordingPool(Pool([MockRepository()]), snapshot))
+    snapshot.save(path)
+
+    # The git dependency is not cloned again
+    mocker.patch("poetry.core.vcs.git.Git.clone", side_effect=AssertionError)
+    assert solve(root, SnapshotPool(load_snapshot(path))) == expected
+    assert expected == [
+        ("attrs", "17.4.0", ""),
+        ("cachecontrol", "0.12.5", ""),
+        ("demo", "0.1.2", "git"),
+        ("lockfile", "0.12.2", ""),
+    ]
+
+
+@pytest.mark.parametrize("suffix", [".json", ".idx"])
+@pytest.mark.parametrize(
+    ("name", "version"),
+    [("attrs", "17.4.0"), ("ipython", "4.1.0rc1"), ("pytest", "3.5.0")],
+)
+def test_snapshot_package_round_trip(
+    tmp_path: Path, suffix: str, name: str, version: str
+):
+    repository = MockRepository()
+    snapshot = MetadataSnapshot()
+    pool = RecordingPool(Pool([repository]), snapshot)
+    expected = pool.package(name, version)
+    snapshot.save(tmp_path / f"snapshot{suffix}")
+
+    package = load_snapshot(tmp_path / f"snapshot{suffix}").package(name, version)
+
+    assert package == expected
+    assert package.description == expected.description
+    assert package.python_versions == expected.python_versions
+    assert package.files == expected.files
+    assert [d.to_pep_508() for d in package.requires] == [
+        d.to_pep_508() for d in expected.requires
+    ]
+    assert [
+        (d.constraint, d.marker, d.python_versions, d.is_optional(), d.in_extras)
+        for d in package.requires
+    ] == [
+        (d.constraint, d.marker, d.python_versions, d.is_optional(), d.in_extras)
+        for d in expected.requires
+    ]
+    assert {extra: len(deps) for extra, deps in package.extras.items()} == {
+        extra: len(deps) for extra, deps in expected.extras.items()
+    }
+
+
+def test_snapshot_keeps_package_sources():
+    package = get_package("foo", "1.0")
+    package._source_type = "legacy"
+    package._source_url = "https://foo.bar/simple/"
+    package._source_reference = "foo-index"
+    snapshot = MetadataSnapshot()
+    pool = RecordingPool(Pool([Repository([package], name="foo-index")]), snapshot)
+
+    pool.find_packages(Dependency("foo", "*"))
+    pool.package("foo", "1.0")
+
+    (listed,) = snapshot.find_packages(Dependency("foo", ">=1.0"))
+    for loaded in [listed, snapshot.package("foo", "1.0")]:
+        assert loaded.source_type == "legacy"
+        assert loaded.source_url == "https://foo.bar/simple/"
+        assert loaded.source_reference == "foo-index"
+
+
+@pytest.mark.parametrize("suffix", [".json", ".idx"])
+def test_unrecorded_search_is_filtered_from_recorded_versions(
+    tmp_path: Path, suffix: str
+):
+    repository = Repository(
+        [get_package("foo", version) for version in ["1.1", "2.0", "1.0", "2.1b1"]]
+    )
+    snapshot = MetadataSnapshot()
+    RecordingPool(Pool([repository]), snapshot).find_packages(Dependency("foo", "*"))
+    snapshot.save(tmp_path / f"snapshot{suffix}")
+
+    packages = load_snapshot(tmp_path / f"snapshot{suffix}").find_packages(
+        Dependency("foo", "<2.0")
+    )
+
+    assert sorted(p.version.text for p in packages) == ["1.0", "1.1"]
+
+
+def test_index_listings_are_sorted_by_version(tmp_path: Path):
+    repository = Repository(
+        [get_package("foo", version) for version in ["1.10", "1.9", "2.0", "1.0"]]
+    )
+    snapshot = MetadataSnapshot()
+    RecordingPool(Pool([repository]), snapshot).find_packages(Dependency("foo", "*"))
+    snapshot.save(tmp_path / "snapshot.idx")
+
+    index = SnapshotIndex(tmp_path / "snapshot.idx")
+    packages = index.find_packages(Dependency("foo", "*"))
+    unrecorded = index.find_packages(Dependency("foo", ">=1.0"))
+
+    # Recorded searches keep the order of the repository
+    assert [p.version.text for p in packages] == ["1.10", "1.9", "2.0", "1.0"]
+    assert [p.version.text for p in unrecorded] == ["1.0", "1.9", "1.10", "2.0"]
+
+
+def test_index_finds_every_record(tmp_path: Path):
+    snapshot = MetadataSnapshot()
+    pool = RecordingPool(
+        Pool([Repository([get_package(f"p{i}", "1.0") for i in range(500)])]),
+        snapshot,
+    )
+    for i in range(500):
+        pool.find_packages(Dependency(f"p{i}", "*"))
+        pool.package(f"p{i}", "1.0")
+    snapshot.save(tmp_path / "snapshot.idx")
+
+    index = SnapshotIndex(tmp_path / "snapshot.idx")
+
+    assert len(index) == 1000
+    for i in range(500):
+        assert index.package(f"p{i}", "1.0").name == f"p{i}"
+    with pytest.raises(SnapshotError):
+        index.package("p500", "1.0")
+
+
+def test_unrecorded_lookups_raise():
+    snapshot = MetadataSnapshot()
+    pool = SnapshotPool(snapshot)
+
+    with pytest.raises(SnapshotError):
+        pool.find_packages(Dependency("foo", "*"))
+    with pytest.raises(SnapshotError):
+        pool.package("foo", "1.0")
+
+
+def test_load_rejects_other_files(tmp_path: Path):
+    path = tmp_path / "snapshot.json"
+    path.write_text('{"version": 0}', encoding="utf-8")
+
+    with pytest.raises(SnapshotError):
+        MetadataSnapshot.load(path)
+    with pytest.raises(SnapshotError):
+        MetadataSnapshot.load(tmp_path / "missing.json")
+    with pytest.raises(SnapshotError):
+        load_snapshot(tmp_path / "missing.idx")
+    with pytest.raises(SnapshotError):
+        SnapshotIndex(path)
+
+
+def test_index_of_other_format_version_is_rejected(tmp_path: Path):
+    snapshot = MetadataSnapshot()
+    RecordingPool(
+        Pool([Repository([get_package("foo", "1.0")])]), snapshot
+    ).find_packages(Dependency("foo", "*"))
+    path = tmp_path / "snapshot.idx"
+    snapshot.save(path)
+    content = bytearray(path.read_bytes())
+    # Version 1 indexes were written with marshal
+    content[7] = 1
+    path.write_bytes(bytes(content))
+
+    with pytest.raises(SnapshotError, match="index format 1"):
+        SnapshotIndex(path)
+    with pytest.raises(SnapshotError, match="index format 1"):
+        load_snapshot(path)